@@ -0,0 +1,41 @@
+"""Add multi-outcome LMSR markets
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-02-20 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import ARRAY
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # --- Markets: outcome labels + share vector ---
+    op.add_column("markets", sa.Column("outcomes", ARRAY(sa.String(100))))
+    op.add_column("markets", sa.Column("q_outcomes", ARRAY(sa.Numeric(16, 6))))
+
+    # --- Price history: full price vector ---
+    op.add_column("price_history", sa.Column("prices", ARRAY(sa.Numeric(8, 4))))
+
+    # --- Outcome columns must hold arbitrary labels ---
+    op.alter_column("markets", "resolution_outcome", type_=sa.String(100))
+    op.alter_column("positions", "outcome", type_=sa.String(100))
+    op.alter_column("transactions", "outcome", type_=sa.String(100))
+
+
+def downgrade() -> None:
+    op.alter_column("transactions", "outcome", type_=sa.String(10))
+    op.alter_column("positions", "outcome", type_=sa.String(10))
+    op.alter_column("markets", "resolution_outcome", type_=sa.String(10))
+    op.drop_column("price_history", "prices")
+    op.drop_column("markets", "q_outcomes")
+    op.drop_column("markets", "outcomes")
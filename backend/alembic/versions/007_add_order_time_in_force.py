@@ -0,0 +1,49 @@
+"""Add time-in-force and expiry to orders
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-02-27 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # New enum values cannot be used in the transaction that adds them
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE orderstatus ADD VALUE IF NOT EXISTS 'expired'")
+
+    timeinforce = sa.Enum("gtc", "ioc", "fok", "post_only", "gtt", name="timeinforce")
+    timeinforce.create(op.get_bind(), checkfirst=True)
+
+    op.add_column(
+        "orders",
+        sa.Column("time_in_force", timeinforce, server_default="gtc"),
+    )
+    op.add_column("orders", sa.Column("expires_at", sa.DateTime(timezone=True)))
+    op.create_index(
+        "ix_orders_expires_at",
+        "orders",
+        ["expires_at"],
+        postgresql_where=sa.text(
+            "expires_at IS NOT NULL AND status IN ('open', 'partially_filled')"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_expires_at", table_name="orders")
+    op.drop_column("orders", "expires_at")
+    op.drop_column("orders", "time_in_force")
+    op.execute("DROP TYPE IF EXISTS timeinforce")
+    # Postgres cannot drop enum values; fold expired orders into cancelled
+    op.execute("UPDATE orders SET status = 'cancelled' WHERE status = 'expired'")
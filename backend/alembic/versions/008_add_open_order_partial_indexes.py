@@ -0,0 +1,55 @@
+"""Add partial covering index on open orders
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-03-02 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build without blocking order placement on a large orders table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_open_book",
+            "orders",
+            ["market_id", "side", "price", "created_at"],
+            postgresql_include=["quantity", "filled_quantity", "user_id", "expires_at"],
+            postgresql_where=sa.text("status IN ('open', 'partially_filled')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Superseded: the full composite index also carried every historical order
+        op.drop_index(
+            "ix_orders_book",
+            table_name="orders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_book",
+            "orders",
+            ["market_id", "side", "status", "price", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_orders_open_book",
+            table_name="orders",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,48 @@
+"""Add archive tables for finished markets
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-03-05 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table → indexed column groups (mirrors app/models/archive.py)
+ARCHIVES = {
+    "trade_fills": [("market_id", "created_at")],
+    "orders": [("market_id",), ("user_id", "created_at")],
+    "positions": [("market_id",), ("user_id", "market_id")],
+    "price_history": [("market_id", "created_at")],
+    "transactions": [("market_id",), ("user_id", "created_at")],
+}
+
+
+def upgrade() -> None:
+    op.add_column("markets", sa.Column("archived_at", sa.DateTime(timezone=True)))
+
+    for table, indexes in ARCHIVES.items():
+        archive = f"{table}_archive"
+        # Same columns and defaults, no foreign keys
+        op.execute(f"CREATE TABLE {archive} (LIKE {table} INCLUDING DEFAULTS)")
+        op.create_primary_key(f"pk_{archive}", archive, ["id"])
+        for cols in indexes:
+            op.create_index(f"ix_{archive}_{'_'.join(cols)}", archive, list(cols))
+
+
+def downgrade() -> None:
+    for table in reversed(list(ARCHIVES)):
+        archive = f"{table}_archive"
+        # Move rows back before dropping the archive
+        op.execute(f"INSERT INTO {table} SELECT * FROM {archive}")
+        op.drop_table(archive)
+
+    op.drop_column("markets", "archived_at")
@@ -0,0 +1,101 @@
+"""Partition transactions and price_history by month
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-03-09 00:00:00.000000
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# table → (foreign keys, indexes); mirrors the models
+TABLES = {
+    "transactions": (
+        [("user_id", "users"), ("market_id", "markets")],
+        {
+            "ix_transactions_user_time": ["user_id", "created_at"],
+            "ix_transactions_user_type": ["user_id", "type"],
+            "ix_transactions_market": ["market_id"],
+        },
+    ),
+    "price_history": (
+        [("market_id", "markets")],
+        {
+            "ix_price_history_market_id": ["market_id"],
+            "ix_price_history_market_time": ["market_id", "created_at"],
+        },
+    ),
+}
+
+OLD_INDEXES = {
+    "transactions": {
+        "ix_transactions_user_id": ["user_id"],
+        "ix_transactions_user_type": ["user_id", "type"],
+        "ix_transactions_market": ["market_id"],
+    },
+    "price_history": TABLES["price_history"][1],
+}
+
+
+def _month(index: int) -> datetime:
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _add_constraints(table: str, primary_key: list[str], indexes: dict) -> None:
+    foreign_keys, _ = TABLES[table]
+    op.create_primary_key(f"{table}_pkey", table, primary_key)
+    for column, target in foreign_keys:
+        op.create_foreign_key(f"{table}_{column}_fkey", table, target, [column], ["id"])
+    for name, columns in indexes.items():
+        op.create_index(name, table, columns)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc)
+
+    for table, (_, indexes) in TABLES.items():
+        old = f"{table}_unpartitioned"
+        op.rename_table(table, old)
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (created_at)"
+        )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        oldest = bind.execute(sa.text(f"SELECT min(created_at) FROM {old}")).scalar()
+        first = (oldest or now).astimezone(timezone.utc)
+        start = first.year * 12 + first.month - 1
+        end = now.year * 12 + now.month - 1 + MONTHS_AHEAD
+        for index in range(start, end + 1):
+            lower, upper = _month(index), _month(index + 1)
+            op.execute(
+                f"CREATE TABLE {table}_{lower:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+
+        op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        op.drop_table(old)
+        # Defined on the parent, created on every partition
+        _add_constraints(table, ["id", "created_at"], indexes)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        old = f"{table}_partitioned"
+        op.rename_table(table, old)
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        op.execute(f"DROP TABLE {old} CASCADE")
+        _add_constraints(table, ["id"], OLD_INDEXES[table])
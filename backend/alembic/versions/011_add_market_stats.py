@@ -0,0 +1,115 @@
+"""Add market_stats projection
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-03-12 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "market_stats",
+        sa.Column(
+            "market_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("markets.id"),
+            primary_key=True,
+        ),
+        sa.Column("buy_count", sa.Integer, server_default="0"),
+        sa.Column("buy_volume", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("sell_count", sa.Integer, server_default="0"),
+        sa.Column("sell_volume", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("fees", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("unique_traders", sa.Integer, server_default="0"),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+    op.create_table(
+        "market_stats_hourly",
+        sa.Column(
+            "market_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("markets.id"),
+            primary_key=True,
+        ),
+        sa.Column("hour", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("volume", sa.Numeric(14, 2), server_default="0"),
+    )
+
+    # Backfill from history, hot and archived rows alike: AMM buys/sells and
+    # fees from transactions, CLOB fills count once on each side
+    op.execute(
+        """
+        INSERT INTO market_stats (market_id, buy_count, buy_volume, sell_count,
+                                  sell_volume, fees, unique_traders)
+        SELECT m.id,
+               coalesce(t.buy_count, 0) + coalesce(f.fill_count, 0),
+               coalesce(t.buy_volume, 0) + coalesce(f.fill_volume, 0),
+               coalesce(t.sell_count, 0) + coalesce(f.fill_count, 0),
+               coalesce(t.sell_volume, 0) + coalesce(f.fill_volume, 0),
+               coalesce(t.fees, 0) + coalesce(f.fees, 0),
+               coalesce(p.traders, 0)
+        FROM markets m
+        LEFT JOIN (
+            SELECT market_id,
+                   count(*) FILTER (WHERE type = 'buy') AS buy_count,
+                   sum(abs(amount)) FILTER (WHERE type = 'buy') AS buy_volume,
+                   count(*) FILTER (WHERE type = 'sell') AS sell_count,
+                   sum(abs(amount)) FILTER (WHERE type = 'sell') AS sell_volume,
+                   sum(abs(amount)) FILTER (WHERE type = 'fee') AS fees
+            FROM (
+                SELECT market_id, type, amount FROM transactions
+                UNION ALL
+                SELECT market_id, type, amount FROM transactions_archive
+            ) tx
+            WHERE market_id IS NOT NULL GROUP BY market_id
+        ) t ON t.market_id = m.id
+        LEFT JOIN (
+            SELECT market_id, count(*) AS fill_count,
+                   sum(price * quantity) AS fill_volume, sum(fee) AS fees
+            FROM (
+                SELECT market_id, price, quantity, fee FROM trade_fills
+                UNION ALL
+                SELECT market_id, price, quantity, fee FROM trade_fills_archive
+            ) tf
+            GROUP BY market_id
+        ) f ON f.market_id = m.id
+        LEFT JOIN (
+            SELECT market_id, count(DISTINCT user_id) AS traders
+            FROM (
+                SELECT market_id, user_id FROM positions
+                UNION ALL
+                SELECT market_id, user_id FROM positions_archive
+            ) pos
+            GROUP BY market_id
+        ) p ON p.market_id = m.id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO market_stats_hourly (market_id, hour, volume)
+        SELECT market_id, date_trunc('hour', created_at), sum(abs(amount))
+        FROM transactions
+        WHERE type IN ('buy', 'sell') AND market_id IS NOT NULL
+          AND created_at >= now() - interval '24 hours'
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("market_stats_hourly")
+    op.drop_table("market_stats")
@@ -0,0 +1,55 @@
+"""Add user_stats read model
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-03-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the rebuild_user_stats task; run it once after deploying
+    op.create_table(
+        "user_stats",
+        sa.Column(
+            "user_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("users.id"),
+            primary_key=True,
+        ),
+        sa.Column("buys", sa.Integer, server_default="0"),
+        sa.Column("buy_amount", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("sells", sa.Integer, server_default="0"),
+        sa.Column("sell_amount", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("fills", sa.Integer, server_default="0"),
+        sa.Column("fill_bought", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("fill_sold", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("fees", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("payouts", sa.Integer, server_default="0"),
+        sa.Column("payout_amount", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("bonuses", sa.Integer, server_default="0"),
+        sa.Column("bonus_amount", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("realized_pnl", sa.Numeric(14, 2), server_default="0"),
+        sa.Column("wins", sa.Integer, server_default="0"),
+        sa.Column("losses", sa.Integer, server_default="0"),
+        sa.Column("current_streak", sa.Integer, server_default="0"),
+        sa.Column("best_streak", sa.Integer, server_default="0"),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
@@ -0,0 +1,80 @@
+"""Add double-entry ledger
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-03-21 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_postings",
+        sa.Column("id", sa.BigInteger, sa.Identity(), primary_key=True),
+        sa.Column("entry_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("account", sa.String(80), nullable=False),
+        sa.Column("kind", sa.String(20), nullable=False),
+        sa.Column("amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("market_id", UUID(as_uuid=True)),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_ledger_postings_account_id", "ledger_postings", ["account", "id"]
+    )
+    op.create_index("ix_ledger_postings_entry_id", "ledger_postings", ["entry_id"])
+
+    op.create_table(
+        "ledger_snapshots",
+        sa.Column("account", sa.String(80), primary_key=True),
+        sa.Column("last_posting_id", sa.BigInteger, primary_key=True),
+        sa.Column("balance", sa.Numeric(14, 2), nullable=False),
+        sa.Column("as_of", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+    # Open the journal with each user's current balances as one entry
+    op.execute(
+        # Colons before a name are escaped so they are not read as binds
+        """
+        WITH u AS (
+            SELECT id, balance, reserved_balance, gen_random_uuid() AS entry_id
+            FROM users
+        )
+        INSERT INTO ledger_postings (entry_id, account, kind, amount)
+        SELECT u.entry_id, leg.account, 'opening', leg.amount
+        FROM u
+        CROSS JOIN LATERAL (
+            VALUES
+                ('user:' || u.id || '\\:available', u.balance - u.reserved_balance),
+                ('user:' || u.id || '\\:reserved', u.reserved_balance),
+                ('house:opening', -u.balance)
+        ) AS leg (account, amount)
+        WHERE leg.amount <> 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ledger_snapshots")
+    op.drop_table("ledger_postings")
@@ -0,0 +1,30 @@
+"""Add private_bet_code_seq for invite code allocation
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-03-22 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing random codes stay valid; new ones come from this sequence
+    op.execute(
+        sa.schema.CreateSequence(
+            sa.Sequence("private_bet_code_seq", start=0, minvalue=0)
+        )
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence("private_bet_code_seq")))
@@ -0,0 +1,73 @@
+"""Move closed-bet whitelists into private_bet_invites
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-03-23 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "015"
+down_revision: Union[str, None] = "014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "private_bet_invites",
+        sa.Column(
+            "bet_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("private_bets.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("username", sa.String(255), primary_key=True),
+    )
+    op.create_index(
+        "ix_private_bet_invites_username",
+        "private_bet_invites",
+        ["username", "bet_id"],
+    )
+
+    op.execute(
+        """
+        INSERT INTO private_bet_invites (bet_id, username)
+        SELECT DISTINCT b.id, lower(ltrim(trim(u), '@'))
+        FROM private_bets b,
+             json_array_elements_text(b.allowed_usernames::json) AS u
+        WHERE b.is_closed AND b.allowed_usernames IS NOT NULL
+          AND ltrim(trim(u), '@') <> ''
+        """
+    )
+    # A closed bet without a whitelist was open to anyone
+    op.execute(
+        """
+        UPDATE private_bets b SET is_closed = false
+        WHERE is_closed AND NOT EXISTS (
+            SELECT 1 FROM private_bet_invites i WHERE i.bet_id = b.id
+        )
+        """
+    )
+    op.drop_column("private_bets", "allowed_usernames")
+
+
+def downgrade() -> None:
+    op.add_column("private_bets", sa.Column("allowed_usernames", sa.Text()))
+    op.execute(
+        """
+        UPDATE private_bets b SET allowed_usernames = i.usernames
+        FROM (
+            SELECT bet_id, json_agg(username ORDER BY username)::text AS usernames
+            FROM private_bet_invites GROUP BY bet_id
+        ) i
+        WHERE i.bet_id = b.id
+        """
+    )
+    op.drop_index("ix_private_bet_invites_username", table_name="private_bet_invites")
+    op.drop_table("private_bet_invites")
@@ -0,0 +1,28 @@
+"""Add private_bet_participants.voting_notice
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-03-24 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "016"
+down_revision: Union[str, None] = "015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "private_bet_participants",
+        sa.Column("voting_notice", sa.String(10), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("private_bet_participants", "voting_notice")
@@ -0,0 +1,67 @@
+"""Index comment threads for keyset pages and reply lookups
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-03-25 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "017"
+down_revision: Union[str, None] = "016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build without blocking new comments
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_comments_market_roots",
+            "comments",
+            ["market_id", "created_at", "id"],
+            postgresql_where=sa.text("parent_id IS NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_comments_parent",
+            "comments",
+            ["parent_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Superseded: pages only read top-level comments
+        op.drop_index(
+            "ix_comments_market_created",
+            table_name="comments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_comments_market_created",
+            "comments",
+            ["market_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_comments_parent",
+            table_name="comments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_comments_market_roots",
+            table_name="comments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
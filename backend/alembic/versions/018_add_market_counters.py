@@ -0,0 +1,68 @@
+"""Add comment and open-order counters to markets, recount traders
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-03-26 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "018"
+down_revision: Union[str, None] = "017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "markets",
+        sa.Column("comment_count", sa.Integer, server_default="0", nullable=False),
+    )
+    op.add_column(
+        "markets",
+        sa.Column("open_order_count", sa.Integer, server_default="0", nullable=False),
+    )
+
+    op.execute(
+        """
+        UPDATE markets m SET comment_count = c.n
+        FROM (SELECT market_id, count(*) AS n FROM comments GROUP BY market_id) c
+        WHERE c.market_id = m.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE markets m SET open_order_count = o.n
+        FROM (
+            SELECT market_id, count(*) AS n FROM orders
+            WHERE status IN ('open', 'partially_filled')
+            GROUP BY market_id
+        ) o
+        WHERE o.market_id = m.id
+        """
+    )
+    # total_traders counted position rows, and only for LMSR buys; recount
+    # distinct holders, archived markets included
+    op.execute(
+        """
+        UPDATE markets m SET total_traders = t.n
+        FROM (
+            SELECT market_id, count(DISTINCT user_id) AS n FROM (
+                SELECT market_id, user_id FROM positions
+                UNION ALL
+                SELECT market_id, user_id FROM positions_archive
+            ) p
+            GROUP BY market_id
+        ) t
+        WHERE t.market_id = m.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("markets", "open_order_count")
+    op.drop_column("markets", "comment_count")
@@ -0,0 +1,46 @@
+"""Add active positions and their cost to user_stats
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-03-27 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "019"
+down_revision: Union[str, None] = "018"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user_stats", sa.Column("active_positions", sa.Integer, server_default="0")
+    )
+    op.add_column(
+        "user_stats",
+        sa.Column("position_cost", sa.Numeric(14, 2), server_default="0"),
+    )
+    op.execute(
+        """
+        INSERT INTO user_stats (user_id, active_positions, position_cost)
+        SELECT user_id, count(*), sum(total_cost) FROM (
+            SELECT user_id, total_cost FROM positions WHERE shares > 0
+            UNION ALL
+            SELECT user_id, total_cost FROM positions_archive WHERE shares > 0
+        ) p
+        GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET active_positions = excluded.active_positions,
+            position_cost = excluded.position_cost
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user_stats", "position_cost")
+    op.drop_column("user_stats", "active_positions")
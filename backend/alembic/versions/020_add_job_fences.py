@@ -0,0 +1,29 @@
+"""Add job_fences for singleton job lease tokens
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-03-28 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "020"
+down_revision: Union[str, None] = "019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_fences",
+        sa.Column("name", sa.String(100), primary_key=True),
+        sa.Column("token", sa.BigInteger, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_fences")
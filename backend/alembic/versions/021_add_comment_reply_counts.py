@@ -0,0 +1,70 @@
+"""Add reply counts to comments, index replies in keyset order
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-03-29 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "021"
+down_revision: Union[str, None] = "020"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "comments",
+        sa.Column("reply_count", sa.Integer, server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE comments c SET reply_count = r.n
+        FROM (
+            SELECT parent_id, count(*) AS n FROM comments
+            WHERE parent_id IS NOT NULL
+            GROUP BY parent_id
+        ) r
+        WHERE r.parent_id = c.id
+        """
+    )
+
+    # Build without blocking new comments
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_comments_parent_created",
+            "comments",
+            ["parent_id", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Superseded: replies are read in keyset order
+        op.drop_index(
+            "ix_comments_parent",
+            table_name="comments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_comments_parent",
+            "comments",
+            ["parent_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_comments_parent_created",
+            table_name="comments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("comments", "reply_count")
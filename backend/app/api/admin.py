@@ -1,22 +1,40 @@
 import uuid
+from datetime import date, datetime
+from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel
 
 from app.core.dependencies import CurrentAdmin, DbSession, RedisConn
-from app.models.market import Market
+from app.models.market import Market, MarketStatus
 from app.schemas.market import MarketCreate, MarketDetail
-from app.services.market_maker.base import MarketState
-from app.services.market_maker.factory import get_market_maker
+from app.services import deadlines
+from app.services.broadcast import BroadcastService
+from app.services.export import daily_ledger, export_response, market_fills
+from app.services.market_maker.factory import MULTI_OUTCOME_TYPES, get_market_prices
 from app.services.resolution import ResolutionService
+from app.tasks.locks import job_stats
+from app.tasks.notifications import run_broadcast
+from app.tasks.scheduled import rebuild_user_stats
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+MAX_OUTCOMES = 32
+
+
+class BroadcastRequest(BaseModel):
+    text: str
+
 
 class ResolveRequest(BaseModel):
     outcome: str
 
 
+class UserStatsRebuildRequest(BaseModel):
+    # None rebuilds every user
+    user_ids: list[uuid.UUID] | None = None
+
+
 class MarketUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
@@ -24,6 +42,7 @@ class MarketUpdate(BaseModel):
     image_url: str | None = None
     is_featured: bool | None = None
     resolution_source: str | None = None
+    closes_at: datetime | None = None
 
 
 @router.post("/markets", response_model=MarketDetail)
@@ -31,6 +50,21 @@ async def create_market(
     body: MarketCreate, admin: CurrentAdmin, db: DbSession, redis: RedisConn
 ):
     """Create a new market (admin only)."""
+    outcomes = None
+    if body.amm_type in MULTI_OUTCOME_TYPES:
+        outcomes = [o.strip() for o in body.outcomes or [] if o.strip()]
+        if not 2 <= len(outcomes) <= MAX_OUTCOMES:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                f"Multi-outcome markets need 2 to {MAX_OUTCOMES} outcomes",
+            )
+        if len(set(outcomes)) != len(outcomes):
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Duplicate outcomes")
+    elif body.outcomes:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, "Outcomes require a multi-outcome AMM"
+        )
+
     initial_price = max(0.01, min(0.99, body.initial_price_yes))
     market = Market(
         title=body.title,
@@ -44,6 +78,8 @@ async def create_market(
         resolution_source=body.resolution_source,
         min_bet=body.min_bet,
         max_bet=body.max_bet,
+        outcomes=outcomes,
+        q_outcomes=[Decimal("0")] * len(outcomes) if outcomes else None,
         created_by=admin.id,
         last_trade_price_yes=round(initial_price, 2)
         if body.amm_type == "clob"
@@ -53,20 +89,10 @@ async def create_market(
     await db.commit()
     await db.refresh(market)
 
-    if market.amm_type == "clob":
-        price_yes = (
-            float(market.last_trade_price_yes) if market.last_trade_price_yes else 0.5
-        )
-        price_no = round(1.0 - price_yes, 4)
-    else:
-        mm = get_market_maker(market.amm_type)
-        state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        price_yes = round(mm.get_price(state, "yes"), 4)
-        price_no = round(mm.get_price(state, "no"), 4)
+    price_yes, price_no, prices = get_market_prices(market)
 
     await redis.delete("markets:list")
+    await deadlines.schedule(redis, deadlines.MARKET, market.id, market.closes_at)
 
     return MarketDetail(
         id=market.id,
@@ -79,13 +105,18 @@ async def create_market(
         price_no=price_no,
         total_volume=market.total_volume,
         total_traders=market.total_traders,
+        comment_count=market.comment_count,
+        open_order_count=market.open_order_count,
         closes_at=market.closes_at,
         is_featured=market.is_featured,
         created_at=market.created_at,
         amm_type=market.amm_type,
+        outcomes=market.outcomes,
+        prices=prices,
         q_yes=market.q_yes,
         q_no=market.q_no,
         liquidity_b=market.liquidity_b,
+        q_outcomes=market.q_outcomes,
         min_bet=market.min_bet,
         max_bet=market.max_bet,
         resolution_outcome=market.resolution_outcome,
@@ -120,25 +151,20 @@ async def update_market(
         market.is_featured = body.is_featured
     if body.resolution_source is not None:
         market.resolution_source = body.resolution_source
+    if body.closes_at is not None:
+        if market.status != MarketStatus.OPEN:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Market is not open")
+        market.closes_at = body.closes_at
 
     await db.commit()
     await db.refresh(market)
 
-    if market.amm_type == "clob":
-        price_yes = (
-            float(market.last_trade_price_yes) if market.last_trade_price_yes else 0.5
-        )
-        price_no = round(1.0 - price_yes, 4)
-    else:
-        mm = get_market_maker(market.amm_type)
-        state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        price_yes = round(mm.get_price(state, "yes"), 4)
-        price_no = round(mm.get_price(state, "no"), 4)
+    price_yes, price_no, prices = get_market_prices(market)
 
     await redis.delete(f"market:{market_id}")
     await redis.delete("markets:list")
+    if body.closes_at is not None:
+        await deadlines.schedule(redis, deadlines.MARKET, market.id, market.closes_at)
 
     return MarketDetail(
         id=market.id,
@@ -151,13 +177,18 @@ async def update_market(
         price_no=price_no,
         total_volume=market.total_volume,
         total_traders=market.total_traders,
+        comment_count=market.comment_count,
+        open_order_count=market.open_order_count,
         closes_at=market.closes_at,
         is_featured=market.is_featured,
         created_at=market.created_at,
         amm_type=market.amm_type,
+        outcomes=market.outcomes,
+        prices=prices,
         q_yes=market.q_yes,
         q_no=market.q_no,
         liquidity_b=market.liquidity_b,
+        q_outcomes=market.q_outcomes,
         min_bet=market.min_bet,
         max_bet=market.max_bet,
         resolution_outcome=market.resolution_outcome,
@@ -192,3 +223,66 @@ async def cancel_market(
     service = ResolutionService(db, redis)
     result = await service.cancel_market(market_id)
     return result
+
+
+@router.get("/export/ledger")
+async def export_ledger(
+    day: date,
+    admin: CurrentAdmin,
+    fmt: str = Query(default="csv", alias="format"),
+):
+    """Stream every transaction of one UTC day as CSV or Parquet (admin only)."""
+    return export_response(daily_ledger(day), fmt, f"ledger_{day.isoformat()}")
+
+
+@router.get("/markets/{market_id}/fills/export")
+async def export_market_fills(
+    market_id: uuid.UUID,
+    admin: CurrentAdmin,
+    fmt: str = Query(default="csv", alias="format"),
+):
+    """Stream a market's fills with buyer and seller ids (admin only)."""
+    return export_response(
+        market_fills(market_id, with_users=True), fmt, f"fills_{market_id}"
+    )
+
+
+@router.post("/broadcasts")
+async def create_broadcast(
+    body: BroadcastRequest,
+    admin: CurrentAdmin,
+    db: DbSession,
+    redis: RedisConn,
+):
+    """Queue an HTML message to every active user (admin only)."""
+    if not body.text.strip():
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Text is empty")
+    service = BroadcastService(db, redis)
+    broadcast_id = await service.start(body.text)
+    await run_broadcast.kiq(broadcast_id)
+    return await service.report(broadcast_id)
+
+
+@router.get("/broadcasts/{broadcast_id}")
+async def get_broadcast(
+    broadcast_id: str, admin: CurrentAdmin, db: DbSession, redis: RedisConn
+):
+    """Progress of a broadcast: delivered, blocked and failed counts."""
+    report = await BroadcastService(db, redis).report(broadcast_id)
+    if report is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Broadcast not found")
+    return report
+
+
+@router.get("/jobs")
+async def get_jobs(admin: CurrentAdmin, redis: RedisConn):
+    """Scheduled job runs: counts, durations and runs skipped as overlapping."""
+    return await job_stats(redis)
+
+
+@router.post("/user-stats/rebuild", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_stats(body: UserStatsRebuildRequest, admin: CurrentAdmin):
+    """Queue a rebuild of user_stats from the ledger (admin only)."""
+    user_ids = [str(u) for u in body.user_ids] if body.user_ids is not None else None
+    await rebuild_user_stats.kiq(user_ids)
+    return {"queued": True}
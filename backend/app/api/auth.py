@@ -18,6 +18,7 @@ from app.schemas.auth import (
     TelegramLoginRequest,
     UserBrief,
 )
+from app.services.ledger import LedgerService
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -54,6 +55,7 @@ async def authenticate_telegram(body: TelegramAuthRequest, db: DbSession):
             language_code=user_data.get("language_code", "ru"),
             referral_code=uuid.uuid4().hex[:8],
         )
+        LedgerService(db).open_account(user)
         db.add(user)
     else:
         user.username = user_data.get("username", user.username)
@@ -119,6 +121,7 @@ async def bot_login_status(login_token: str, redis: RedisConn, db: DbSession):
             language_code="ru",
             referral_code=uuid.uuid4().hex[:8],
         )
+        LedgerService(db).open_account(user)
         db.add(user)
     else:
         user.username = tg_user.get("username", user.username)
@@ -174,6 +177,7 @@ async def authenticate_telegram_login(body: TelegramLoginRequest, db: DbSession)
             language_code="ru",
             referral_code=uuid.uuid4().hex[:8],
         )
+        LedgerService(db).open_account(user)
         db.add(user)
     else:
         user.username = body.username or user.username
@@ -5,8 +5,7 @@ from app.core.b2b_auth import verify_api_key
 from app.core.dependencies import DbSession
 from app.models.market import Market, MarketStatus
 from app.schemas.market import MarketRead
-from app.services.market_maker.base import MarketState
-from app.services.market_maker.factory import get_market_maker
+from app.services.market_maker.factory import get_market_prices
 
 router = APIRouter(prefix="/b2b", tags=["b2b"], dependencies=[Depends(verify_api_key)])
 
@@ -31,21 +30,25 @@ async def b2b_list_markets(
 
     items = []
     for m in markets:
-        mm = get_market_maker(m.amm_type)
-        state = MarketState(q_yes=m.q_yes, q_no=m.q_no, liquidity_b=m.liquidity_b)
+        price_yes, price_no, prices = get_market_prices(m)
         items.append(
             MarketRead(
                 id=m.id,
                 title=m.title,
                 category=m.category,
                 status=m.status.value,
-                price_yes=round(mm.get_price(state, "yes"), 4),
-                price_no=round(mm.get_price(state, "no"), 4),
+                price_yes=price_yes,
+                price_no=price_no,
                 total_volume=m.total_volume,
                 total_traders=m.total_traders,
+                comment_count=m.comment_count,
+                open_order_count=m.open_order_count,
                 closes_at=m.closes_at,
                 is_featured=m.is_featured,
                 created_at=m.created_at,
+                amm_type=m.amm_type,
+                outcomes=m.outcomes,
+                prices=prices,
             )
         )
 
@@ -1,14 +1,25 @@
+import json
 import uuid
+from collections.abc import Sequence
 
 from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import Row, select, true, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
 
-from app.core.dependencies import CurrentUser, DbSession
+from app.core.dependencies import CurrentUser, DbSession, RedisConn
 from app.models.comment import Comment
+from app.models.market import Market
+from app.models.user import User
 
 router = APIRouter(tags=["comments"])
 
+# Only the newest page is cached; it is dropped on every new comment
+CACHE_TTL = 60  # seconds
+# Replies shown under each comment; the rest via GET /comments/{id}/replies
+REPLY_PREVIEW = 3
+
 
 class CommentCreate(BaseModel):
     text: str
@@ -24,35 +35,187 @@ class CommentResponse(BaseModel):
     text: str
     parent_id: uuid.UUID | None
     created_at: str
+    reply_count: int = 0
+    # The first REPLY_PREVIEW of the reply_count direct replies, oldest first
+    replies: list["CommentResponse"] = []
+
+
+class CommentPage(BaseModel):
+    """Top-level comments, newest first, each with its first replies."""
+
+    items: list[CommentResponse]
+    # Cursor for older comments (pass as `before`) / newer ones (as `after`)
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+class ReplyPage(BaseModel):
+    """Direct replies to one comment, oldest first, each with its first replies."""
+
+    items: list[CommentResponse]
+    next_cursor: str | None = None  # pass as `after`
+
+
+def _with_author():
+    """Comments with their authors' names, joined in the same query."""
+    return (
+        select(Comment, User.username, User.first_name)
+        .join(User, User.id == Comment.user_id)
+        .options(noload(Comment.user))
+    )
+
+
+def _to_response(row: Row) -> CommentResponse:
+    comment, username, first_name = row
+    return CommentResponse(
+        id=comment.id,
+        market_id=comment.market_id,
+        user_id=comment.user_id,
+        username=username,
+        first_name=first_name,
+        text=comment.text,
+        parent_id=comment.parent_id,
+        created_at=comment.created_at.isoformat(),
+        reply_count=comment.reply_count,
+    )
+
+
+async def _attach_replies(db: AsyncSession, parents: Sequence[CommentResponse]) -> None:
+    """Attach the first REPLY_PREVIEW direct replies of each parent, one query."""
+    parents = [p for p in parents if p.reply_count]
+    if not parents:
+        return
+    parent = select(Comment.id).where(Comment.id.in_([p.id for p in parents]))
+    parent = parent.subquery()
+    first = (
+        select(Comment.id)
+        .where(Comment.parent_id == parent.c.id)
+        .order_by(Comment.created_at, Comment.id)
+        .limit(REPLY_PREVIEW)
+        .lateral()
+    )
+    result = await db.execute(
+        _with_author()
+        .where(
+            Comment.id.in_(select(first.c.id).select_from(parent.join(first, true())))
+        )
+        .order_by(Comment.created_at, Comment.id)
+    )
+    by_id = {p.id: p for p in parents}
+    for row in result.all():
+        reply = _to_response(row)
+        by_id[reply.parent_id].replies.append(reply)
 
 
-@router.get("/markets/{market_id}/comments", response_model=list[CommentResponse])
+@router.get("/markets/{market_id}/comments", response_model=CommentPage)
 async def get_comments(
     market_id: uuid.UUID,
     db: DbSession,
+    redis: RedisConn,
+    before: str | None = None,
+    after: str | None = None,
+    limit: int = Query(default=50, le=100),
+):
+    """Top-level comments with keyset pagination in both directions."""
+    first_page = before is None and after is None
+    cache_key = f"comments:{market_id}"
+    if first_page:
+        cached = await redis.hget(cache_key, str(limit))
+        if cached:
+            return CommentPage(**json.loads(cached))
+
+    query = _with_author().where(
+        Comment.market_id == market_id, Comment.parent_id.is_(None)
+    )
+    # `before` pages toward older comments, `after` toward newer ones
+    cursor, newer = (before, False) if before else (after, True)
+    bounded = False
+    if cursor:
+        try:
+            cursor_id = uuid.UUID(cursor)
+            cursor_at = await db.scalar(
+                select(Comment.created_at).where(Comment.id == cursor_id)
+            )
+            if cursor_at:
+                key = tuple_(Comment.created_at, Comment.id)
+                bound = tuple_(cursor_at, cursor_id)
+                query = query.where(key > bound if newer else key < bound)
+                bounded = True
+        except ValueError:
+            pass
+    newer = newer and bounded
+
+    # Pages toward newer comments are read upwards, then flipped
+    if newer:
+        query = query.order_by(Comment.created_at.asc(), Comment.id.asc())
+    else:
+        query = query.order_by(Comment.created_at.desc(), Comment.id.desc())
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    if newer:
+        rows.reverse()
+
+    items = [_to_response(row) for row in rows]
+    await _attach_replies(db, items)
+
+    page = CommentPage(items=items)
+    if items:
+        # Beyond the cursor lie the comments the caller paged from
+        more_older = bounded if newer else has_more
+        more_newer = has_more if newer else bounded
+        if more_older:
+            page.next_cursor = str(items[-1].id)
+        if more_newer:
+            page.prev_cursor = str(items[0].id)
+
+    if first_page:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(cache_key, str(limit), page.model_dump_json())
+            pipe.expire(cache_key, CACHE_TTL)
+            await pipe.execute()
+    return page
+
+
+@router.get("/comments/{comment_id}/replies", response_model=ReplyPage)
+async def get_replies(
+    comment_id: uuid.UUID,
+    db: DbSession,
+    after: str | None = None,
     limit: int = Query(default=50, le=100),
 ):
+    """Direct replies to a comment with keyset pagination, oldest first."""
+    query = _with_author().where(Comment.parent_id == comment_id)
+    if after:
+        try:
+            cursor_id = uuid.UUID(after)
+            cursor_at = await db.scalar(
+                select(Comment.created_at).where(
+                    Comment.id == cursor_id, Comment.parent_id == comment_id
+                )
+            )
+            if cursor_at:
+                query = query.where(
+                    tuple_(Comment.created_at, Comment.id)
+                    > tuple_(cursor_at, cursor_id)
+                )
+        except ValueError:
+            pass
+
     result = await db.execute(
-        select(Comment)
-        .where(Comment.market_id == market_id)
-        .order_by(Comment.created_at.asc())
-        .limit(limit)
+        query.order_by(Comment.created_at, Comment.id).limit(limit + 1)
     )
-    comments = result.scalars().all()
-
-    return [
-        CommentResponse(
-            id=c.id,
-            market_id=c.market_id,
-            user_id=c.user_id,
-            username=c.user.username if c.user else None,
-            first_name=c.user.first_name if c.user else "Unknown",
-            text=c.text,
-            parent_id=c.parent_id,
-            created_at=c.created_at.isoformat(),
-        )
-        for c in comments
-    ]
+    rows = result.all()
+    items = [_to_response(row) for row in rows[:limit]]
+    await _attach_replies(db, items)
+
+    page = ReplyPage(items=items)
+    if len(rows) > limit:
+        page.next_cursor = str(items[-1].id)
+    return page
 
 
 @router.post("/markets/{market_id}/comments", response_model=CommentResponse)
@@ -61,6 +224,7 @@ async def create_comment(
     body: CommentCreate,
     user: CurrentUser,
     db: DbSession,
+    redis: RedisConn,
 ):
     if len(body.text.strip()) == 0:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Comment cannot be empty")
@@ -68,6 +232,22 @@ async def create_comment(
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST, "Comment too long (max 1000 chars)"
         )
+    if body.parent_id is not None:
+        replied = await db.execute(
+            update(Comment)
+            .where(Comment.id == body.parent_id, Comment.market_id == market_id)
+            .values(reply_count=Comment.reply_count + 1)
+        )
+        if replied.rowcount == 0:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Parent comment not found")
+
+    counted = await db.execute(
+        update(Market)
+        .where(Market.id == market_id)
+        .values(comment_count=Market.comment_count + 1)
+    )
+    if counted.rowcount == 0:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
 
     comment = Comment(
         market_id=market_id,
@@ -78,6 +258,7 @@ async def create_comment(
     db.add(comment)
     await db.commit()
     await db.refresh(comment)
+    await redis.delete(f"comments:{market_id}", f"market:{market_id}")
 
     return CommentResponse(
         id=comment.id,
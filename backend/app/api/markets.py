@@ -1,15 +1,17 @@
 import json
 import uuid
+from datetime import datetime
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, status
 from sqlalchemy import select
 
 from app.core.dependencies import DbSession, RedisConn
+from app.models.archive import archive_table
 from app.models.market import Market, MarketStatus
 from app.models.price_history import PriceHistory
 from app.schemas.market import MarketDetail, MarketListResponse, MarketRead, PricePoint
-from app.services.market_maker.base import MarketState
-from app.services.market_maker.factory import get_market_maker
+from app.services.export import export_response, market_price_history
+from app.services.market_maker.factory import get_market_prices
 
 router = APIRouter(prefix="/markets", tags=["markets"])
 
@@ -17,18 +19,7 @@ CACHE_TTL = 30  # seconds
 
 
 def _market_to_read(market: Market) -> MarketRead:
-    if market.amm_type == "clob":
-        price_yes = (
-            float(market.last_trade_price_yes) if market.last_trade_price_yes else 0.5
-        )
-        price_no = round(1.0 - price_yes, 4)
-    else:
-        mm = get_market_maker(market.amm_type)
-        state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        price_yes = round(mm.get_price(state, "yes"), 4)
-        price_no = round(mm.get_price(state, "no"), 4)
+    price_yes, price_no, prices = get_market_prices(market)
     return MarketRead(
         id=market.id,
         title=market.title,
@@ -38,10 +29,14 @@ def _market_to_read(market: Market) -> MarketRead:
         price_no=price_no,
         total_volume=market.total_volume,
         total_traders=market.total_traders,
+        comment_count=market.comment_count,
+        open_order_count=market.open_order_count,
         closes_at=market.closes_at,
         is_featured=market.is_featured,
         created_at=market.created_at,
         amm_type=market.amm_type,
+        outcomes=market.outcomes,
+        prices=prices,
     )
 
 
@@ -106,18 +101,7 @@ async def get_market(market_id: uuid.UUID, db: DbSession, redis: RedisConn):
 
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
 
-    if market.amm_type == "clob":
-        price_yes = (
-            float(market.last_trade_price_yes) if market.last_trade_price_yes else 0.5
-        )
-        price_no = round(1.0 - price_yes, 4)
-    else:
-        mm = get_market_maker(market.amm_type)
-        state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        price_yes = round(mm.get_price(state, "yes"), 4)
-        price_no = round(mm.get_price(state, "no"), 4)
+    price_yes, price_no, prices = get_market_prices(market)
 
     detail = MarketDetail(
         id=market.id,
@@ -130,13 +114,18 @@ async def get_market(market_id: uuid.UUID, db: DbSession, redis: RedisConn):
         price_no=price_no,
         total_volume=market.total_volume,
         total_traders=market.total_traders,
+        comment_count=market.comment_count,
+        open_order_count=market.open_order_count,
         closes_at=market.closes_at,
         is_featured=market.is_featured,
         created_at=market.created_at,
         amm_type=market.amm_type,
+        outcomes=market.outcomes,
+        prices=prices,
         q_yes=market.q_yes,
         q_no=market.q_no,
         liquidity_b=market.liquidity_b,
+        q_outcomes=market.q_outcomes,
         min_bet=market.min_bet,
         max_bet=market.max_bet,
         resolution_outcome=market.resolution_outcome,
@@ -150,19 +139,42 @@ async def get_market(market_id: uuid.UUID, db: DbSession, redis: RedisConn):
 
 
 @router.get("/{market_id}/history", response_model=list[PricePoint])
-async def get_price_history(market_id: uuid.UUID, db: DbSession):
-    """Get price history for a market."""
-    result = await db.execute(
-        select(PriceHistory)
-        .where(PriceHistory.market_id == market_id)
-        .order_by(PriceHistory.created_at.asc())
+async def get_price_history(
+    market_id: uuid.UUID,
+    db: DbSession,
+    since: datetime | None = None,
+):
+    """Get price history for a market, optionally only points after `since`."""
+    archived_at = await db.scalar(
+        select(Market.archived_at).where(Market.id == market_id)
     )
-    points = result.scalars().all()
+    history = archive_table(PriceHistory) if archived_at else PriceHistory.__table__
+    query = select(history).where(history.c.market_id == market_id)
+    if since:
+        # Lets Postgres skip older monthly partitions
+        query = query.where(history.c.created_at >= since)
+    result = await db.execute(query.order_by(history.c.created_at.asc()))
+    points = result.all()
     return [
         PricePoint(
             price_yes=float(p.price_yes),
             price_no=float(p.price_no),
+            prices=[float(x) for x in p.prices] if p.prices else None,
             created_at=p.created_at,
         )
         for p in points
     ]
+
+
+@router.get("/{market_id}/history/export")
+async def export_price_history(
+    market_id: uuid.UUID,
+    db: DbSession,
+    fmt: str = Query(default="csv", alias="format"),
+):
+    """Stream a market's full price history as CSV or Parquet."""
+    if await db.scalar(select(Market.id).where(Market.id == market_id)) is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
+    return export_response(
+        market_price_history(market_id), fmt, f"price_history_{market_id}"
+    )
@@ -1,22 +1,42 @@
 import uuid
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, status
+from sqlalchemy import select
 
 from app.core.dependencies import CurrentUser, DbSession, RedisConn
-from app.models.order import OrderIntent
+from app.models.market import Market
+from app.models.order import OrderIntent, OrderSide, TimeInForce
 from app.schemas.orderbook import (
+    BatchCancelRequest,
+    BatchCancelResponse,
+    BatchPlaceOrderRequest,
+    BatchPlaceOrderResponse,
     CancelOrderResponse,
     OrderBookResponse,
+    OrderLeg,
     PlaceOrderRequest,
     PlaceOrderResponse,
+    ReplaceOrdersRequest,
+    ReplaceOrdersResponse,
     TradeFillResponse,
     UserOrderResponse,
 )
-from app.services.order_book import OrderBookService
+from app.services.export import export_response, market_fills
+from app.services.order_book import NewOrder, OrderBookService
 
 router = APIRouter(prefix="/orderbook", tags=["orderbook"])
 
 
+def _new_order(leg: OrderLeg) -> NewOrder:
+    return NewOrder(
+        intent=OrderIntent(leg.intent),
+        price=leg.price,
+        quantity=leg.quantity,
+        time_in_force=TimeInForce(leg.time_in_force),
+        expires_at=leg.expires_at,
+    )
+
+
 @router.post("/orders", response_model=PlaceOrderResponse)
 async def place_order(
     body: PlaceOrderRequest,
@@ -32,10 +52,61 @@ async def place_order(
         intent=OrderIntent(body.intent),
         price=body.price,
         quantity=body.quantity,
+        time_in_force=TimeInForce(body.time_in_force),
+        expires_at=body.expires_at,
     )
     return result
 
 
+@router.post("/orders/batch", response_model=BatchPlaceOrderResponse)
+async def place_orders(
+    body: BatchPlaceOrderRequest,
+    user: CurrentUser,
+    db: DbSession,
+    redis: RedisConn,
+):
+    """Place several limit orders on one market in a single transaction."""
+    service = OrderBookService(db, redis)
+    return await service.place_orders(
+        user_id=user.id,
+        market_id=body.market_id,
+        orders=[_new_order(o) for o in body.orders],
+    )
+
+
+@router.post("/orders/replace", response_model=ReplaceOrdersResponse)
+async def replace_orders(
+    body: ReplaceOrdersRequest,
+    user: CurrentUser,
+    db: DbSession,
+    redis: RedisConn,
+):
+    """Atomically cancel all own orders on a market and place a new ladder."""
+    service = OrderBookService(db, redis)
+    return await service.replace_orders(
+        user_id=user.id,
+        market_id=body.market_id,
+        orders=[_new_order(o) for o in body.orders],
+    )
+
+
+@router.post("/orders/cancel", response_model=BatchCancelResponse)
+async def cancel_orders(
+    body: BatchCancelRequest,
+    user: CurrentUser,
+    db: DbSession,
+    redis: RedisConn,
+):
+    """Cancel own open orders by id list, market and/or book side."""
+    service = OrderBookService(db, redis)
+    return await service.cancel_orders(
+        user_id=user.id,
+        order_ids=body.order_ids,
+        market_id=body.market_id,
+        side=OrderSide(body.side) if body.side else None,
+    )
+
+
 @router.delete("/orders/{order_id}", response_model=CancelOrderResponse)
 async def cancel_order(
     order_id: uuid.UUID,
@@ -72,6 +143,18 @@ async def get_trades(
     return await service.get_trades(market_id, limit)
 
 
+@router.get("/markets/{market_id}/trades/export")
+async def export_trades(
+    market_id: uuid.UUID,
+    db: DbSession,
+    fmt: str = Query(default="csv", alias="format"),
+):
+    """Stream every fill of a market as CSV or Parquet (without trader ids)."""
+    if await db.scalar(select(Market.id).where(Market.id == market_id)) is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
+    return export_response(market_fills(market_id), fmt, f"fills_{market_id}")
+
+
 @router.get("/orders/my", response_model=list[UserOrderResponse])
 async def get_my_orders(
     user: CurrentUser,
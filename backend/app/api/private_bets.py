@@ -1,7 +1,10 @@
 import json
 import uuid
+from decimal import Decimal
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import CurrentUser, DbSession, RedisConn
 from app.schemas.private_bet import (
@@ -9,31 +12,31 @@ from app.schemas.private_bet import (
     ParticipantRead,
     PrivateBetCreate,
     PrivateBetDetail,
+    PrivateBetListResponse,
     PrivateBetRead,
     VoteRequest,
 )
 from app.services.private_bet import PrivateBetService
+from app.services.settlement import my_bets_key, preview_key
 
 router = APIRouter(prefix="/bets", tags=["private-bets"])
 
-
-def _bet_to_read(bet, user_id: uuid.UUID | None = None) -> PrivateBetRead:
-    my_outcome = None
-    my_payout = None
-    if user_id and hasattr(bet, "participants"):
-        for p in bet.participants:
-            if p.user_id == user_id:
-                my_outcome = p.outcome
-                my_payout = p.payout
-                break
-
-    allowed: list[str] = []
-    if bet.allowed_usernames:
-        try:
-            allowed = json.loads(bet.allowed_usernames)
-        except (json.JSONDecodeError, TypeError):
-            pass
-
+# Bets the user was just invited to show up once this runs out; everything
+# else that changes a listing invalidates it
+CACHE_TTL = 60  # seconds
+# Previews are dropped on every join and status change
+PREVIEW_CACHE_TTL = 600  # seconds
+
+
+def _bet_to_read(
+    bet,
+    creator_name: str | None = None,
+    my_outcome: str | None = None,
+    my_payout: Decimal | None = None,
+    allowed_usernames: list[str] | None = None,
+) -> PrivateBetRead:
+    if creator_name is None:
+        creator_name = bet.creator.first_name if bet.creator else ""
     return PrivateBetRead(
         id=bet.id,
         title=bet.title,
@@ -44,14 +47,15 @@ def _bet_to_read(bet, user_id: uuid.UUID | None = None) -> PrivateBetRead:
         voting_deadline=bet.voting_deadline,
         yes_count=bet.yes_count,
         no_count=bet.no_count,
+        participant_count=bet.yes_count + bet.no_count,
         total_pool=bet.total_pool,
         created_at=bet.created_at,
-        creator_name=bet.creator.first_name if bet.creator else "",
+        creator_name=creator_name,
         resolution_outcome=bet.resolution_outcome,
         my_outcome=my_outcome,
         my_payout=my_payout,
         is_closed=bet.is_closed,
-        allowed_usernames=allowed,
+        allowed_usernames=allowed_usernames or [],
     )
 
 
@@ -75,13 +79,6 @@ def _bet_to_detail(bet, user_id: uuid.UUID) -> PrivateBetDetail:
             )
         )
 
-    allowed: list[str] = []
-    if bet.allowed_usernames:
-        try:
-            allowed = json.loads(bet.allowed_usernames)
-        except (json.JSONDecodeError, TypeError):
-            pass
-
     return PrivateBetDetail(
         id=bet.id,
         title=bet.title,
@@ -93,6 +90,7 @@ def _bet_to_detail(bet, user_id: uuid.UUID) -> PrivateBetDetail:
         voting_deadline=bet.voting_deadline,
         yes_count=bet.yes_count,
         no_count=bet.no_count,
+        participant_count=bet.yes_count + bet.no_count,
         yes_votes=bet.yes_votes,
         no_votes=bet.no_votes,
         total_pool=bet.total_pool,
@@ -105,7 +103,7 @@ def _bet_to_detail(bet, user_id: uuid.UUID) -> PrivateBetDetail:
         is_creator=bet.created_by == user_id,
         participants=participants,
         is_closed=bet.is_closed,
-        allowed_usernames=allowed,
+        allowed_usernames=[i.username for i in bet.invites],
     )
 
 
@@ -124,33 +122,72 @@ async def create_bet(
         is_closed=body.is_closed,
         allowed_usernames=body.allowed_usernames or None,
     )
-    return _bet_to_read(bet)
+    invited = await service.invited_usernames([bet])
+    return _bet_to_read(bet, allowed_usernames=invited[bet.id])
+
 
+@router.get("/my", response_model=PrivateBetListResponse)
+async def my_bets(
+    user: CurrentUser,
+    db: DbSession,
+    redis: RedisConn,
+    cursor: str | None = None,
+    limit: int = Query(default=20, le=50),
+):
+    """The user's bets, newest first, with cursor-based pagination.
+
+    Pages are cached in one hash per user, dropped when the user creates a
+    bet or one of their bets is joined, voted on or settled.
+    """
+    cache_key = my_bets_key(user.id)
+    page = f"{user.username}:{cursor}:{limit}"
+    cached = await redis.hget(cache_key, page)
+    if cached:
+        return PrivateBetListResponse(**json.loads(cached))
 
-@router.get("/my", response_model=list[PrivateBetRead])
-async def my_bets(user: CurrentUser, db: DbSession, redis: RedisConn):
     service = PrivateBetService(db, redis)
-    bets = await service.get_my_bets(user.id)
-    return [_bet_to_read(b, user.id) for b in bets]
+    rows, next_cursor = await service.get_my_bets(user.id, user.username, cursor, limit)
+    invited = await service.invited_usernames([row[0] for row in rows])
+    response = PrivateBetListResponse(
+        items=[_bet_to_read(*row, invited[row[0].id]) for row in rows],
+        next_cursor=next_cursor,
+    )
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(cache_key, page, response.model_dump_json())
+        pipe.expire(cache_key, CACHE_TTL)
+        await pipe.execute()
+    return response
 
 
-@router.get("/preview/{code}", response_model=PrivateBetRead)
-async def preview_bet(code: str, db: DbSession, redis: RedisConn):
-    """Public endpoint — no auth required. Used by bot for rich invite messages."""
+async def _cached_preview(code: str, db: AsyncSession, redis: Redis) -> PrivateBetRead:
+    cache_key = preview_key(code)
+    cached = await redis.get(cache_key)
+    if cached:
+        return PrivateBetRead(**json.loads(cached))
+
     service = PrivateBetService(db, redis)
     bet = await service.lookup_bet(code)
     if bet is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Bet not found")
-    return _bet_to_read(bet)
+    invited = await service.invited_usernames([bet])
+    preview = _bet_to_read(bet, allowed_usernames=invited[bet.id])
+    await redis.setex(cache_key, PREVIEW_CACHE_TTL, preview.model_dump_json())
+    return preview
+
+
+@router.get("/preview/{code}", response_model=PrivateBetRead)
+async def preview_bet(code: str, db: DbSession, redis: RedisConn):
+    """Public endpoint — no auth required. Used by bot for rich invite messages.
+
+    Cached by invite code; the bot reads the cache directly and calls this
+    only on a miss.
+    """
+    return await _cached_preview(code, db, redis)
 
 
 @router.get("/lookup/{code}", response_model=PrivateBetRead)
 async def lookup_bet(code: str, user: CurrentUser, db: DbSession, redis: RedisConn):
-    service = PrivateBetService(db, redis)
-    bet = await service.lookup_bet(code)
-    if bet is None:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Bet not found")
-    return _bet_to_read(bet)
+    return await _cached_preview(code, db, redis)
 
 
 @router.get("/{bet_id}", response_model=PrivateBetDetail)
@@ -176,7 +213,8 @@ async def join_bet(
         invite_code=body.invite_code,
         outcome=body.outcome,
     )
-    return _bet_to_read(bet)
+    invited = await service.invited_usernames([bet])
+    return _bet_to_read(bet, allowed_usernames=invited[bet.id])
 
 
 @router.post("/{bet_id}/start-voting", response_model=PrivateBetDetail)
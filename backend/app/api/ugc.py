@@ -4,9 +4,11 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy import select
 
-from app.core.dependencies import CurrentAdmin, CurrentUser, DbSession
+from app.core.config import settings
+from app.core.dependencies import CurrentAdmin, CurrentUser, DbSession, RedisConn
 from app.models.market import Market
 from app.models.market_proposal import MarketProposal, ProposalStatus
+from app.services import deadlines
 
 router = APIRouter(prefix="/ugc", tags=["ugc"])
 
@@ -101,7 +103,9 @@ async def pending_proposals(admin: CurrentAdmin, db: DbSession):
 
 
 @router.post("/proposals/{proposal_id}/approve")
-async def approve_proposal(proposal_id: uuid.UUID, admin: CurrentAdmin, db: DbSession):
+async def approve_proposal(
+    proposal_id: uuid.UUID, admin: CurrentAdmin, db: DbSession, redis: RedisConn
+):
     proposal = await db.get(MarketProposal, proposal_id)
     if proposal is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Proposal not found")
@@ -110,12 +114,14 @@ async def approve_proposal(proposal_id: uuid.UUID, admin: CurrentAdmin, db: DbSe
 
     from decimal import Decimal
 
+    # LS-LMSR deepens with volume, so the floor b can stay small for quiet markets
     market = Market(
         title=proposal.title,
         description=proposal.description,
         category=proposal.category,
         closes_at=proposal.closes_at,
-        liquidity_b=Decimal("100"),
+        amm_type=settings.UGC_AMM_TYPE,
+        liquidity_b=Decimal(str(settings.UGC_LIQUIDITY_B)),
         created_by=proposal.user_id,
     )
     db.add(market)
@@ -125,6 +131,7 @@ async def approve_proposal(proposal_id: uuid.UUID, admin: CurrentAdmin, db: DbSe
     proposal.market_id = market.id
 
     await db.commit()
+    await deadlines.schedule(redis, deadlines.MARKET, market.id, market.closes_at)
     return {"status": "approved", "market_id": str(market.id)}
 
 
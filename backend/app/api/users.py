@@ -1,12 +1,14 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 from fastapi import APIRouter, HTTPException, Query, status
-from sqlalchemy import select
+from sqlalchemy import and_, select
 
 from app.core.config import settings
 from app.core.dependencies import CurrentUser, DbSession, RedisConn
+from app.models.archive import with_archive
+from app.models.market import Market
 from app.models.position import Position
 from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
@@ -20,7 +22,11 @@ from app.schemas.user import (
     WalletResponse,
     WithdrawRequest,
 )
+from app.services.export import export_response, user_transactions
 from app.services.leaderboard import LeaderboardService
+from app.services.ledger import LedgerService, available, house
+from app.services.portfolio import PortfolioService
+from app.services.user_stats import UserStatsService
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -38,14 +44,16 @@ async def get_me(user: CurrentUser):
 
 @router.get("/me/positions")
 async def get_my_positions(user: CurrentUser, db: DbSession):
-    from sqlalchemy.orm import selectinload
-
+    # Positions of archived markets live in positions_archive
+    positions = with_archive(Position, lambda t: t.c.user_id == user.id)
     result = await db.execute(
-        select(Position)
-        .where(Position.user_id == user.id)
-        .options(selectinload(Position.market))
+        select(
+            positions,
+            Market.title,
+            Market.status,
+            Market.resolution_outcome,
+        ).outerjoin(Market, Market.id == positions.c.market_id)
     )
-    positions = result.scalars().all()
     return [
         {
             "id": str(p.id),
@@ -55,14 +63,32 @@ async def get_my_positions(user: CurrentUser, db: DbSession):
             "shares": float(p.shares),
             "total_cost": float(p.total_cost),
             "avg_price": float(p.avg_price),
-            "market_title": p.market.title if p.market else None,
-            "market_status": p.market.status.value if p.market else None,
-            "resolution_outcome": p.market.resolution_outcome if p.market else None,
+            "market_title": p.title,
+            "market_status": p.status.value if p.status else None,
+            "resolution_outcome": p.resolution_outcome,
         }
-        for p in positions
+        for p in result.all()
     ]
 
 
+@router.get("/me/portfolio")
+async def get_my_portfolio(user: CurrentUser, db: DbSession, redis: RedisConn):
+    """Open positions valued at current prices (see PortfolioService)."""
+    return await PortfolioService(db, redis).get(user.id)
+
+
+def _tx_window(user_id: uuid.UUID, start: datetime, end: datetime | None):
+    """Filter for one user's transactions with start <= created_at < end."""
+
+    def where(t):
+        clauses = [t.c.user_id == user_id, t.c.created_at >= start]
+        if end is not None:
+            clauses.append(t.c.created_at < end)
+        return and_(*clauses)
+
+    return where
+
+
 @router.get("/me/transactions")
 async def get_my_transactions(
     user: CurrentUser,
@@ -70,24 +96,34 @@ async def get_my_transactions(
     limit: int = Query(default=20, le=50),
     cursor: str | None = None,
 ):
-    query = (
-        select(Transaction)
-        .where(Transaction.user_id == user.id)
-        .order_by(Transaction.created_at.desc())
-    )
-
+    end = None
     if cursor:
         try:
             cursor_id = uuid.UUID(cursor)
-            cursor_tx = await db.get(Transaction, cursor_id)
-            if cursor_tx:
-                query = query.where(Transaction.created_at < cursor_tx.created_at)
+            cursor_txs = with_archive(
+                Transaction, lambda t: and_(t.c.user_id == user.id, t.c.id == cursor_id)
+            )
+            end = await db.scalar(select(cursor_txs.c.created_at))
         except ValueError:
             pass
 
-    query = query.limit(limit + 1)
-    result = await db.execute(query)
-    txs = result.scalars().all()
+    # Scan back from the cursor in widening created_at windows, so a page
+    # only touches the monthly partitions it reads; none predate the user.
+    # Transactions of archived markets live in transactions_archive.
+    window = timedelta(days=settings.TRANSACTIONS_PAGE_WINDOW_DAYS)
+    txs = []
+    while True:
+        start = max((end or datetime.now(timezone.utc)) - window, user.created_at)
+        txs_all = with_archive(Transaction, _tx_window(user.id, start, end))
+        result = await db.execute(
+            select(txs_all)
+            .order_by(txs_all.c.created_at.desc())
+            .limit(limit + 1 - len(txs))
+        )
+        txs += result.all()
+        if len(txs) > limit or start <= user.created_at:
+            break
+        end, window = start, window * 2
 
     has_next = len(txs) > limit
     if has_next:
@@ -112,6 +148,14 @@ async def get_my_transactions(
     }
 
 
+@router.get("/me/transactions/export")
+async def export_my_transactions(
+    user: CurrentUser, fmt: str = Query(default="csv", alias="format")
+):
+    """Stream the user's full ledger as CSV or Parquet."""
+    return export_response(user_transactions(user.id), fmt, "transactions")
+
+
 @router.post("/me/deposit", response_model=WalletResponse)
 async def deposit(body: DepositRequest, user: CurrentUser, db: DbSession):
     """Deposit PRC to wallet. Currently free (virtual currency)."""
@@ -122,7 +166,9 @@ async def deposit(body: DepositRequest, user: CurrentUser, db: DbSession):
             status.HTTP_400_BAD_REQUEST, "Maximum deposit is 10,000 PRC"
         )
 
-    user.balance += body.amount
+    LedgerService(db).post(
+        "deposit", available(user, body.amount), house("deposits", -body.amount)
+    )
 
     tx = Transaction(
         user_id=user.id,
@@ -164,7 +210,14 @@ async def get_user_profile(user_id: uuid.UUID, db: DbSession):
     user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
-    return UserPublicProfile.model_validate(user)
+    stats = await UserStatsService(db).get(user_id)
+    profile = UserPublicProfile.model_validate(user)
+    profile.realized_pnl = stats.realized_pnl
+    profile.wins = stats.wins
+    profile.losses = stats.losses
+    profile.current_streak = stats.current_streak
+    profile.best_streak = stats.best_streak
+    return profile
 
 
 @router.post("/me/daily-bonus", response_model=DailyBonusResponse)
@@ -178,7 +231,11 @@ async def claim_daily_bonus(user: CurrentUser, db: DbSession):
             "Daily bonus already claimed today",
         )
 
-    user.balance += DAILY_BONUS_AMOUNT
+    LedgerService(db).post(
+        "daily_bonus",
+        available(user, DAILY_BONUS_AMOUNT),
+        house("bonus", -DAILY_BONUS_AMOUNT),
+    )
     user.daily_bonus_claimed_at = today_str
 
     tx = Transaction(
@@ -188,6 +245,9 @@ async def claim_daily_bonus(user: CurrentUser, db: DbSession):
         description="Daily bonus",
     )
     db.add(tx)
+    await UserStatsService(db).record(
+        user.id, bonuses=1, bonus_amount=DAILY_BONUS_AMOUNT
+    )
     await db.commit()
 
     return DailyBonusResponse(amount=DAILY_BONUS_AMOUNT, new_balance=user.balance)
@@ -215,7 +275,12 @@ async def apply_referral(code: str, user: CurrentUser, db: DbSession):
         )
 
     # Bonus for invitee
-    user.balance += REFERRAL_BONUS_INVITEE
+    ledger = LedgerService(db)
+    ledger.post(
+        "referral",
+        available(user, REFERRAL_BONUS_INVITEE),
+        house("bonus", -REFERRAL_BONUS_INVITEE),
+    )
     user.referred_by = inviter.id
 
     tx_invitee = Transaction(
@@ -227,7 +292,11 @@ async def apply_referral(code: str, user: CurrentUser, db: DbSession):
     db.add(tx_invitee)
 
     # Bonus for inviter
-    inviter.balance += REFERRAL_BONUS_INVITER
+    ledger.post(
+        "referral",
+        available(inviter, REFERRAL_BONUS_INVITER),
+        house("bonus", -REFERRAL_BONUS_INVITER),
+    )
     inviter.referral_count += 1
 
     tx_inviter = Transaction(
@@ -238,6 +307,10 @@ async def apply_referral(code: str, user: CurrentUser, db: DbSession):
     )
     db.add(tx_inviter)
 
+    user_stats = UserStatsService(db)
+    await user_stats.record(user.id, bonuses=1, bonus_amount=REFERRAL_BONUS_INVITEE)
+    await user_stats.record(inviter.id, bonuses=1, bonus_amount=REFERRAL_BONUS_INVITER)
+
     await db.commit()
 
     return ReferralResponse(bonus=REFERRAL_BONUS_INVITEE, new_balance=user.balance)
@@ -1,9 +1,15 @@
+import logging
 from pathlib import Path
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+logger = logging.getLogger(__name__)
+
 _env_file = Path(__file__).resolve().parent.parent.parent.parent / ".env"
 
+DEFAULT_INVITE_CODE_KEY = "change-me-invite-codes"
+
 
 class Settings(BaseSettings):
     # App
@@ -40,10 +46,63 @@ class Settings(BaseSettings):
     MIN_BET_DEFAULT: float = 1.0
     MAX_BET_DEFAULT: float = 10000.0
     SIGNUP_BONUS: float = 1000.0
+    ORDER_BATCH_MAX: int = 50  # orders per bulk place / replace / cancel call
+    ORDER_EXPIRY_BATCH: int = 500  # GTT orders expired per sweeper transaction
+    DEADLINE_BATCH: int = 500  # markets / bets closed per deadline batch
+    PRIVATE_BET_SETTLE_USERS: int = 200  # participants settled per transaction
+    # Scrambles invite codes; changing it only risks rare retried collisions
+    INVITE_CODE_KEY: str = DEFAULT_INVITE_CODE_KEY
+    JOB_LEASE_TTL_SECONDS: int = 60  # scheduled-job lease, renewed every ttl/3
+
+    # AMM
+    LS_LMSR_ALPHA: float = 0.03  # b = alpha * shares outstanding (~4% max vig)
+    UGC_AMM_TYPE: str = "ls_lmsr"
+    UGC_LIQUIDITY_B: float = 20.0  # floor b for approved UGC markets
+
+    # Archive
+    ARCHIVE_AFTER_DAYS: int = 30  # days after resolution/cancellation
+    ARCHIVE_BATCH_MARKETS: int = 20  # markets moved per scheduler run
+
+    # Partitioning (transactions, price_history by month)
+    PARTITION_MONTHS_AHEAD: int = 3
+    TRANSACTIONS_RETENTION_MONTHS: int = 0  # 0 = keep attached forever
+    PRICE_HISTORY_RETENTION_MONTHS: int = 0
+    TRANSACTIONS_PAGE_WINDOW_DAYS: int = 31  # first created_at span a page scans
+
+    # Read models
+    USER_STATS_REBUILD_BATCH: int = 500  # users rebuilt per transaction
+
+    # Ledger
+    LEDGER_SNAPSHOT_LAG_SECONDS: int = 300  # postings newer than this wait a run
+    LEDGER_RECONCILE_BATCH: int = 1000  # users checked per statement
+
+    # Broadcasts (Telegram allows ~30 msg/s per bot, ~1 msg/s per chat)
+    BROADCAST_RATE_PER_SECOND: int = 30
+    BROADCAST_CHAT_INTERVAL_MS: int = 1000
+    BROADCAST_CONCURRENCY: int = 20  # messages in flight per worker
+    BROADCAST_PAGE_SIZE: int = 500  # recipients per checkpoint
+    BROADCAST_MAX_ATTEMPTS: int = 3  # per message, for 429s and network errors
+    NOTIFY_CHUNK_USERS: int = 1000  # recipients per resolution / voting notice job
+
+    # Exports
+    EXPORT_BATCH_ROWS: int = 5000  # rows fetched and encoded per cursor batch
 
     # B2B
     B2B_API_KEY: str = ""
 
+    @model_validator(mode="after")
+    def _check_invite_code_key(self) -> "Settings":
+        # With the public default anyone can decode codes back to sequence
+        # numbers and enumerate the next private bets' codes
+        if self.INVITE_CODE_KEY not in ("", DEFAULT_INVITE_CODE_KEY):
+            return self
+        if self.APP_ENV == "production":
+            raise ValueError("INVITE_CODE_KEY must be set to a random secret")
+        if self.APP_ENV != "test":
+            logger.warning("INVITE_CODE_KEY is not set; invite codes are guessable")
+        self.INVITE_CODE_KEY = DEFAULT_INVITE_CODE_KEY
+        return self
+
     @property
     def admin_ids(self) -> set[int]:
         if not self.ADMIN_TELEGRAM_IDS:
@@ -1,20 +1,36 @@
+from app.models.archive import ARCHIVED_TABLES
 from app.models.base import Base
 from app.models.comment import Comment
+from app.models.job_fence import JobFence
+from app.models.ledger import LedgerPosting, LedgerSnapshot
 from app.models.market import Market, MarketStatus
 from app.models.market_proposal import MarketProposal, ProposalStatus
+from app.models.market_stats import MarketStats, MarketStatsHourly
 from app.models.order import Order, OrderIntent, OrderSide, OrderStatus
 from app.models.position import Position
 from app.models.price_history import PriceHistory
-from app.models.private_bet import PrivateBet, PrivateBetParticipant, PrivateBetStatus
+from app.models.private_bet import (
+    PrivateBet,
+    PrivateBetInvite,
+    PrivateBetParticipant,
+    PrivateBetStatus,
+)
 from app.models.trade_fill import SettlementType, TradeFill
 from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
+from app.models.user_stats import UserStats
 
 __all__ = [
+    "ARCHIVED_TABLES",
     "Base",
     "Comment",
+    "JobFence",
+    "LedgerPosting",
+    "LedgerSnapshot",
     "Market",
     "MarketProposal",
+    "MarketStats",
+    "MarketStatsHourly",
     "MarketStatus",
     "Order",
     "OrderIntent",
@@ -23,6 +39,7 @@ __all__ = [
     "Position",
     "PriceHistory",
     "PrivateBet",
+    "PrivateBetInvite",
     "PrivateBetParticipant",
     "PrivateBetStatus",
     "ProposalStatus",
@@ -31,4 +48,5 @@ __all__ = [
     "Transaction",
     "TransactionType",
     "User",
+    "UserStats",
 ]
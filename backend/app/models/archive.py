@@ -0,0 +1,75 @@
+"""Cold copies of per-market tables for resolved and cancelled markets.
+
+Each archive table has the same columns as its hot table, minus foreign keys,
+so rows can be moved with INSERT ... SELECT and read back with UNION ALL.
+"""
+
+from collections.abc import Callable
+
+from sqlalchemy import Column, ColumnElement, Index, Subquery, Table, select, union_all
+
+from app.models.base import Base
+from app.models.order import Order
+from app.models.position import Position
+from app.models.price_history import PriceHistory
+from app.models.trade_fill import TradeFill
+from app.models.transaction import Transaction
+
+
+def _archive_table(source: Table, *indexes: tuple[str, ...]) -> Table:
+    name = f"{source.name}_archive"
+    return Table(
+        name,
+        Base.metadata,
+        *(
+            # Archives are not partitioned: id alone is the key
+            Column(c.name, c.type, primary_key=c.name == "id", nullable=c.nullable)
+            for c in source.columns
+        ),
+        *(Index(f"ix_{name}_{'_'.join(cols)}", *cols) for cols in indexes),
+    )
+
+
+orders_archive = _archive_table(
+    Order.__table__, ("market_id",), ("user_id", "created_at")
+)
+positions_archive = _archive_table(
+    Position.__table__, ("market_id",), ("user_id", "market_id")
+)
+trade_fills_archive = _archive_table(TradeFill.__table__, ("market_id", "created_at"))
+price_history_archive = _archive_table(
+    PriceHistory.__table__, ("market_id", "created_at")
+)
+transactions_archive = _archive_table(
+    Transaction.__table__, ("market_id",), ("user_id", "created_at")
+)
+
+# Hot → archive pairs, children before parents (trade_fills references orders)
+ARCHIVED_TABLES: list[tuple[Table, Table]] = [
+    (TradeFill.__table__, trade_fills_archive),
+    (Order.__table__, orders_archive),
+    (Position.__table__, positions_archive),
+    (PriceHistory.__table__, price_history_archive),
+    (Transaction.__table__, transactions_archive),
+]
+
+_archive_of = dict(ARCHIVED_TABLES)
+
+
+def archive_table(model) -> Table:
+    """Archive table for a hot model, for reads scoped to an archived market."""
+    return _archive_of[model.__table__]
+
+
+def with_archive(model, where: Callable[[Table], ColumnElement[bool]]) -> Subquery:
+    """Hot and archived rows of `model` as one subquery with the same columns.
+
+    `where` builds the filter for one table and is applied to both halves,
+    so each side can use its own index before the UNION ALL.
+    """
+    hot = model.__table__
+    cold = _archive_of[hot]
+    return union_all(
+        select(hot).where(where(hot)),
+        select(cold).where(where(cold)),
+    ).subquery(f"{hot.name}_all")
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
@@ -30,3 +30,32 @@ class UUIDMixin:
         primary_key=True,
         default=uuid.uuid4,
     )
+
+
+def _create_default_partition(target, connection, **kw) -> None:
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {target.name}_default "
+            f"PARTITION OF {target.name} DEFAULT"
+        )
+    )
+
+
+class MonthPartitionMixin:
+    """Table range-partitioned by created_at month.
+
+    The partition key has to be part of the primary key. Monthly partitions
+    are created ahead of time by the maintain_partitions task; the DEFAULT
+    partition only catches rows if that task falls behind.
+    """
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=True,
+    )
+
+    partition_table_kwargs = {
+        "postgresql_partition_by": "RANGE (created_at)",
+        "listeners": [("after_create", _create_default_partition)],
+    }
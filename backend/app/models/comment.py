@@ -1,6 +1,7 @@
 import uuid
 
-from sqlalchemy import ForeignKey, Index, Text
+from sqlalchemy import ForeignKey, Index, Integer, Text
+from sqlalchemy import text as sql_text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,7 +19,18 @@ class Comment(UUIDMixin, TimestampMixin, Base):
     )
     text: Mapped[str] = mapped_column(Text, nullable=False)
     parent_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    reply_count: Mapped[int] = mapped_column(Integer, default=0)  # direct replies
 
     user = relationship("User", lazy="joined")
 
-    __table_args__ = (Index("ix_comments_market_created", "market_id", "created_at"),)
+    __table_args__ = (
+        # Top-level comments in keyset order, and each comment's replies
+        Index(
+            "ix_comments_market_roots",
+            "market_id",
+            "created_at",
+            "id",
+            postgresql_where=sql_text("parent_id IS NULL"),
+        ),
+        Index("ix_comments_parent_created", "parent_id", "created_at", "id"),
+    )
@@ -0,0 +1,52 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, DateTime, Identity, Index, Numeric, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class LedgerPosting(Base):
+    """One leg of a double-entry journal entry. Rows are never updated.
+
+    The legs of an entry share `entry_id` and sum to zero. Accounts are
+    `user:<id>:available`, `user:<id>:reserved` and `house:<name>`.
+    """
+
+    __tablename__ = "ledger_postings"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    entry_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    account: Mapped[str] = mapped_column(String(80), nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    market_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_ledger_postings_account_id", "account", "id"),
+        Index("ix_ledger_postings_entry_id", "entry_id"),
+    )
+
+
+class LedgerSnapshot(Base):
+    """Balance of an account over every posting up to `last_posting_id`.
+
+    `as_of` is the latest created_at among those postings, so a snapshot
+    with as_of <= t never includes a posting made after t.
+    """
+
+    __tablename__ = "ledger_snapshots"
+
+    account: Mapped[str] = mapped_column(String(80), primary_key=True)
+    last_posting_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    balance: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    as_of: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
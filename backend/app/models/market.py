@@ -4,7 +4,7 @@ from datetime import datetime
 from decimal import Decimal
 
 from sqlalchemy import DateTime, Enum, Index, Integer, Numeric, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin, UUIDMixin
@@ -30,7 +30,8 @@ class Market(UUIDMixin, TimestampMixin, Base):
         default=MarketStatus.OPEN,
         index=True,
     )
-    resolution_outcome: Mapped[str | None] = mapped_column(String(10))  # "yes" or "no"
+    # "yes"/"no", or one of `outcomes` for multi-outcome markets
+    resolution_outcome: Mapped[str | None] = mapped_column(String(100))
     resolution_source: Mapped[str] = mapped_column(Text, default="")  # Resolution Rules
 
     # AMM parameters
@@ -39,6 +40,10 @@ class Market(UUIDMixin, TimestampMixin, Base):
     q_no: Mapped[Decimal] = mapped_column(Numeric(16, 6), default=Decimal("0"))
     liquidity_b: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("100"))
 
+    # Multi-outcome AMM: outcome labels and their share vector (same order)
+    outcomes: Mapped[list[str] | None] = mapped_column(ARRAY(String(100)))
+    q_outcomes: Mapped[list[Decimal] | None] = mapped_column(ARRAY(Numeric(16, 6)))
+
     # Bet limits
     min_bet: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("1.00"))
     max_bet: Mapped[Decimal] = mapped_column(
@@ -48,13 +53,18 @@ class Market(UUIDMixin, TimestampMixin, Base):
     # CLOB last trade price
     last_trade_price_yes: Mapped[Decimal | None] = mapped_column(Numeric(5, 2))
 
-    # Stats
+    # Stats, kept up to date by the write paths so listings need no aggregates
     total_volume: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
-    total_traders: Mapped[int] = mapped_column(Integer, default=0)
+    total_traders: Mapped[int] = mapped_column(Integer, default=0)  # distinct users
+    comment_count: Mapped[int] = mapped_column(Integer, default=0)
+    open_order_count: Mapped[int] = mapped_column(Integer, default=0)
 
     # Timing
     closes_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # Set once orders, positions, fills, history and transactions have moved
+    # to the *_archive tables
+    archived_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     # Creator (admin or UGC)
     created_by: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True))
@@ -63,6 +73,10 @@ class Market(UUIDMixin, TimestampMixin, Base):
     positions = relationship("Position", back_populates="market", lazy="selectin")
     price_history = relationship("PriceHistory", back_populates="market", lazy="noload")
 
+    @property
+    def outcome_labels(self) -> list[str]:
+        return list(self.outcomes) if self.outcomes else ["yes", "no"]
+
     __table_args__ = (
         Index("ix_markets_status_closes_at", "status", "closes_at"),
         Index("ix_markets_featured", "is_featured", "status"),
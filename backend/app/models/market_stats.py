@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Integer, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class MarketStats(Base):
+    """Running per-market totals, updated in the same transaction as trades."""
+
+    __tablename__ = "market_stats"
+
+    market_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("markets.id"), primary_key=True
+    )
+    buy_count: Mapped[int] = mapped_column(Integer, default=0)
+    buy_volume: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    sell_count: Mapped[int] = mapped_column(Integer, default=0)
+    sell_volume: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    fees: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    unique_traders: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class MarketStatsHourly(Base):
+    """Traded volume per market per hour, for rolling-window volume."""
+
+    __tablename__ = "market_stats_hourly"
+
+    market_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("markets.id"), primary_key=True
+    )
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    volume: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
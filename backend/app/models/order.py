@@ -1,8 +1,18 @@
 import enum
 import uuid
+from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import Enum, ForeignKey, Index, Numeric
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Numeric,
+    bindparam,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -19,6 +29,11 @@ class OrderStatus(str, enum.Enum):
     PARTIALLY_FILLED = "partially_filled"
     FILLED = "filled"
     CANCELLED = "cancelled"
+    EXPIRED = "expired"
+
+
+# Orders on the book; the partial indexes on orders spell these out
+ACTIVE_STATUSES = (OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED)
 
 
 class OrderIntent(str, enum.Enum):
@@ -28,6 +43,14 @@ class OrderIntent(str, enum.Enum):
     SELL_NO = "sell_no"
 
 
+class TimeInForce(str, enum.Enum):
+    GTC = "gtc"  # good till cancelled
+    IOC = "ioc"  # immediate or cancel: fill what crosses, drop the rest
+    FOK = "fok"  # fill or kill: fill in full or reject
+    POST_ONLY = "post_only"  # reject if it would cross
+    GTT = "gtt"  # good till expires_at
+
+
 class Order(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "orders"
 
@@ -54,19 +77,52 @@ class Order(UUIDMixin, TimestampMixin, Base):
         Enum(OrderIntent, values_callable=lambda e: [x.value for x in e]),
         nullable=False,
     )
+    time_in_force: Mapped[TimeInForce] = mapped_column(
+        Enum(TimeInForce, values_callable=lambda e: [x.value for x in e]),
+        default=TimeInForce.GTC,
+    )
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     user = relationship("User", backref="orders")
     market = relationship("Market", backref="orders")
 
     __table_args__ = (
+        # Live book only: filled/cancelled history never enters the index, and
+        # the INCLUDE columns let book aggregation run as an index-only scan.
         Index(
-            "ix_orders_book",
+            "ix_orders_open_book",
             "market_id",
             "side",
-            "status",
             "price",
             "created_at",
+            postgresql_include=["quantity", "filled_quantity", "user_id", "expires_at"],
+            postgresql_where=text("status IN ('open', 'partially_filled')"),
         ),
         Index("ix_orders_user_status", "user_id", "status"),
         Index("ix_orders_market_status", "market_id", "status"),
+        Index(
+            "ix_orders_expires_at",
+            "expires_at",
+            postgresql_where=text(
+                "expires_at IS NOT NULL AND status IN ('open', 'partially_filled')"
+            ),
+        ),
+    )
+
+
+def is_open() -> ColumnElement[bool]:
+    """Order is on the book (open or partially filled).
+
+    The statuses are inlined into the SQL instead of bound: a generic plan
+    over `status IN ($1, $2)` cannot prove the predicate of the partial
+    ix_orders_open_book / ix_orders_expires_at indexes, so it would not use them.
+    """
+    return Order.status.in_(
+        bindparam(
+            "open_statuses",
+            list(ACTIVE_STATUSES),
+            expanding=True,
+            literal_execute=True,
+            unique=True,
+        )
     )
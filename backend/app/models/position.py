@@ -17,7 +17,8 @@ class Position(UUIDMixin, TimestampMixin, Base):
     market_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("markets.id"), nullable=False, index=True
     )
-    outcome: Mapped[str] = mapped_column(String(10), nullable=False)  # "yes" or "no"
+    # "yes"/"no", or an outcome label of a multi-outcome market
+    outcome: Mapped[str] = mapped_column(String(100), nullable=False)
 
     shares: Mapped[Decimal] = mapped_column(Numeric(16, 6), default=Decimal("0"))
     reserved_shares: Mapped[Decimal] = mapped_column(
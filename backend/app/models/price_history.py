@@ -2,13 +2,13 @@ import uuid
 from decimal import Decimal
 
 from sqlalchemy import ForeignKey, Index, Numeric
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.base import Base, TimestampMixin, UUIDMixin
+from app.models.base import Base, MonthPartitionMixin, TimestampMixin, UUIDMixin
 
 
-class PriceHistory(UUIDMixin, TimestampMixin, Base):
+class PriceHistory(UUIDMixin, MonthPartitionMixin, TimestampMixin, Base):
     __tablename__ = "price_history"
 
     market_id: Mapped[uuid.UUID] = mapped_column(
@@ -18,7 +18,12 @@ class PriceHistory(UUIDMixin, TimestampMixin, Base):
     price_no: Mapped[Decimal] = mapped_column(Numeric(8, 4), nullable=False)
     q_yes: Mapped[Decimal] = mapped_column(Numeric(16, 6), nullable=False)
     q_no: Mapped[Decimal] = mapped_column(Numeric(16, 6), nullable=False)
+    # Full price vector for multi-outcome markets
+    prices: Mapped[list[Decimal] | None] = mapped_column(ARRAY(Numeric(8, 4)))
 
     market = relationship("Market", back_populates="price_history")
 
-    __table_args__ = (Index("ix_price_history_market_time", "market_id", "created_at"),)
+    __table_args__ = (
+        Index("ix_price_history_market_time", "market_id", "created_at"),
+        MonthPartitionMixin.partition_table_kwargs,
+    )
@@ -11,6 +11,7 @@ from sqlalchemy import (
     Index,
     Integer,
     Numeric,
+    Sequence,
     String,
     Text,
     UniqueConstraint,
@@ -28,6 +29,12 @@ class PrivateBetStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+# Numbers behind invite codes, see app.services.invite_codes
+invite_code_seq = Sequence(
+    "private_bet_code_seq", start=0, minvalue=0, metadata=Base.metadata
+)
+
+
 class PrivateBet(UUIDMixin, TimestampMixin, Base):
     __tablename__ = "private_bets"
 
@@ -53,8 +60,8 @@ class PrivateBet(UUIDMixin, TimestampMixin, Base):
         DateTime(timezone=True), nullable=False
     )
 
+    # Only invited usernames may join a closed bet
     is_closed: Mapped[bool] = mapped_column(Boolean, default=False)
-    allowed_usernames: Mapped[str | None] = mapped_column(Text, default=None)
 
     resolution_outcome: Mapped[str | None] = mapped_column(String(10))
     resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
@@ -66,8 +73,17 @@ class PrivateBet(UUIDMixin, TimestampMixin, Base):
     no_votes: Mapped[int] = mapped_column(Integer, default=0)
 
     creator = relationship("User", foreign_keys=[created_by], lazy="selectin")
+    # Loaded only by the bet detail; counters stand in for it elsewhere
     participants = relationship(
-        "PrivateBetParticipant", back_populates="bet", lazy="selectin"
+        "PrivateBetParticipant", back_populates="bet", lazy="raise"
+    )
+    # Whitelists can be long: read them only where they are shown
+    invites = relationship(
+        "PrivateBetInvite",
+        lazy="raise",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="PrivateBetInvite.username",
     )
 
     __table_args__ = (
@@ -90,12 +106,29 @@ class PrivateBetParticipant(UUIDMixin, TimestampMixin, Base):
     vote: Mapped[str | None] = mapped_column(String(10))  # "yes" / "no" / null
     voted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     payout: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"))
+    # Delivery result of the "voting started" message; null until sent
+    voting_notice: Mapped[str | None] = mapped_column(String(10))
 
     bet = relationship("PrivateBet", back_populates="participants")
-    user = relationship("User", lazy="selectin")
+    user = relationship("User", lazy="raise")
 
     __table_args__ = (
         UniqueConstraint("bet_id", "user_id", name="uq_private_bet_participant"),
         Index("ix_pbp_bet_id", "bet_id"),
         Index("ix_pbp_user_id", "user_id"),
     )
+
+
+class PrivateBetInvite(Base):
+    """A username (lowercase, no @) allowed to join a closed bet."""
+
+    __tablename__ = "private_bet_invites"
+
+    bet_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("private_bets.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    username: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+    __table_args__ = (Index("ix_private_bet_invites_username", "username", "bet_id"),)
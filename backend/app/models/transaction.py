@@ -6,7 +6,7 @@ from sqlalchemy import Enum, ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.base import Base, TimestampMixin, UUIDMixin
+from app.models.base import Base, MonthPartitionMixin, TimestampMixin, UUIDMixin
 
 
 class TransactionType(str, enum.Enum):
@@ -26,11 +26,11 @@ class TransactionType(str, enum.Enum):
     BET_REFUND = "bet_refund"
 
 
-class Transaction(UUIDMixin, TimestampMixin, Base):
+class Transaction(UUIDMixin, MonthPartitionMixin, TimestampMixin, Base):
     __tablename__ = "transactions"
 
     user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
     )
     market_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True), ForeignKey("markets.id")
@@ -42,7 +42,7 @@ class Transaction(UUIDMixin, TimestampMixin, Base):
 
     amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
     shares: Mapped[Decimal] = mapped_column(Numeric(16, 6), default=Decimal("0"))
-    outcome: Mapped[str | None] = mapped_column(String(10))
+    outcome: Mapped[str | None] = mapped_column(String(100))
     price_at_trade: Mapped[Decimal] = mapped_column(Numeric(8, 4), default=Decimal("0"))
 
     description: Mapped[str] = mapped_column(Text, default="")
@@ -50,6 +50,8 @@ class Transaction(UUIDMixin, TimestampMixin, Base):
     user = relationship("User", back_populates="transactions")
 
     __table_args__ = (
+        Index("ix_transactions_user_time", "user_id", "created_at"),
         Index("ix_transactions_user_type", "user_id", "type"),
         Index("ix_transactions_market", "market_id"),
+        MonthPartitionMixin.partition_table_kwargs,
     )
@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Integer, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class UserStats(Base):
+    """Per-user totals derived from the ledger, updated with each event.
+
+    Realized PnL is the user's net trading cash flow in a market, fees
+    included, booked when the market is resolved or cancelled. Wins and
+    losses count resolved markets with positive / negative PnL;
+    current_streak is positive for a run of wins and negative for a run of
+    losses.
+    """
+
+    __tablename__ = "user_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True
+    )
+    buys: Mapped[int] = mapped_column(Integer, default=0)
+    buy_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    sells: Mapped[int] = mapped_column(Integer, default=0)
+    sell_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    fills: Mapped[int] = mapped_column(Integer, default=0)
+    fill_bought: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    fill_sold: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    fees: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    payouts: Mapped[int] = mapped_column(Integer, default=0)
+    payout_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    bonuses: Mapped[int] = mapped_column(Integer, default=0)
+    bonus_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    # Positions holding shares (archived markets included) and their cost
+    active_positions: Mapped[int] = mapped_column(Integer, default=0)
+    position_cost: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+
+    realized_pnl: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    wins: Mapped[int] = mapped_column(Integer, default=0)
+    losses: Mapped[int] = mapped_column(Integer, default=0)
+    current_streak: Mapped[int] = mapped_column(Integer, default=0)
+    best_streak: Mapped[int] = mapped_column(Integer, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    @property
+    def win_rate(self) -> Decimal:
+        settled = self.wins + self.losses
+        if not settled:
+            return Decimal("0.00")
+        return (Decimal(self.wins * 100) / settled).quantize(Decimal("0.01"))
@@ -18,6 +18,7 @@ class MarketCreate(BaseModel):
     min_bet: Decimal = Decimal("1.00")
     max_bet: Decimal = Decimal("10000.00")
     initial_price_yes: float = 0.5
+    outcomes: list[str] | None = None  # required for amm_type="lmsr_multi"
 
 
 class MarketRead(BaseModel):
@@ -29,10 +30,14 @@ class MarketRead(BaseModel):
     price_no: float
     total_volume: Decimal
     total_traders: int
+    comment_count: int = 0
+    open_order_count: int = 0
     closes_at: datetime
     is_featured: bool
     created_at: datetime
     amm_type: str
+    outcomes: list[str] | None = None
+    prices: list[float] | None = None
 
     model_config = {"from_attributes": True}
 
@@ -44,6 +49,7 @@ class MarketDetail(MarketRead):
     q_yes: Decimal
     q_no: Decimal
     liquidity_b: Decimal
+    q_outcomes: list[Decimal] | None = None
     min_bet: Decimal
     max_bet: Decimal
     resolution_outcome: str | None
@@ -55,6 +61,7 @@ class MarketDetail(MarketRead):
 class PricePoint(BaseModel):
     price_yes: float
     price_no: float
+    prices: list[float] | None = None
     created_at: datetime
 
     model_config = {"from_attributes": True}
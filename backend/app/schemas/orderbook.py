@@ -1,14 +1,16 @@
+from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
-class PlaceOrderRequest(BaseModel):
-    market_id: UUID
+class OrderLeg(BaseModel):
     intent: str  # buy_yes, buy_no, sell_yes, sell_no
     price: Decimal
     quantity: Decimal
+    time_in_force: str = "gtc"  # gtc, ioc, fok, post_only, gtt
+    expires_at: datetime | None = None  # required for gtt
 
     @field_validator("intent")
     @classmethod
@@ -31,15 +33,65 @@ class PlaceOrderRequest(BaseModel):
             raise ValueError("Quantity must be positive")
         return v
 
+    @field_validator("time_in_force")
+    @classmethod
+    def validate_time_in_force(cls, v: str) -> str:
+        if v not in ("gtc", "ioc", "fok", "post_only", "gtt"):
+            raise ValueError("time_in_force must be gtc, ioc, fok, post_only, or gtt")
+        return v
+
+    @model_validator(mode="after")
+    def validate_expiry(self) -> "OrderLeg":
+        if (self.time_in_force == "gtt") != (self.expires_at is not None):
+            raise ValueError("expires_at is required for gtt orders and only for them")
+        return self
+
+
+class PlaceOrderRequest(OrderLeg):
+    market_id: UUID
+
 
 class PlaceOrderResponse(BaseModel):
-    order_id: str
+    order_id: str | None  # None when an IOC order found nothing to match
     status: str
     filled_quantity: float
     remaining: float
     fills_count: int
 
 
+class BatchPlaceOrderRequest(BaseModel):
+    market_id: UUID
+    orders: list[OrderLeg] = Field(min_length=1)
+
+
+class BatchPlaceOrderResponse(BaseModel):
+    orders: list[PlaceOrderResponse]
+
+
+class ReplaceOrdersRequest(BaseModel):
+    market_id: UUID
+    orders: list[OrderLeg]  # empty list just pulls the ladder
+
+
+class BatchCancelRequest(BaseModel):
+    order_ids: list[UUID] | None = None
+    market_id: UUID | None = None
+    side: str | None = None  # book side: buy (bids) or sell (asks)
+
+    @field_validator("side")
+    @classmethod
+    def validate_side(cls, v: str | None) -> str | None:
+        if v is not None and v not in ("buy", "sell"):
+            raise ValueError("Side must be buy or sell")
+        return v
+
+    @model_validator(mode="after")
+    def validate_filter(self) -> "BatchCancelRequest":
+        if self.order_ids is None and self.market_id is None:
+            raise ValueError("Specify order_ids or market_id")
+        return self
+
+
 class OrderBookLevel(BaseModel):
     price: float
     quantity: float
@@ -60,6 +112,8 @@ class UserOrderResponse(BaseModel):
     filled_quantity: float
     status: str
     original_intent: str
+    time_in_force: str
+    expires_at: str | None
     created_at: str
 
 
@@ -74,3 +128,12 @@ class TradeFillResponse(BaseModel):
 class CancelOrderResponse(BaseModel):
     order_id: str
     cancelled_quantity: float
+
+
+class BatchCancelResponse(BaseModel):
+    cancelled: list[CancelOrderResponse]
+
+
+class ReplaceOrdersResponse(BaseModel):
+    cancelled: list[CancelOrderResponse]
+    orders: list[PlaceOrderResponse]
@@ -45,6 +45,7 @@ class PrivateBetRead(BaseModel):
     voting_deadline: datetime
     yes_count: int
     no_count: int
+    participant_count: int
     total_pool: Decimal
     created_at: datetime
     creator_name: str
@@ -57,6 +58,11 @@ class PrivateBetRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class PrivateBetListResponse(BaseModel):
+    items: list[PrivateBetRead]
+    next_cursor: str | None = None
+
+
 class PrivateBetDetail(PrivateBetRead):
     description: str
     yes_votes: int
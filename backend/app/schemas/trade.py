@@ -12,8 +12,9 @@ class TradeRequest(BaseModel):
     @field_validator("outcome")
     @classmethod
     def validate_outcome(cls, v: str) -> str:
-        if v not in ("yes", "no"):
-            raise ValueError("Outcome must be 'yes' or 'no'")
+        # "yes"/"no" for binary markets, an outcome label for multi-outcome ones
+        if not v or len(v) > 100:
+            raise ValueError("Outcome must be 'yes', 'no' or a market outcome")
         return v
 
     @field_validator("amount")
@@ -32,8 +33,9 @@ class SellRequest(BaseModel):
     @field_validator("outcome")
     @classmethod
     def validate_outcome(cls, v: str) -> str:
-        if v not in ("yes", "no"):
-            raise ValueError("Outcome must be 'yes' or 'no'")
+        # "yes"/"no" for binary markets, an outcome label for multi-outcome ones
+        if not v or len(v) > 100:
+            raise ValueError("Outcome must be 'yes', 'no' or a market outcome")
         return v
 
     @field_validator("shares")
@@ -52,4 +54,5 @@ class TradeResponse(BaseModel):
     revenue: float | None = None
     price_yes: float
     price_no: float
+    prices: list[float] | None = None
     new_balance: float
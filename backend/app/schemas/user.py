@@ -32,6 +32,11 @@ class UserPublicProfile(BaseModel):
     total_trades: int
     total_profit: Decimal
     win_rate: Decimal
+    realized_pnl: Decimal = Decimal("0")
+    wins: int = 0
+    losses: int = 0
+    current_streak: int = 0
+    best_streak: int = 0
     created_at: datetime
 
     model_config = {"from_attributes": True}
@@ -0,0 +1,83 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.archive import ARCHIVED_TABLES
+from app.models.market import Market, MarketStatus
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = (MarketStatus.RESOLVED, MarketStatus.CANCELLED)
+
+
+class ArchiveService:
+    """Moves rows of finished markets out of the hot tables."""
+
+    def __init__(self, db: AsyncSession, redis: Redis):
+        self.db = db
+        self.redis = redis
+
+    async def archive_market(self, market_id: uuid.UUID) -> dict[str, int]:
+        """Move one finished market's rows to the archive tables.
+
+        Each table is moved with a single DELETE ... RETURNING feeding an
+        INSERT, all in one transaction. Returns rows moved per table.
+        """
+        market = await self.db.get(Market, market_id, with_for_update=True)
+        if market is None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
+        if market.status not in ARCHIVABLE_STATUSES:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                "Only resolved or cancelled markets can be archived",
+            )
+        if market.archived_at is not None:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Market already archived")
+
+        moved: dict[str, int] = {}
+        for hot, cold in ARCHIVED_TABLES:
+            rows = (
+                delete(hot)
+                .where(hot.c.market_id == market_id)
+                .returning(*hot.c)
+                .cte(f"moved_{hot.name}")
+            )
+            result = await self.db.execute(
+                insert(cold).from_select([c.name for c in hot.c], select(rows))
+            )
+            moved[hot.name] = result.rowcount
+
+        market.archived_at = func.now()
+        await self.db.commit()
+
+        await self.redis.delete(f"market:{market_id}")
+        await self.redis.delete(f"orderbook:{market_id}")
+        return moved
+
+    async def archive_due(self, now: datetime, older_than_days: int, limit: int) -> int:
+        """Archive up to `limit` markets finished more than N days before `now`."""
+        cutoff = now - timedelta(days=older_than_days)
+        # Markets cancelled before cancel_market set resolved_at only have updated_at
+        finished_at = func.coalesce(Market.resolved_at, Market.updated_at)
+        result = await self.db.execute(
+            select(Market.id)
+            .where(
+                Market.status.in_(ARCHIVABLE_STATUSES),
+                Market.archived_at.is_(None),
+                finished_at < cutoff,
+            )
+            .order_by(finished_at)
+            .limit(limit)
+        )
+        market_ids = result.scalars().all()
+
+        for market_id in market_ids:
+            moved = await self.archive_market(market_id)
+            logger.info(f"Market archived: {market_id} {moved}")
+
+        return len(market_ids)
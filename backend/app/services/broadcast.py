@@ -0,0 +1,252 @@
+"""Rate-limited Telegram delivery and resumable broadcasts.
+
+Telegram allows a bot about 30 messages a second overall and about one a
+second per chat, and answers floods with 429 retry_after. Limits are kept
+in Redis so every worker sending for the bot shares them.
+
+A broadcast pages through active users by id and records a checkpoint in
+Redis after each page, so a broadcast cut off mid-way resumes from its
+last finished page (re-sending at most that page).
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import InlineKeyboardMarkup
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+DELIVERED = "delivered"
+BLOCKED = "blocked"
+FAILED = "failed"
+RESULTS = (DELIVERED, BLOCKED, FAILED)
+
+PAUSE_KEY = "tg:pause"
+RUNNING_KEY = "broadcasts:running"
+LOCK_TTL = 120  # seconds; refreshed after every page
+KEEP_FINISHED = 7 * 86400  # seconds a finished broadcast's report is kept
+
+
+class Outbound(NamedTuple):
+    chat_id: int
+    text: str
+    reply_markup: InlineKeyboardMarkup | None = None
+
+
+class Sender:
+    """Sends messages concurrently within Telegram's flood limits."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        redis: Redis,
+        rate: int = settings.BROADCAST_RATE_PER_SECOND,
+        concurrency: int = settings.BROADCAST_CONCURRENCY,
+    ):
+        self.bot = bot
+        self.redis = redis
+        self.rate = rate
+        self.concurrency = concurrency
+        self.chat_interval_ms = settings.BROADCAST_CHAT_INTERVAL_MS
+        self.max_attempts = settings.BROADCAST_MAX_ATTEMPTS
+
+    async def send_all(self, messages: Iterable[Outbound]) -> Counter[str]:
+        """Send every message, at most `concurrency` in flight. Counts by result."""
+        return Counter(await self.send_each(messages))
+
+    async def send_each(self, messages: Iterable[Outbound]) -> list[str]:
+        """Send every message, at most `concurrency` in flight. Results in order."""
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def send(message: Outbound) -> str:
+            async with slots:
+                return await self.send(message)
+
+        return list(await asyncio.gather(*(send(m) for m in messages)))
+
+    async def send(self, message: Outbound) -> str:
+        """Deliver one message, retrying floods and transient errors."""
+        for attempt in range(1, self.max_attempts + 1):
+            await self._acquire(message.chat_id)
+            try:
+                await self.bot.send_message(
+                    message.chat_id,
+                    message.text,
+                    reply_markup=message.reply_markup,
+                    parse_mode="HTML",
+                )
+                return DELIVERED
+            except TelegramRetryAfter as e:
+                # Flood control is per bot: pause every sender, not just this one
+                await self.redis.set(PAUSE_KEY, 1, ex=max(e.retry_after, 1))
+            except TelegramForbiddenError:
+                return BLOCKED
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning(f"Send to {message.chat_id} failed ({attempt}): {e}")
+                await asyncio.sleep(attempt)
+            except TelegramAPIError as e:
+                logger.warning(f"Send to {message.chat_id} rejected: {e}")
+                return FAILED
+        return FAILED
+
+    async def _acquire(self, chat_id: int) -> None:
+        """Wait for the chat's interval, any flood pause, then a global token.
+
+        The global bucket holds `rate` tokens and refills once a second: a
+        counter per wall-clock second, shared through Redis.
+        """
+        chat_key = f"tg:chat:{chat_id}"
+        while not await self.redis.set(chat_key, 1, px=self.chat_interval_ms, nx=True):
+            await asyncio.sleep(max(await self.redis.pttl(chat_key), 1) / 1000)
+
+        while True:
+            pause_ms = await self.redis.pttl(PAUSE_KEY)
+            if pause_ms > 0:
+                await asyncio.sleep(pause_ms / 1000)
+                continue
+            now = time.time()
+            window = f"tg:rate:{int(now)}"
+            async with self.redis.pipeline(transaction=True) as pipe:
+                taken, _ = await pipe.incr(window).expire(window, 2).execute()
+            if taken <= self.rate:
+                return
+            await asyncio.sleep(int(now) + 1 - now)
+
+
+class BroadcastService:
+    """One message to every active user, resumable from a Redis checkpoint."""
+
+    def __init__(self, db: AsyncSession, redis: Redis, sender: Sender | None = None):
+        self.db = db
+        self.redis = redis
+        self.sender = sender
+        self.page_size = settings.BROADCAST_PAGE_SIZE
+
+    async def start(
+        self, text: str, reply_markup: InlineKeyboardMarkup | None = None
+    ) -> str:
+        """Register a broadcast; `run` sends it."""
+        broadcast_id = uuid.uuid4().hex
+        await self.redis.hset(
+            f"broadcast:{broadcast_id}",
+            mapping={
+                "text": text,
+                "reply_markup": reply_markup.model_dump_json() if reply_markup else "",
+                "cursor": "",
+                "status": "running",
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                **dict.fromkeys(RESULTS, 0),
+            },
+        )
+        await self.redis.sadd(RUNNING_KEY, broadcast_id)
+        return broadcast_id
+
+    async def report(self, broadcast_id: str) -> dict | None:
+        state = await self.redis.hgetall(f"broadcast:{broadcast_id}")
+        if not state:
+            return None
+        return {
+            "id": broadcast_id,
+            "status": state["status"],
+            "started_at": state["started_at"],
+            "finished_at": state.get("finished_at"),
+            **{k: int(state[k]) for k in RESULTS},
+        }
+
+    async def run(self, broadcast_id: str) -> dict | None:
+        """Send to the recipients after the checkpoint and return the report.
+
+        Needs a sender. Returns None without sending if another worker is
+        running the broadcast.
+        """
+        key = f"broadcast:{broadcast_id}"
+        lock = f"{key}:lock"
+        if not await self.redis.set(lock, 1, nx=True, ex=LOCK_TTL):
+            return None
+        try:
+            state = await self.redis.hgetall(key)
+            if not state:
+                await self.redis.srem(RUNNING_KEY, broadcast_id)
+            elif state["status"] == "running":
+                await self._send_pages(key, state)
+        finally:
+            await self.redis.delete(lock)
+
+        report = await self.report(broadcast_id)
+        if report:
+            logger.info(f"Broadcast {report}")
+        return report
+
+    async def _send_pages(self, key: str, state: dict) -> None:
+        markup = (
+            InlineKeyboardMarkup.model_validate_json(state["reply_markup"])
+            if state["reply_markup"]
+            else None
+        )
+        cursor = uuid.UUID(state["cursor"]) if state["cursor"] else None
+        while True:
+            query = (
+                select(User.id, User.telegram_id)
+                .where(User.is_active)
+                .order_by(User.id)
+                .limit(self.page_size)
+            )
+            if cursor is not None:
+                query = query.where(User.id > cursor)
+            rows = (await self.db.execute(query)).all()
+            # Don't sit idle in a transaction while the page is sent
+            await self.db.rollback()
+            if not rows:
+                break
+
+            counts = await self.sender.send_all(
+                Outbound(telegram_id, state["text"], markup) for _, telegram_id in rows
+            )
+            cursor = rows[-1].id
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, "cursor", str(cursor))
+                for result in RESULTS:
+                    pipe.hincrby(key, result, counts[result])
+                pipe.expire(f"{key}:lock", LOCK_TTL)
+                await pipe.execute()
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    "status": "done",
+                    "finished_at": datetime.now(timezone.utc).isoformat(),
+                },
+            )
+            pipe.expire(key, KEEP_FINISHED)
+            pipe.srem(RUNNING_KEY, key.removeprefix("broadcast:"))
+            await pipe.execute()
+
+    async def resume_all(self) -> list[dict]:
+        """Run every unfinished broadcast no other worker holds."""
+        reports = []
+        for broadcast_id in await self.redis.smembers(RUNNING_KEY):
+            report = await self.run(broadcast_id)
+            if report:
+                reports.append(report)
+        return reports
@@ -0,0 +1,162 @@
+"""Close markets and private bets at their closing time.
+
+Deadlines live in a Redis sorted set scored by closes_at (epoch seconds),
+written whenever a market or bet is created or its closing time changes.
+`run` sleeps until the earliest score and closes everything due in
+batches; scheduling a deadline wakes it early. Postgres stays the source
+of truth: `sweep` closes whatever Redis lost and re-seeds the set.
+"""
+
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.market import Market, MarketStatus
+from app.models.private_bet import PrivateBet, PrivateBetStatus
+from app.services.settlement import SettlementService, invalidate_bet_caches
+
+logger = logging.getLogger(__name__)
+
+KEY = "deadlines"
+WAKE_KEY = "deadlines:wake"
+MARKET = "market"
+BET = "bet"
+
+
+async def schedule(
+    redis: Redis, kind: str, entity_id: uuid.UUID, closes_at: datetime
+) -> None:
+    """Set (or move) the deadline of a market or bet and wake the worker."""
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zadd(KEY, {f"{kind}:{entity_id}": closes_at.timestamp()})
+        pipe.lpush(WAKE_KEY, 1)
+        pipe.ltrim(WAKE_KEY, 0, 0)
+        await pipe.execute()
+
+
+class DeadlineService:
+    def __init__(self, db: AsyncSession, redis: Redis):
+        self.db = db
+        self.redis = redis
+        self.batch_size = settings.DEADLINE_BATCH
+
+    async def close_due(self) -> int:
+        """Close every market and bet whose deadline has passed.
+
+        Members are claimed with ZREM before closing, so two workers never
+        close the same batch. A claim lost to a crash is picked up by the
+        sweep. Returns the number closed.
+        """
+        closed = 0
+        while True:
+            now = time.time()
+            members = await self.redis.zrangebyscore(
+                KEY, "-inf", now, start=0, num=self.batch_size
+            )
+            if not members:
+                return closed
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for member in members:
+                    pipe.zrem(KEY, member)
+                claimed = [m for m, n in zip(members, await pipe.execute()) if n]
+
+            due: dict[str, list[uuid.UUID]] = {MARKET: [], BET: []}
+            for member in claimed:
+                kind, _, entity_id = member.partition(":")
+                due[kind].append(uuid.UUID(entity_id))
+
+            at = datetime.fromtimestamp(now, timezone.utc)
+            if due[MARKET]:
+                closed += len(await self.close_markets(at, due[MARKET]))
+            if due[BET]:
+                closed += await self._close_bets(at, due[BET])
+            # Anything not closed had its closing time moved since it was claimed
+            await self.reseed(due[MARKET], due[BET])
+
+    async def close_markets(
+        self, now: datetime, market_ids: list[uuid.UUID] | None = None
+    ) -> list[uuid.UUID]:
+        """Stop trading on OPEN markets past closes_at. Returns the ids closed."""
+        query = (
+            update(Market)
+            .where(Market.status == MarketStatus.OPEN, Market.closes_at <= now)
+            .values(status=MarketStatus.TRADING_CLOSED)
+            .returning(Market.id, Market.title)
+        )
+        if market_ids is not None:
+            query = query.where(Market.id.in_(market_ids))
+        rows = (await self.db.execute(query)).all()
+        if not rows:
+            return []
+        await self.db.commit()
+
+        for row in rows:
+            logger.info(f"Market closed: {row.id} - {row.title}")
+        await self.redis.delete("markets:list", *(f"market:{row.id}" for row in rows))
+        return [row.id for row in rows]
+
+    async def reseed(
+        self,
+        market_ids: list[uuid.UUID] | None = None,
+        bet_ids: list[uuid.UUID] | None = None,
+    ) -> None:
+        """Write the deadlines of open markets and bets (all, or the given ids)."""
+        deadlines = {}
+        for kind, model, status, ids in (
+            (MARKET, Market, MarketStatus.OPEN, market_ids),
+            (BET, PrivateBet, PrivateBetStatus.OPEN, bet_ids),
+        ):
+            if ids == []:
+                continue
+            query = select(model.id, model.closes_at).where(model.status == status)
+            if ids is not None:
+                query = query.where(model.id.in_(ids))
+            for entity_id, closes_at in (await self.db.execute(query)).all():
+                deadlines[f"{kind}:{entity_id}"] = closes_at.timestamp()
+        await self.db.rollback()
+        if deadlines:
+            await self.redis.zadd(KEY, deadlines)
+
+    async def sweep(self) -> int:
+        """Close anything past due in Postgres and re-seed the set from it."""
+        now = datetime.now(timezone.utc)
+        closed = len(await self.close_markets(now))
+        closed += await self._close_bets(now)
+        await self.reseed()
+        return closed
+
+    async def _close_bets(
+        self, now: datetime, bet_ids: list[uuid.UUID] | None = None
+    ) -> int:
+        settlement = SettlementService(self.db)
+        closed = 0
+        while chunk := await settlement.close_expired(now, bet_ids):
+            await self.db.commit()
+            await invalidate_bet_caches(self.db, self.redis, chunk)
+            closed += len(chunk)
+        return closed
+
+    async def run(self, until: float) -> int:
+        """Close deadlines as they fall due until the `until` timestamp.
+
+        Returns the number closed. Callers make sure one worker runs it.
+        """
+        closed = 0
+        while True:
+            closed += await self.close_due()
+            now = time.time()
+            if now >= until:
+                return closed
+            wait = until - now
+            head = await self.redis.zrange(KEY, 0, 0, withscores=True)
+            if head:
+                wait = min(wait, head[0][1] - now)
+            if wait > 0:
+                # BLPOP returns early when a new deadline is scheduled
+                await self.redis.blpop(WAKE_KEY, timeout=max(wait, 0.01))
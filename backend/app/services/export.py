@@ -0,0 +1,234 @@
+"""Streaming CSV / Parquet exports of ledger data.
+
+Rows come off a server-side cursor `batch_size` at a time and each batch is
+encoded and handed on before the next is fetched, so memory stays flat no
+matter how many rows an export covers.
+"""
+
+import csv
+import enum
+import io
+import json
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from datetime import date, datetime, time, timedelta, timezone
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import ARRAY, DateTime, Enum, Integer, Numeric, Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.archive import with_archive
+from app.models.price_history import PriceHistory
+from app.models.trade_fill import TradeFill
+from app.models.transaction import Transaction
+
+EXPORT_FORMATS = ("csv", "parquet")
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+# ── Datasets ──
+
+
+def user_transactions(user_id: uuid.UUID) -> Select:
+    """A user's full ledger, hot and archived, oldest first."""
+    txs = with_archive(Transaction, lambda t: t.c.user_id == user_id)
+    return select(
+        txs.c.id,
+        txs.c.created_at,
+        txs.c.type,
+        txs.c.market_id,
+        txs.c.outcome,
+        txs.c.amount,
+        txs.c.shares,
+        txs.c.price_at_trade,
+        txs.c.description,
+    ).order_by(txs.c.created_at, txs.c.id)
+
+
+def market_fills(market_id: uuid.UUID, with_users: bool = False) -> Select:
+    """A market's CLOB fills, oldest first. Trader ids only if `with_users`."""
+    fills = with_archive(TradeFill, lambda t: t.c.market_id == market_id)
+    columns = [
+        fills.c.id,
+        fills.c.created_at,
+        fills.c.price,
+        fills.c.quantity,
+        fills.c.fee,
+        fills.c.settlement_type,
+    ]
+    if with_users:
+        columns += [fills.c.buyer_id, fills.c.seller_id]
+    return select(*columns).order_by(fills.c.created_at, fills.c.id)
+
+
+def market_price_history(market_id: uuid.UUID) -> Select:
+    """A market's price history, oldest first."""
+    history = with_archive(PriceHistory, lambda t: t.c.market_id == market_id)
+    return select(
+        history.c.created_at,
+        history.c.price_yes,
+        history.c.price_no,
+        history.c.q_yes,
+        history.c.q_no,
+        history.c.prices,
+    ).order_by(history.c.created_at, history.c.id)
+
+
+def daily_ledger(day: date) -> Select:
+    """Every transaction on the platform during one UTC day."""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    txs = with_archive(
+        Transaction, lambda t: (t.c.created_at >= start) & (t.c.created_at < end)
+    )
+    return select(txs).order_by(txs.c.created_at, txs.c.id)
+
+
+# ── Encoders ──
+
+
+def check_format(fmt: str) -> None:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Format must be one of: {', '.join(EXPORT_FORMATS)}",
+        )
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, "Parquet export is not available"
+            )
+
+
+async def iter_batches(
+    db: AsyncSession, query: Select, batch_size: int
+) -> AsyncIterator[Sequence[Row]]:
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield rows
+
+
+def _csv_cell(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return json.dumps([str(v) for v in value])
+    return value
+
+
+async def iter_csv(
+    db: AsyncSession, query: Select, batch_size: int
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.name for c in query.selected_columns])
+    async for rows in iter_batches(db, query, batch_size):
+        writer.writerows([_csv_cell(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _arrow_type(sql_type):
+    import pyarrow as pa
+
+    if isinstance(sql_type, ARRAY):
+        return pa.list_(_arrow_type(sql_type.item_type))
+    if isinstance(sql_type, Numeric):
+        return pa.decimal128(sql_type.precision, sql_type.scale)
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    return pa.string()
+
+
+def _arrow_cell(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink that hands back whatever was written since last drain."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def iter_parquet(
+    db: AsyncSession, query: Select, batch_size: int
+) -> AsyncIterator[bytes]:
+    """One Parquet row group per cursor batch."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(query.selected_columns)
+    schema = pa.schema(
+        [
+            pa.field(
+                c.name,
+                pa.string() if isinstance(c.type, Enum) else _arrow_type(c.type),
+            )
+            for c in columns
+        ]
+    )
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema)
+    async for rows in iter_batches(db, query, batch_size):
+        arrays = [
+            pa.array([_arrow_cell(row[i]) for row in rows], type=field.type)
+            for i, field in enumerate(schema)
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+async def export_stream(
+    query: Select, fmt: str, batch_size: int
+) -> AsyncIterator[bytes]:
+    """Encode `query` as `fmt` on a session that lives as long as the stream.
+
+    Request-scoped sessions are closed before a streaming response body is
+    sent, so the export opens its own.
+    """
+    encode = iter_parquet if fmt == "parquet" else iter_csv
+    async with async_session() as db:
+        async for chunk in encode(db, query, batch_size):
+            if chunk:
+                yield chunk
+
+
+def export_response(query: Select, fmt: str, name: str) -> StreamingResponse:
+    """Download response streaming `query` as `name`.csv / `name`.parquet."""
+    check_format(fmt)
+    return StreamingResponse(
+        export_stream(query, fmt, settings.EXPORT_BATCH_ROWS),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
@@ -0,0 +1,83 @@
+"""Fixed-point arithmetic for balances, shares and prices.
+
+Hot paths carry every amount as an int number of micro-units (10^-6 PRC,
+10^-6 share, 10^-6 of a price) and convert to Decimal only when writing ORM
+attributes or building API responses. Rounding happens in one place, with an
+explicit mode, so trade, order book and resolution code agree to the cent.
+"""
+
+from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_EVEN, Decimal
+
+SCALE = 1_000_000  # micro-units per unit (1 PRC, 1 share, price 1.0)
+CENT = SCALE // 100  # grid of Numeric(*, 2) money columns
+PRICE_TICK = SCALE // 10_000  # grid of Numeric(8, 4) price columns
+BPS = 10_000  # basis points per unit
+
+
+def mul_div(
+    value: int,
+    num: int,
+    den: int,
+    step: int = 1,
+    rounding: str = ROUND_HALF_EVEN,
+) -> int:
+    """value * num / den, rounded to a multiple of `step` micro-units.
+
+    `den` and `step` must be positive.
+    """
+    d = den * step
+    q, r = divmod(value * num, d)
+    if r:
+        if rounding == ROUND_CEILING:
+            q += 1
+        elif rounding == ROUND_HALF_EVEN:
+            twice = 2 * r
+            if twice > d or (twice == d and q % 2):
+                q += 1
+        elif rounding != ROUND_FLOOR:
+            raise ValueError(f"Unsupported rounding: {rounding}")
+    return q * step
+
+
+def to_micros(
+    value: Decimal | int, step: int = 1, rounding: str = ROUND_HALF_EVEN
+) -> int:
+    """Decimal (ORM/API value) → micro-units on a `step` grid."""
+    scaled = Decimal(value).scaleb(6)
+    if step != 1:
+        scaled /= step
+    return int(scaled.to_integral_value(rounding)) * step
+
+
+def to_decimal(micros: int, places: int = 6) -> Decimal:
+    """Micro-units → Decimal with `places` decimals.
+
+    `micros` must already sit on the 10^-places grid (use mul_div with
+    step=CENT / PRICE_TICK first).
+    """
+    return Decimal(micros // 10 ** (6 - places)).scaleb(-places)
+
+
+def float_to_micros(
+    value: float, step: int = 1, rounding: str = ROUND_HALF_EVEN
+) -> int:
+    """AMM kernel output (float) → micro-units on a `step` grid."""
+    scaled = value * SCALE / step
+    if rounding == ROUND_FLOOR:
+        q = int(scaled // 1)
+    elif rounding == ROUND_CEILING:
+        q = -int(-scaled // 1)
+    else:
+        q = round(scaled)
+    return q * step
+
+
+def micros_to_float(micros: int) -> float:
+    """Micro-units → float for the AMM kernel or a JSON response."""
+    return micros / SCALE
+
+
+def float_to_decimal(value: float, places: int) -> Decimal:
+    """Round an AMM float straight to a Decimal column value."""
+    step = 10 ** (6 - places)
+    return to_decimal(float_to_micros(value, step), places)
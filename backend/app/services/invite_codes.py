@@ -0,0 +1,65 @@
+"""Collision-free invite codes for private bets.
+
+Code number n (from the private_bet_code_seq sequence) is pushed through a
+keyed permutation and spelled in a 32-letter alphabet without look-alikes.
+Distinct numbers give distinct codes, neighbours look unrelated, and a code
+costs one nextval() instead of check-and-retry reads.
+
+The first 32**6 codes have 6 letters; after that codes grow a letter at a
+time (the next 32**7 have 7, and so on).
+"""
+
+import hashlib
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.private_bet import invite_code_seq
+
+ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+MIN_LENGTH = 6
+ROUNDS = 4
+
+
+def _feistel(n: int, half: int, key: bytes) -> int:
+    mask = (1 << half) - 1
+    left, right = n >> half, n & mask
+    for i in range(ROUNDS):
+        digest = hashlib.blake2b(
+            right.to_bytes(8, "big"), key=key, digest_size=8, salt=bytes([i]) * 16
+        ).digest()
+        left, right = right, left ^ (int.from_bytes(digest, "big") & mask)
+    return (left << half) | right
+
+
+def _permute(n: int, bits: int, key: bytes) -> int:
+    """Keyed bijection on [0, 2**bits).
+
+    A balanced Feistel network needs an even width; for odd `bits` it runs
+    on one bit more and cycle-walks until the value is back in range.
+    """
+    half = (bits + 1) // 2
+    while True:
+        n = _feistel(n, half, key)
+        if n < 1 << bits:
+            return n
+
+
+def encode(n: int, key: str = settings.INVITE_CODE_KEY) -> str:
+    """The invite code of code number `n` (n >= 0)."""
+    length = MIN_LENGTH
+    while n >= len(ALPHABET) ** length:
+        n -= len(ALPHABET) ** length
+        length += 1
+    value = _permute(n, 5 * length, hashlib.sha256(key.encode()).digest())
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+async def allocate(db: AsyncSession) -> str:
+    """Next unused invite code."""
+    return encode(await db.scalar(select(invite_code_seq.next_value())))
@@ -0,0 +1,294 @@
+"""Double-entry journal behind users.balance and users.reserved_balance.
+
+Every balance change is an entry of legs that sum to zero. User legs are
+applied to the cached columns as they are posted, so users.balance is
+available + reserved for the user's two accounts and the reconciler can
+check it against the journal.
+
+Balances are read as the latest snapshot plus the postings after it;
+snapshots are taken periodically so that tail stays short.
+"""
+
+import logging
+import uuid
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import NamedTuple
+
+from sqlalchemy import (
+    FromClause,
+    Select,
+    String,
+    case,
+    column,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    values,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.ledger import LedgerPosting, LedgerSnapshot
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+USER_BOOKS = ("available", "reserved")
+
+
+class Leg(NamedTuple):
+    account: str
+    amount: Decimal
+    # Applied to the user's cached balance columns when posted
+    user: User | None = None
+    reserved: bool = False
+
+
+def _cents(amount: Decimal | int | float) -> Decimal:
+    if isinstance(amount, float):
+        amount = str(amount)
+    return Decimal(amount).quantize(CENTS, ROUND_HALF_UP)
+
+
+def user_account(user_id: uuid.UUID, book: str) -> str:
+    return f"user:{user_id}:{book}"
+
+
+def available(user: User, amount: Decimal | int | float) -> Leg:
+    """Leg on the user's spendable cash, balance - reserved_balance."""
+    return Leg(user_account(user.id, "available"), _cents(amount), user)
+
+
+def reserved(user: User, amount: Decimal | int | float) -> Leg:
+    """Leg on the cash locked by the user's open buy orders."""
+    return Leg(user_account(user.id, "reserved"), _cents(amount), user, True)
+
+
+def house(name: str, amount: Decimal | int | float) -> Leg:
+    """Leg on a platform account (amm, clob, fees, bets, bonus, deposits, ...)."""
+    return Leg(f"house:{name}", _cents(amount))
+
+
+def _rows(kind: str, legs: Iterable[Leg], market_id: uuid.UUID | None) -> list[dict]:
+    legs = [leg for leg in legs if leg.amount]
+    if sum(leg.amount for leg in legs) != 0:
+        raise ValueError(f"Unbalanced {kind} entry: {legs}")
+    entry_id = uuid.uuid4()
+    return [
+        {
+            "entry_id": entry_id,
+            "account": leg.account,
+            "kind": kind,
+            "amount": leg.amount,
+            "market_id": market_id,
+        }
+        for leg in legs
+    ]
+
+
+def _with_journal(accounts: FromClause, at: datetime | None = None) -> Select:
+    """`accounts` rows plus a `journal` column: the balance of their `account`.
+
+    Latest snapshot taken by `at` (or ever) plus the postings after it,
+    each an index range scan on (account, id).
+    """
+    snap = select(LedgerSnapshot.balance, LedgerSnapshot.last_posting_id).where(
+        LedgerSnapshot.account == accounts.c.account
+    )
+    if at is not None:
+        snap = snap.where(LedgerSnapshot.as_of <= at)
+    snap = snap.order_by(LedgerSnapshot.last_posting_id.desc()).limit(1).lateral("snap")
+
+    tail = select(
+        func.coalesce(func.sum(LedgerPosting.amount), 0).label("amount")
+    ).where(
+        LedgerPosting.account == accounts.c.account,
+        LedgerPosting.id > func.coalesce(snap.c.last_posting_id, 0),
+    )
+    if at is not None:
+        tail = tail.where(LedgerPosting.created_at <= at)
+    tail = tail.lateral("tail")
+
+    return (
+        select(
+            *accounts.c,
+            (func.coalesce(snap.c.balance, 0) + tail.c.amount).label("journal"),
+        )
+        .select_from(accounts)
+        .outerjoin(snap, true())
+        .join(tail, true())
+    )
+
+
+class LedgerService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def post(self, kind: str, *legs: Leg, market_id: uuid.UUID | None = None) -> None:
+        """Journal one balanced entry and apply its user legs. Caller commits.
+
+        Zero legs are dropped; raises ValueError if the rest do not sum to 0.
+        """
+        rows = _rows(kind, legs, market_id)
+        self.db.add_all(LedgerPosting(**row) for row in rows)
+        for leg in legs:
+            if leg.user is None:
+                continue
+            leg.user.balance += leg.amount
+            if leg.reserved:
+                leg.user.reserved_balance += leg.amount
+
+    async def record(
+        self,
+        kind: str,
+        entries: Iterable[Sequence[Leg]],
+        market_id: uuid.UUID | None = None,
+    ) -> None:
+        """Journal many entries in one INSERT without touching users.
+
+        For bulk paths that update the balance columns with SQL themselves.
+        """
+        rows = [row for legs in entries for row in _rows(kind, legs, market_id)]
+        if rows:
+            await self.db.execute(insert(LedgerPosting), rows)
+
+    def open_account(self, user: User) -> None:
+        """Credit a new user's signup balance from the house."""
+        user.balance = Decimal("0")
+        user.reserved_balance = Decimal("0")
+        self.post(
+            "signup",
+            available(user, settings.SIGNUP_BONUS),
+            house("signup", -settings.SIGNUP_BONUS),
+        )
+
+    async def balances(
+        self, accounts: Sequence[str], at: datetime | None = None
+    ) -> dict[str, Decimal]:
+        """Journal balance of each account, now or as of `at`."""
+        if not accounts:
+            return {}
+        rows = values(column("account", String), name="accounts").data(
+            [(a,) for a in accounts]
+        )
+        result = await self.db.execute(_with_journal(rows, at))
+        return {account: journal for account, journal in result.all()}
+
+    async def snapshot(self, lag: timedelta) -> int:
+        """Snapshot every account with postings since the last run.
+
+        Covers postings up to the newest one made more than `lag` ago, so
+        transactions still in flight (much shorter than `lag`) cannot commit
+        a posting below the cutoff afterwards. Accounts without new postings
+        keep their previous snapshot. Returns the number of accounts
+        snapshotted. Caller commits.
+        """
+        prev = await self.db.scalar(select(func.max(LedgerSnapshot.last_posting_id)))
+        prev = prev or 0
+        cutoff = await self.db.scalar(
+            select(func.max(LedgerPosting.id)).where(
+                LedgerPosting.id > prev,
+                LedgerPosting.created_at < datetime.now(timezone.utc) - lag,
+            )
+        )
+        if cutoff is None:
+            return 0
+
+        moved = (
+            select(
+                LedgerPosting.account,
+                func.sum(LedgerPosting.amount).label("amount"),
+                func.max(LedgerPosting.created_at).label("as_of"),
+            )
+            .where(LedgerPosting.id > prev, LedgerPosting.id <= cutoff)
+            .group_by(LedgerPosting.account)
+            .subquery()
+        )
+        last = (
+            select(LedgerSnapshot.balance, LedgerSnapshot.as_of)
+            .where(LedgerSnapshot.account == moved.c.account)
+            .order_by(LedgerSnapshot.last_posting_id.desc())
+            .limit(1)
+            .lateral()
+        )
+        result = await self.db.execute(
+            insert(LedgerSnapshot)
+            .from_select(
+                ["account", "last_posting_id", "balance", "as_of"],
+                select(
+                    moved.c.account,
+                    literal(cutoff),
+                    func.coalesce(last.c.balance, 0) + moved.c.amount,
+                    # GREATEST skips the NULL of a first snapshot
+                    func.greatest(moved.c.as_of, last.c.as_of),
+                )
+                .select_from(moved)
+                .outerjoin(last, true()),
+            )
+            .returning(LedgerSnapshot.account)
+        )
+        return len(result.all())
+
+    async def reconcile(self, batch_size: int) -> list[dict]:
+        """Check every user's balance columns against the journal.
+
+        Each batch of `batch_size` users is compared in one statement, so
+        the columns and the journal are read from the same snapshot.
+        Mismatches are logged and returned; nothing is corrected.
+        """
+        mismatches = []
+        last_id = None
+        books = values(column("book", String), name="books").data(
+            [(book,) for book in USER_BOOKS]
+        )
+        while True:
+            batch = select(User.id, User.balance, User.reserved_balance)
+            if last_id is not None:
+                batch = batch.where(User.id > last_id)
+            batch = batch.order_by(User.id).limit(batch_size).subquery()
+            accounts = (
+                select(
+                    batch.c.id.label("user_id"),
+                    books.c.book,
+                    case(
+                        (
+                            books.c.book == "available",
+                            batch.c.balance - batch.c.reserved_balance,
+                        ),
+                        else_=batch.c.reserved_balance,
+                    ).label("cached"),
+                    func.concat("user:", batch.c.id, ":", books.c.book).label(
+                        "account"
+                    ),
+                )
+                .select_from(batch)
+                .join(books, true())
+                .subquery()
+            )
+            result = await self.db.execute(
+                _with_journal(accounts).order_by(accounts.c.user_id)
+            )
+            rows = result.all()
+            if not rows:
+                return mismatches
+
+            for row in rows:
+                if row.cached != row.journal:
+                    logger.warning(
+                        f"Balance mismatch: {row.account} "
+                        f"cached={row.cached} journal={row.journal}"
+                    )
+                    mismatches.append(
+                        {
+                            "user_id": row.user_id,
+                            "book": row.book,
+                            "cached": row.cached,
+                            "journal": row.journal,
+                        }
+                    )
+            last_id = rows[-1].user_id
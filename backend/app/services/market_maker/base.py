@@ -10,6 +10,13 @@ class MarketState:
     liquidity_b: Decimal
 
 
+@dataclass
+class MultiOutcomeState:
+    outcomes: list[str]
+    q: list[Decimal]
+    liquidity_b: Decimal
+
+
 class MarketMaker(Protocol):
     def get_price(self, state: MarketState, outcome: str) -> float:
         """Get current price for an outcome (0.0 to 1.0)."""
@@ -1,13 +1,58 @@
-from app.services.market_maker.base import MarketMaker
+from app.core.config import settings
+from app.models.market import Market
+from app.services.market_maker.base import MarketMaker, MarketState, MultiOutcomeState
 from app.services.market_maker.lmsr import LMSRMarketMaker
+from app.services.market_maker.lmsr_multi import MultiOutcomeLMSRMarketMaker
+from app.services.market_maker.ls_lmsr import LiquiditySensitiveLMSRMarketMaker
 
 _makers: dict[str, MarketMaker] = {
     "lmsr": LMSRMarketMaker(),
+    "lmsr_multi": MultiOutcomeLMSRMarketMaker(),
+    "ls_lmsr": LiquiditySensitiveLMSRMarketMaker(alpha=settings.LS_LMSR_ALPHA),
 }
 
+MULTI_OUTCOME_TYPES = frozenset({"lmsr_multi"})
+
 
 def get_market_maker(amm_type: str = "lmsr") -> MarketMaker:
     maker = _makers.get(amm_type)
     if maker is None:
         raise ValueError(f"Unknown AMM type: {amm_type}")
     return maker
+
+
+def get_market_state(market: Market) -> MarketState | MultiOutcomeState:
+    """Build the pricing state a market's AMM expects."""
+    if market.amm_type in MULTI_OUTCOME_TYPES:
+        return MultiOutcomeState(
+            outcomes=list(market.outcomes or []),
+            q=list(market.q_outcomes or []),
+            liquidity_b=market.liquidity_b,
+        )
+    return MarketState(
+        q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
+    )
+
+
+def get_market_prices(market: Market) -> tuple[float, float, list[float] | None]:
+    """Return (price_yes, price_no, per-outcome prices) rounded for display.
+
+    Multi-outcome markets report their first outcome as price_yes so binary
+    clients keep working; the full vector is the third element.
+    """
+    if market.amm_type == "clob":
+        price_yes = (
+            float(market.last_trade_price_yes) if market.last_trade_price_yes else 0.5
+        )
+        return price_yes, round(1.0 - price_yes, 4), None
+
+    mm = get_market_maker(market.amm_type)
+    state = get_market_state(market)
+    if market.amm_type in MULTI_OUTCOME_TYPES:
+        prices = [round(p, 4) for p in mm.get_prices(state)]
+        return prices[0], round(1.0 - prices[0], 4), prices
+    return (
+        round(mm.get_price(state, "yes"), 4),
+        round(mm.get_price(state, "no"), 4),
+        None,
+    )
@@ -0,0 +1,77 @@
+import math
+from collections.abc import Sequence
+
+from app.services.market_maker.base import MultiOutcomeState
+
+
+def _logsumexp(values: Sequence[float]) -> float:
+    """Numerically stable log(sum(exp(v))) over a whole vector."""
+    max_val = max(values)
+    return max_val + math.log(math.fsum(math.exp(v - max_val) for v in values))
+
+
+class MultiOutcomeLMSRMarketMaker:
+    """N-outcome Logarithmic Market Scoring Rule market maker.
+
+    Cost function: C(q) = b * ln(sum_i e^(q_i/b))
+    Price of outcome i is the softmax of q/b. Share inversion uses the
+    closed form x = b * ln(1 + (e^(amount/b) - 1) / p_i) instead of a search.
+    """
+
+    def _vector(self, state: MultiOutcomeState) -> tuple[list[float], float]:
+        b = float(state.liquidity_b)
+        return [float(q) / b for q in state.q], b
+
+    def _index(self, state: MultiOutcomeState, outcome: str) -> int:
+        try:
+            return state.outcomes.index(outcome)
+        except ValueError:
+            raise ValueError(f"Unknown outcome: {outcome}") from None
+
+    def _cost(self, scaled: Sequence[float], b: float) -> float:
+        """C(q) = b * logsumexp(q/b)"""
+        return b * _logsumexp(scaled)
+
+    def get_prices(self, state: MultiOutcomeState) -> list[float]:
+        """Softmax over all outcomes in one pass."""
+        scaled, _ = self._vector(state)
+        lse = _logsumexp(scaled)
+        return [math.exp(x - lse) for x in scaled]
+
+    def get_price(self, state: MultiOutcomeState, outcome: str) -> float:
+        """P(i) = e^(q_i/b) / sum_j e^(q_j/b)"""
+        i = self._index(state, outcome)
+        scaled, _ = self._vector(state)
+        return math.exp(scaled[i] - _logsumexp(scaled))
+
+    def get_cost(self, state: MultiOutcomeState, outcome: str, shares: float) -> float:
+        """Cost to buy `shares` of outcome = C(q_after) - C(q_before)."""
+        i = self._index(state, outcome)
+        scaled, b = self._vector(state)
+        cost_before = self._cost(scaled, b)
+        scaled[i] += shares / b
+        return self._cost(scaled, b) - cost_before
+
+    def get_shares_for_amount(
+        self, state: MultiOutcomeState, outcome: str, amount: float
+    ) -> float:
+        """Closed-form inverse of get_cost for outcome i."""
+        if amount <= 0:
+            return 0.0
+
+        i = self._index(state, outcome)
+        scaled, b = self._vector(state)
+        log_p = scaled[i] - _logsumexp(scaled)
+        t = amount / b
+        # b * ln(1 + (e^t - 1) / p), rewritten to stay finite for large t
+        return b * (t + math.log1p(math.expm1(log_p) * math.exp(-t)) - log_p)
+
+    def get_sale_revenue(
+        self, state: MultiOutcomeState, outcome: str, shares: float
+    ) -> float:
+        """Revenue from selling = C(q_before) - C(q_after)."""
+        i = self._index(state, outcome)
+        scaled, b = self._vector(state)
+        cost_before = self._cost(scaled, b)
+        scaled[i] -= shares / b
+        return cost_before - self._cost(scaled, b)
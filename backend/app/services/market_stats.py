@@ -0,0 +1,145 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.market import Market
+from app.models.market_stats import MarketStats, MarketStatsHourly
+from app.models.position import Position
+
+CACHE_TTL = 60  # seconds; bounds how stale the rolling 24h volume can get
+
+
+def _hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+class MarketStatsService:
+    """Incremental market_stats projection, read through a Redis cache."""
+
+    def __init__(self, db: AsyncSession, redis: Redis):
+        self.db = db
+        self.redis = redis
+
+    async def record(
+        self,
+        market_id: uuid.UUID,
+        *,
+        buys: int = 0,
+        buy_volume: Decimal = Decimal("0"),
+        sells: int = 0,
+        sell_volume: Decimal = Decimal("0"),
+        fees: Decimal = Decimal("0"),
+        new_traders: int = 0,
+    ) -> None:
+        """Add one trade or fill to the projection. Caller commits.
+
+        Both upserts only add to existing rows, so concurrent trades on the
+        same market never overwrite each other's totals.
+        """
+        stmt = insert(MarketStats).values(
+            market_id=market_id,
+            buy_count=buys,
+            buy_volume=buy_volume,
+            sell_count=sells,
+            sell_volume=sell_volume,
+            fees=fees,
+            unique_traders=new_traders,
+        )
+        row = MarketStats.__table__.c
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[row.market_id],
+                set_={
+                    "buy_count": row.buy_count + stmt.excluded.buy_count,
+                    "buy_volume": row.buy_volume + stmt.excluded.buy_volume,
+                    "sell_count": row.sell_count + stmt.excluded.sell_count,
+                    "sell_volume": row.sell_volume + stmt.excluded.sell_volume,
+                    "fees": row.fees + stmt.excluded.fees,
+                    "unique_traders": row.unique_traders + stmt.excluded.unique_traders,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+        volume = buy_volume + sell_volume
+        if volume:
+            stmt = insert(MarketStatsHourly).values(
+                market_id=market_id,
+                hour=_hour(datetime.now(timezone.utc)),
+                volume=volume,
+            )
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["market_id", "hour"],
+                    set_={"volume": MarketStatsHourly.volume + stmt.excluded.volume},
+                )
+            )
+
+    async def is_new_trader(self, user_id: uuid.UUID, market_id: uuid.UUID) -> bool:
+        """True if the user holds no position row in the market yet."""
+        held = await self.db.scalar(
+            select(
+                exists().where(
+                    Position.user_id == user_id, Position.market_id == market_id
+                )
+            )
+        )
+        return not held
+
+    async def get(self, market_id: uuid.UUID) -> dict:
+        cache_key = f"market_stats:{market_id}"
+        cached = await self.redis.get(cache_key)
+        if cached:
+            return json.loads(cached)
+
+        total_volume = await self.db.scalar(
+            select(Market.total_volume).where(Market.id == market_id)
+        )
+        if total_volume is None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
+
+        row = await self.db.get(MarketStats, market_id) or MarketStats(
+            buy_count=0,
+            buy_volume=Decimal("0"),
+            sell_count=0,
+            sell_volume=Decimal("0"),
+            fees=Decimal("0"),
+            unique_traders=0,
+        )
+        since = _hour(datetime.now(timezone.utc)) - timedelta(hours=23)
+        volume_24h = await self.db.scalar(
+            select(func.sum(MarketStatsHourly.volume)).where(
+                MarketStatsHourly.market_id == market_id,
+                MarketStatsHourly.hour >= since,
+            )
+        )
+
+        stats = {
+            "market_id": str(market_id),
+            "unique_traders": row.unique_traders,
+            "total_volume": float(total_volume),
+            "volume_24h": float(volume_24h or 0),
+            "fees": float(row.fees),
+            "buy_stats": {"count": row.buy_count, "volume": float(row.buy_volume)},
+            "sell_stats": {"count": row.sell_count, "volume": float(row.sell_volume)},
+        }
+        await self.redis.setex(cache_key, CACHE_TTL, json.dumps(stats))
+        return stats
+
+    async def invalidate(self, market_id: uuid.UUID) -> None:
+        await self.redis.delete(f"market_stats:{market_id}")
+
+    async def prune_hourly(self, before: datetime) -> int:
+        """Drop hourly buckets too old to matter for the rolling window."""
+        result = await self.db.execute(
+            delete(MarketStatsHourly).where(MarketStatsHourly.hour < before)
+        )
+        await self.db.commit()
+        return result.rowcount
@@ -1,19 +1,72 @@
 import json
 import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
 from decimal import Decimal
+from typing import NamedTuple
 
 from fastapi import HTTPException, status
 from redis.asyncio import Redis
-from sqlalchemy import select
+from sqlalchemy import (
+    Integer,
+    Numeric,
+    String,
+    column,
+    func,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.models.archive import archive_table, with_archive
 from app.models.market import Market, MarketStatus
-from app.models.order import Order, OrderIntent, OrderSide, OrderStatus
+from app.models.order import (
+    ACTIVE_STATUSES,
+    Order,
+    OrderIntent,
+    OrderSide,
+    OrderStatus,
+    TimeInForce,
+    is_open,
+)
 from app.models.position import Position
 from app.models.trade_fill import SettlementType, TradeFill
 from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
+from app.services.fixed_point import (
+    BPS,
+    CENT,
+    PRICE_TICK,
+    ROUND_CEILING,
+    SCALE,
+    micros_to_float,
+    mul_div,
+    to_decimal,
+    to_micros,
+)
+from app.services.ledger import (
+    LedgerService,
+    Leg,
+    available,
+    house,
+    reserved,
+    user_account,
+)
+from app.services.market_stats import MarketStatsService
+from app.services.portfolio import PortfolioService
+from app.services.user_stats import UserStatsService, position_delta
+
+
+class NewOrder(NamedTuple):
+    intent: OrderIntent
+    price: Decimal
+    quantity: Decimal
+    time_in_force: TimeInForce = TimeInForce.GTC
+    expires_at: datetime | None = None
 
 
 def _translate_intent(intent: OrderIntent) -> tuple[OrderSide, Decimal]:
@@ -34,11 +87,129 @@ def _translate_intent(intent: OrderIntent) -> tuple[OrderSide, Decimal]:
     raise ValueError(f"Unknown intent: {intent}")
 
 
+def _value_u(price_u: int, qty_u: int) -> int:
+    """PRC value of `qty_u` shares at `price_u`, on the cent grid."""
+    return mul_div(price_u, qty_u, SCALE, CENT)
+
+
+def _reserve_u(price_u: int, qty_u: int) -> int:
+    """PRC reserved for a buy intent of `qty_u` shares at `price_u`.
+
+    Rounded up so the reservation always covers the cost. Fills release
+    _reserve_u(filled_after) - _reserve_u(filled_before), which telescopes to
+    exactly the amount reserved at placement.
+    """
+    return mul_div(price_u, qty_u, SCALE, CENT, ROUND_CEILING)
+
+
+def _intent_price_u(order: Order) -> int:
+    """Price of the order in terms of its original intent (YES or NO price)."""
+    book_price_u = to_micros(order.price)
+    if order.original_intent in (OrderIntent.BUY_NO, OrderIntent.SELL_NO):
+        return SCALE - book_price_u
+    return book_price_u
+
+
+def _release_u(order: Order, qty_u: int) -> int:
+    """PRC reservation freed by filling or cancelling `qty_u` of a buy order."""
+    price_u = _intent_price_u(order)
+    filled_u = to_micros(order.filled_quantity)
+    return _reserve_u(price_u, filled_u + qty_u) - _reserve_u(price_u, filled_u)
+
+
+def _is_live():
+    """Order has not passed its GTT expiry (the sweeper may not have run yet)."""
+    return or_(Order.expires_at.is_(None), Order.expires_at > func.now())
+
+
+def _resting_filter(
+    market_id: uuid.UUID,
+    side: OrderSide,
+    book_price: Decimal,
+    user_id: uuid.UUID | None,
+) -> tuple[list, tuple]:
+    """WHERE clauses and priority ordering for orders an incoming order can hit.
+
+    Orders of `user_id` are left out (no self-trade); None keeps every order.
+    """
+    if side == OrderSide.BUY:
+        # Find sell orders with price <= incoming price (cheapest first, then oldest)
+        opposite, crosses = OrderSide.SELL, Order.price <= book_price
+        priority = (Order.price.asc(), Order.created_at.asc())
+    else:
+        # Find buy orders with price >= incoming price (highest first, then oldest)
+        opposite, crosses = OrderSide.BUY, Order.price >= book_price
+        priority = (Order.price.desc(), Order.created_at.asc())
+    clauses = [
+        Order.market_id == market_id,
+        Order.side == opposite,
+        is_open(),
+        crosses,
+        _is_live(),
+    ]
+    if user_id is not None:
+        clauses.append(Order.user_id != user_id)  # No self-trade
+    return clauses, priority
+
+
+def _resting_orders_query(
+    market_id: uuid.UUID,
+    side: OrderSide,
+    book_price: Decimal,
+    user_id: uuid.UUID,
+):
+    """Resting orders to match, locked, in price-time priority.
+
+    Served by the partial ix_orders_open_book index.
+    """
+    clauses, priority = _resting_filter(market_id, side, book_price, user_id)
+    return select(Order).where(*clauses).order_by(*priority).with_for_update()
+
+
+def _book_side_query(market_id: uuid.UUID, side: OrderSide):
+    """Live resting quantity on one side of the book (index-only scan)."""
+    return select(Order.price, Order.quantity, Order.filled_quantity).where(
+        Order.market_id == market_id,
+        Order.side == side,
+        is_open(),
+        _is_live(),
+    )
+
+
+def _credit_position(position: Position, qty_u: int, cost_u: int) -> dict:
+    """Add bought or minted shares; returns the user_stats position deltas."""
+    held = (position.shares, position.total_cost)
+    shares_u = to_micros(position.shares) + qty_u
+    total_cost_u = to_micros(position.total_cost) + cost_u
+    position.shares = to_decimal(shares_u)
+    position.total_cost = to_decimal(total_cost_u, 2)
+    if shares_u > 0:
+        position.avg_price = to_decimal(
+            mul_div(total_cost_u, SCALE, shares_u, PRICE_TICK), 4
+        )
+    return position_delta(position, *held)
+
+
+def _debit_position(position: Position, qty_u: int) -> dict:
+    """Remove reserved shares that were sold, burned or transferred; returns
+    the user_stats position deltas."""
+    held = (position.shares, position.total_cost)
+    position.reserved_shares = to_decimal(to_micros(position.reserved_shares) - qty_u)
+    position.shares = to_decimal(to_micros(position.shares) - qty_u)
+    return position_delta(position, *held)
+
+
 class OrderBookService:
     def __init__(self, db: AsyncSession, redis: Redis):
         self.db = db
         self.redis = redis
-        self.fee_percent = Decimal(str(settings.TRADE_FEE_PERCENT)) / Decimal("100")
+        self.fee_bps = round(settings.TRADE_FEE_PERCENT * 100)
+        self.ledger = LedgerService(db)
+        self.stats = MarketStatsService(db, redis)
+        self.user_stats = UserStatsService(db)
+        self.portfolio = PortfolioService(db, redis)
+        # Users whose positions changed in this transaction, for _invalidate
+        self._filled_users: set[uuid.UUID] = set()
 
     async def place_order(
         self,
@@ -47,23 +218,76 @@ class OrderBookService:
         intent: OrderIntent,
         price: Decimal,
         quantity: Decimal,
+        time_in_force: TimeInForce = TimeInForce.GTC,
+        expires_at: datetime | None = None,
     ) -> dict:
-        # Validate price range
-        if price < Decimal("0.01") or price > Decimal("0.99"):
+        market = await self._lock_market(market_id)
+        user = await self._lock_user(user_id)
+
+        result = await self._open_order(
+            user,
+            market,
+            NewOrder(intent, price, quantity, time_in_force, expires_at),
+        )
+
+        await self.db.commit()
+        await self._invalidate(market_id)
+        return result
+
+    async def place_orders(
+        self,
+        user_id: uuid.UUID,
+        market_id: uuid.UUID,
+        orders: list[NewOrder],
+    ) -> dict:
+        """Place a batch of orders on one market.
+
+        The market and user are locked once; the whole batch is committed in
+        one transaction, so any rejected order rolls back the others.
+        """
+        self._check_batch_size(len(orders))
+        market = await self._lock_market(market_id)
+        user = await self._lock_user(user_id)
+
+        results = [await self._open_order(user, market, o) for o in orders]
+
+        await self.db.commit()
+        await self._invalidate(market_id)
+        return {"orders": results}
+
+    async def replace_orders(
+        self,
+        user_id: uuid.UUID,
+        market_id: uuid.UUID,
+        orders: list[NewOrder],
+    ) -> dict:
+        """Atomically swap the user's open orders on a market for a new ladder.
+
+        Reserves from the cancelled orders are released before the new orders
+        are placed, so the new ladder can reuse the same collateral.
+        """
+        self._check_batch_size(len(orders))
+        market = await self._lock_market(market_id)
+        user = await self._lock_user(user_id)
+
+        open_orders = await self._lock_user_orders(user_id, market_id=market_id)
+        cancelled = [await self._cancel_open_order(o, user) for o in open_orders]
+        market.open_order_count -= len(cancelled)
+
+        results = [await self._open_order(user, market, o) for o in orders]
+
+        await self.db.commit()
+        await self._invalidate(market_id)
+        return {"cancelled": cancelled, "orders": results}
+
+    def _check_batch_size(self, size: int) -> None:
+        if size > settings.ORDER_BATCH_MAX:
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST,
-                "Price must be between 0.01 and 0.99",
-            )
-        if quantity <= 0:
-            raise HTTPException(
-                status.HTTP_400_BAD_REQUEST, "Quantity must be positive"
+                f"At most {settings.ORDER_BATCH_MAX} orders per batch",
             )
 
-        # Translate intent to book side + book price
-        side, invert = _translate_intent(intent)
-        book_price = (Decimal("1") - price) if invert else price
-
-        # Lock market
+    async def _lock_market(self, market_id: uuid.UUID) -> Market:
         market = await self.db.get(Market, market_id, with_for_update=True)
         if market is None:
             raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
@@ -74,47 +298,141 @@ class OrderBookService:
                 status.HTTP_400_BAD_REQUEST,
                 "This market uses LMSR, use /trade/buy instead",
             )
+        return market
+
+    async def _lock_markets(
+        self, market_ids: set[uuid.UUID]
+    ) -> dict[uuid.UUID, Market]:
+        """Lock markets in id order, whatever their status.
 
-        # Lock user
+        Markets are always locked before users and orders (as placement
+        does), so cancels and fills on the same market cannot deadlock.
+        """
+        result = await self.db.execute(
+            select(Market)
+            .where(Market.id.in_(market_ids))
+            .order_by(Market.id)
+            .with_for_update()
+        )
+        return {market.id: market for market in result.scalars().all()}
+
+    async def _lock_user(self, user_id: uuid.UUID) -> User:
         user = await self.db.get(User, user_id, with_for_update=True)
         if user is None:
             raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+        return user
+
+    async def _invalidate(self, *market_ids: uuid.UUID) -> None:
+        for market_id in market_ids:
+            await self.redis.delete(f"orderbook:{market_id}")
+            await self.redis.delete(f"market:{market_id}")
+            await self.stats.invalidate(market_id)
+        await self.portfolio.invalidate(*self._filled_users)
+        self._filled_users.clear()
+
+    async def _open_order(self, user: User, market: Market, new: NewOrder) -> dict:
+        """Reserve collateral, insert and match one order. Caller holds locks.
+
+        IOC and FOK orders never leave a resting row: an IOC remainder is
+        cancelled in the same transaction, and an FOK order that cannot fill
+        in full is rejected before anything is written.
+        """
+        intent, price, quantity, time_in_force, expires_at = new
+        # Validate price range
+        if price < Decimal("0.01") or price > Decimal("0.99"):
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                "Price must be between 0.01 and 0.99",
+            )
+        if quantity <= 0:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, "Quantity must be positive"
+            )
+
+        if time_in_force == TimeInForce.GTT:
+            if expires_at is None or expires_at <= datetime.now(expires_at.tzinfo):
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    "GTT orders need a future expires_at",
+                )
+        elif expires_at is not None:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, "expires_at is only valid for GTT orders"
+            )
+
+        # Translate intent to book side + book price
+        side, invert = _translate_intent(intent)
+        book_price = (Decimal("1") - price) if invert else price
+
+        quantity_u = to_micros(quantity)
+
+        if time_in_force == TimeInForce.POST_ONLY:
+            # The user's own orders count too: a post-only order never rests crossed
+            if await self._crossable_u(None, market.id, side, book_price):
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    "Post-only order would cross the book",
+                )
+        elif time_in_force in (TimeInForce.IOC, TimeInForce.FOK):
+            crossable_u = await self._crossable_u(user.id, market.id, side, book_price)
+            if time_in_force == TimeInForce.FOK and crossable_u < quantity_u:
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    "FOK order cannot be filled in full",
+                )
+            if time_in_force == TimeInForce.IOC and crossable_u == 0:
+                return {
+                    "order_id": None,
+                    "status": OrderStatus.CANCELLED.value,
+                    "filled_quantity": 0.0,
+                    "remaining": micros_to_float(quantity_u),
+                    "fills_count": 0,
+                }
 
         # Reserve collateral
         if intent in (OrderIntent.BUY_YES, OrderIntent.BUY_NO):
             # Reserve PRC: price × quantity for the intent price
-            reserve_prc = price * quantity
-            available = user.balance - user.reserved_balance
-            if available < reserve_prc:
+            reserve_u = _reserve_u(to_micros(price), quantity_u)
+            available_u = to_micros(user.balance) - to_micros(user.reserved_balance)
+            if available_u < reserve_u:
                 raise HTTPException(status.HTTP_400_BAD_REQUEST, "Insufficient balance")
-            user.reserved_balance += reserve_prc
+            reserve = to_decimal(reserve_u, 2)
+            self.ledger.post(
+                "order_reserve",
+                available(user, -reserve),
+                reserved(user, reserve),
+                market_id=market.id,
+            )
         elif intent == OrderIntent.SELL_YES:
             # Reserve YES shares
-            position = await self._get_or_create_position(user_id, market_id, "yes")
+            position = await self._get_or_create_position(user.id, market.id, "yes")
             available_shares = position.shares - position.reserved_shares
             if available_shares < quantity:
                 raise HTTPException(
                     status.HTTP_400_BAD_REQUEST, "Insufficient YES shares"
                 )
-            position.reserved_shares += quantity
+            position.reserved_shares += to_decimal(quantity_u)
         elif intent == OrderIntent.SELL_NO:
             # Reserve NO shares
-            position = await self._get_or_create_position(user_id, market_id, "no")
+            position = await self._get_or_create_position(user.id, market.id, "no")
             available_shares = position.shares - position.reserved_shares
             if available_shares < quantity:
                 raise HTTPException(
                     status.HTTP_400_BAD_REQUEST, "Insufficient NO shares"
                 )
-            position.reserved_shares += quantity
+            position.reserved_shares += to_decimal(quantity_u)
 
         # Create order
         order = Order(
-            user_id=user_id,
-            market_id=market_id,
+            user_id=user.id,
+            market_id=market.id,
             side=side,
             price=book_price,
-            quantity=quantity,
+            quantity=to_decimal(quantity_u),
+            filled_quantity=Decimal("0"),
             original_intent=intent,
+            time_in_force=time_in_force,
+            expires_at=expires_at,
         )
         self.db.add(order)
         await self.db.flush()
@@ -122,69 +440,51 @@ class OrderBookService:
         # Match
         fills = await self._match_order(order, market)
 
-        await self.db.commit()
-
-        # Invalidate cache
-        await self.redis.delete(f"orderbook:{market_id}")
-        await self.redis.delete(f"market:{market_id}")
+        # Cancel whatever an IOC order could not fill
+        if time_in_force in (TimeInForce.IOC, TimeInForce.FOK) and (
+            order.status in ACTIVE_STATUSES
+        ):
+            await self._cancel_open_order(order, user)
+        if order.status in ACTIVE_STATUSES:
+            market.open_order_count += 1
 
+        filled_u = to_micros(order.filled_quantity)
         return {
             "order_id": str(order.id),
             "status": order.status.value,
-            "filled_quantity": float(order.filled_quantity),
-            "remaining": float(order.quantity - order.filled_quantity),
+            "filled_quantity": micros_to_float(filled_u),
+            "remaining": micros_to_float(quantity_u - filled_u),
             "fills_count": len(fills),
         }
 
     async def _match_order(self, incoming: Order, market: Market) -> list[TradeFill]:
         fills: list[TradeFill] = []
 
-        if incoming.side == OrderSide.BUY:
-            # Find sell orders with price <= incoming price (cheapest first, then oldest)
-            result = await self.db.execute(
-                select(Order)
-                .where(
-                    Order.market_id == incoming.market_id,
-                    Order.side == OrderSide.SELL,
-                    Order.status.in_([OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED]),
-                    Order.price <= incoming.price,
-                    Order.user_id != incoming.user_id,  # No self-trade
-                )
-                .order_by(Order.price.asc(), Order.created_at.asc())
-                .with_for_update()
-            )
-        else:
-            # Find buy orders with price >= incoming price (highest first, then oldest)
-            result = await self.db.execute(
-                select(Order)
-                .where(
-                    Order.market_id == incoming.market_id,
-                    Order.side == OrderSide.BUY,
-                    Order.status.in_([OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED]),
-                    Order.price >= incoming.price,
-                    Order.user_id != incoming.user_id,
-                )
-                .order_by(Order.price.desc(), Order.created_at.asc())
-                .with_for_update()
+        result = await self.db.execute(
+            _resting_orders_query(
+                incoming.market_id, incoming.side, incoming.price, incoming.user_id
             )
+        )
 
         resting_orders = result.scalars().all()
-        remaining = incoming.quantity - incoming.filled_quantity
+        remaining_u = to_micros(incoming.quantity) - to_micros(incoming.filled_quantity)
 
         for resting in resting_orders:
-            if remaining <= 0:
+            if remaining_u <= 0:
                 break
 
-            resting_remaining = resting.quantity - resting.filled_quantity
-            fill_qty = min(remaining, resting_remaining)
+            resting_remaining_u = to_micros(resting.quantity) - to_micros(
+                resting.filled_quantity
+            )
+            fill_qty_u = min(remaining_u, resting_remaining_u)
             # Price: resting order's price (price-time priority — resting was first)
-            fill_price = resting.price
-
             fill = await self._execute_fill(
-                incoming, resting, fill_price, fill_qty, market
+                incoming, resting, resting.price, fill_qty_u, market
             )
             fills.append(fill)
-            remaining -= fill_qty
+            remaining_u -= fill_qty_u
+            if resting.status == OrderStatus.FILLED:
+                market.open_order_count -= 1
 
         # Update incoming order status
         if incoming.filled_quantity >= incoming.quantity:
@@ -194,12 +494,26 @@ class OrderBookService:
 
         return fills
 
+    async def _crossable_u(
+        self,
+        user_id: uuid.UUID | None,
+        market_id: uuid.UUID,
+        side: OrderSide,
+        book_price: Decimal,
+    ) -> int:
+        """Resting quantity an order at `book_price` would match right now."""
+        clauses, _ = _resting_filter(market_id, side, book_price, user_id)
+        total = await self.db.scalar(
+            select(func.sum(Order.quantity - Order.filled_quantity)).where(*clauses)
+        )
+        return to_micros(total or 0)
+
     async def _execute_fill(
         self,
         buy_order: Order,
         sell_order: Order,
         price: Decimal,
-        qty: Decimal,
+        qty_u: int,
         market: Market,
     ) -> TradeFill:
         # Determine which is actually the buy and sell on the book
@@ -211,9 +525,11 @@ class OrderBookService:
         sell_intent = sell_order.original_intent
         settlement = self._determine_settlement(buy_intent, sell_intent)
 
+        # All amounts below are integer micro-units on the cent grid
+        price_u = to_micros(price)
+        value_u = _value_u(price_u, qty_u)
         # Calculate fee (split between both sides)
-        total_value = price * qty
-        fee = (total_value * self.fee_percent).quantize(Decimal("0.01"))
+        fee_u = mul_div(value_u, self.fee_bps, BPS, CENT)
 
         # Load users
         buyer = await self.db.get(User, buy_order.user_id, with_for_update=True)
@@ -229,97 +545,117 @@ class OrderBookService:
                 # sell_order=BUY_NO (book SELL). Economic roles are inverted:
                 # SELL_NO user (buyer var) is the economic seller of NO shares,
                 # BUY_NO user (seller var) is the economic buyer of NO shares.
-                cost = (Decimal("1") - price) * qty  # NO price
+                cost_u = _value_u(SCALE - price_u, qty_u)  # NO price
 
                 # BUY_NO user (seller var) pays PRC
                 # Release reservation based on order price, not fill price
-                no_buyer_reserve = (Decimal("1") - sell_order.price) * qty
-                seller.reserved_balance -= no_buyer_reserve
-                seller.balance -= cost
-                # SELL_NO user (buyer var) receives PRC minus fee
-                buyer.balance += cost - fee
+                release_u = _release_u(sell_order, qty_u)
+                self.ledger.post(
+                    "fill",
+                    reserved(seller, to_decimal(-release_u, 2)),
+                    available(seller, to_decimal(release_u - cost_u, 2)),
+                    # SELL_NO user (buyer var) receives PRC minus fee
+                    available(buyer, to_decimal(cost_u - fee_u, 2)),
+                    house("fees", to_decimal(fee_u, 2)),
+                    market_id=market.id,
+                )
+
+                buy_flow_u, buy_fee_u = cost_u - fee_u, fee_u
+                sell_flow_u, sell_fee_u = -cost_u, 0
 
                 # Move NO shares: SELL_NO (buy_order) → BUY_NO (sell_order)
                 from_pos = await self._get_or_create_position(
                     buy_order.user_id, market.id, "no"
                 )
-                from_pos.reserved_shares -= qty
-                from_pos.shares -= qty
+                buy_pos_delta = _debit_position(from_pos, qty_u)
 
                 to_pos = await self._get_or_create_position(
                     sell_order.user_id, market.id, "no"
                 )
-                to_pos.shares += qty
-                to_pos.total_cost += cost
-                if to_pos.shares > 0:
-                    to_pos.avg_price = to_pos.total_cost / to_pos.shares
+                sell_pos_delta = _credit_position(to_pos, qty_u, cost_u)
             else:
                 # YES share transfer: BUY_YES (buy_order) buys, SELL_YES (sell_order) sells
-                cost = price * qty
+                cost_u = value_u
 
                 # Release reservation based on order price (handles price improvement)
-                buyer_reserve = buy_order.price * qty
-                buyer.reserved_balance -= buyer_reserve
-                buyer.balance -= cost
-                seller.balance += cost - fee
+                release_u = _release_u(buy_order, qty_u)
+                self.ledger.post(
+                    "fill",
+                    reserved(buyer, to_decimal(-release_u, 2)),
+                    available(buyer, to_decimal(release_u - cost_u, 2)),
+                    available(seller, to_decimal(cost_u - fee_u, 2)),
+                    house("fees", to_decimal(fee_u, 2)),
+                    market_id=market.id,
+                )
+
+                buy_flow_u, buy_fee_u = -cost_u, 0
+                sell_flow_u, sell_fee_u = cost_u - fee_u, fee_u
 
                 # Move YES shares from seller to buyer
                 seller_pos = await self._get_or_create_position(
                     sell_order.user_id, market.id, "yes"
                 )
-                seller_pos.reserved_shares -= qty
-                seller_pos.shares -= qty
+                sell_pos_delta = _debit_position(seller_pos, qty_u)
 
                 buyer_pos = await self._get_or_create_position(
                     buy_order.user_id, market.id, "yes"
                 )
-                buyer_pos.shares += qty
-                buyer_pos.total_cost += cost
-                if buyer_pos.shares > 0:
-                    buyer_pos.avg_price = buyer_pos.total_cost / buyer_pos.shares
+                buy_pos_delta = _credit_position(buyer_pos, qty_u, cost_u)
 
         elif settlement == SettlementType.MINT:
             # BUY_YES (buy_order) + BUY_NO (sell_order, book SELL): mint YES+NO pair
-            buyer_cost = price * qty
-            seller_cost = (Decimal("1") - price) * qty
+            total_deposited_u = mul_div(qty_u, 1, 1, CENT)  # = qty PRC
+            buyer_cost_u = value_u
+            seller_cost_u = total_deposited_u - buyer_cost_u
 
-            total_deposited = buyer_cost + seller_cost  # = qty PRC
-            fee = (total_deposited * self.fee_percent).quantize(Decimal("0.01"))
-            half_fee = (fee / 2).quantize(Decimal("0.01"))
+            fee_u = mul_div(total_deposited_u, self.fee_bps, BPS, CENT)
+            half_fee_u = mul_div(fee_u, 1, 2, CENT)
 
             # Release reservations based on order prices (handles price improvement)
-            buyer_reserve = buy_order.price * qty
-            seller_reserve = (Decimal("1") - sell_order.price) * qty
-            buyer.reserved_balance -= buyer_reserve
-            buyer.balance -= buyer_cost + half_fee
-            seller.reserved_balance -= seller_reserve
-            seller.balance -= seller_cost + (fee - half_fee)
+            # Collateral for the minted pair goes to the CLOB pool
+            buyer_release_u = _release_u(buy_order, qty_u)
+            seller_release_u = _release_u(sell_order, qty_u)
+            self.ledger.post(
+                "fill",
+                reserved(buyer, to_decimal(-buyer_release_u, 2)),
+                available(
+                    buyer, to_decimal(buyer_release_u - buyer_cost_u - half_fee_u, 2)
+                ),
+                reserved(seller, to_decimal(-seller_release_u, 2)),
+                available(
+                    seller,
+                    to_decimal(
+                        seller_release_u - seller_cost_u - (fee_u - half_fee_u), 2
+                    ),
+                ),
+                house("clob", to_decimal(total_deposited_u, 2)),
+                house("fees", to_decimal(fee_u, 2)),
+                market_id=market.id,
+            )
+
+            buy_fee_u, sell_fee_u = half_fee_u, fee_u - half_fee_u
+            buy_flow_u = -(buyer_cost_u + buy_fee_u)
+            sell_flow_u = -(seller_cost_u + sell_fee_u)
 
             # Mint YES shares for BUY_YES user
             buyer_pos = await self._get_or_create_position(
                 buy_order.user_id, market.id, "yes"
             )
-            buyer_pos.shares += qty
-            buyer_pos.total_cost += buyer_cost + half_fee
-            if buyer_pos.shares > 0:
-                buyer_pos.avg_price = buyer_pos.total_cost / buyer_pos.shares
+            buy_pos_delta = _credit_position(buyer_pos, qty_u, -buy_flow_u)
 
             # Mint NO shares for BUY_NO user
             seller_pos = await self._get_or_create_position(
                 sell_order.user_id, market.id, "no"
             )
-            seller_pos.shares += qty
-            seller_pos.total_cost += seller_cost + (fee - half_fee)
-            if seller_pos.shares > 0:
-                seller_pos.avg_price = seller_pos.total_cost / seller_pos.shares
+            sell_pos_delta = _credit_position(seller_pos, qty_u, -sell_flow_u)
 
         elif settlement == SettlementType.BURN:
             # sell_yes + sell_no: burn YES+NO pair, return PRC
             # Seller of YES gets price * qty, seller of NO gets (1-price) * qty
-            yes_revenue = price * qty
-            no_revenue = (Decimal("1") - price) * qty
-            total_returned = yes_revenue + no_revenue
-            fee = (total_returned * self.fee_percent).quantize(Decimal("0.01"))
+            total_returned_u = mul_div(qty_u, 1, 1, CENT)
+            yes_revenue_u = value_u
+            no_revenue_u = total_returned_u - yes_revenue_u
+            fee_u = mul_div(total_returned_u, self.fee_bps, BPS, CENT)
 
             # The buy order on the book is actually sell_no (translated)
             # sell_order on the book is sell_yes
@@ -327,22 +663,32 @@ class OrderBookService:
             sell_yes_pos = await self._get_or_create_position(
                 sell_order.user_id, market.id, "yes"
             )
-            sell_yes_pos.reserved_shares -= qty
-            sell_yes_pos.shares -= qty
+            sell_pos_delta = _debit_position(sell_yes_pos, qty_u)
 
             # Remove NO shares from sell_no user (= buy side on book)
             sell_no_pos = await self._get_or_create_position(
                 buy_order.user_id, market.id, "no"
             )
-            sell_no_pos.reserved_shares -= qty
-            sell_no_pos.shares -= qty
-
-            # Return PRC minus fee
-            half_fee = (fee / 2).quantize(Decimal("0.01"))
-            seller.balance += yes_revenue - half_fee
-            buyer.balance += no_revenue - (fee - half_fee)
+            buy_pos_delta = _debit_position(sell_no_pos, qty_u)
+
+            # Return PRC minus fee from the CLOB pool
+            half_fee_u = mul_div(fee_u, 1, 2, CENT)
+            sell_flow_u, sell_fee_u = yes_revenue_u - half_fee_u, half_fee_u
+            buy_flow_u, buy_fee_u = (
+                no_revenue_u - (fee_u - half_fee_u),
+                fee_u - half_fee_u,
+            )
+            self.ledger.post(
+                "fill",
+                available(seller, to_decimal(sell_flow_u, 2)),
+                available(buyer, to_decimal(buy_flow_u, 2)),
+                house("clob", to_decimal(-total_returned_u, 2)),
+                house("fees", to_decimal(fee_u, 2)),
+                market_id=market.id,
+            )
 
         # Update filled quantities
+        qty = to_decimal(qty_u)
         buy_order.filled_quantity += qty
         sell_order.filled_quantity += qty
 
@@ -357,12 +703,22 @@ class OrderBookService:
             sell_order.status = OrderStatus.PARTIALLY_FILLED
 
         # Update market stats
+        value = to_decimal(value_u, 2)
         market.last_trade_price_yes = price
-        market.total_volume += price * qty
+        market.total_volume += value
+        await self.stats.record(
+            market.id,
+            buys=1,
+            buy_volume=value,
+            sells=1,
+            sell_volume=value,
+            fees=to_decimal(fee_u, 2),
+        )
 
         # Update trader counts
         buyer.total_trades += 1
         seller.total_trades += 1
+        self._filled_users.update((buy_order.user_id, sell_order.user_id))
 
         # Record TradeFill
         fill = TradeFill(
@@ -373,43 +729,70 @@ class OrderBookService:
             seller_id=sell_order.user_id,
             price=price,
             quantity=qty,
-            fee=fee,
+            fee=to_decimal(fee_u, 2),
             settlement_type=settlement,
         )
         self.db.add(fill)
 
-        # Record transactions — outcome reflects user's original intent
-        buy_outcome = (
-            "no" if buy_intent in (OrderIntent.BUY_NO, OrderIntent.SELL_NO) else "yes"
-        )
-        sell_outcome = (
-            "no" if sell_intent in (OrderIntent.BUY_NO, OrderIntent.SELL_NO) else "yes"
-        )
+        # Record each side's own cash flow, whichever side of the book it is
+        for order, flow_u, side_fee_u, pos_delta in (
+            (buy_order, buy_flow_u, buy_fee_u, buy_pos_delta),
+            (sell_order, sell_flow_u, sell_fee_u, sell_pos_delta),
+        ):
+            await self._record_fill_side(
+                order, price, qty, flow_u, side_fee_u, pos_delta
+            )
 
-        buy_tx = Transaction(
-            user_id=buy_order.user_id,
-            market_id=market.id,
-            type=TransactionType.ORDER_FILL,
-            amount=-(price * qty),
-            shares=qty,
-            outcome=buy_outcome,
-            price_at_trade=price,
-            description=f"Order fill: {buy_order.original_intent.value} @ {price}",
+        return fill
+
+    async def _record_fill_side(
+        self,
+        order: Order,
+        price: Decimal,
+        qty: Decimal,
+        flow_u: int,
+        fee_u: int,
+        pos_delta: dict,
+    ) -> None:
+        """Journal one user's side of a fill in transactions and user_stats.
+
+        `flow_u` is the cash the user received (positive) or paid (negative),
+        net of their `fee_u` share, as for AMM buys and sells.
+        """
+        intent = order.original_intent
+        flow, fee = to_decimal(flow_u, 2), to_decimal(fee_u, 2)
+        self.db.add(
+            Transaction(
+                user_id=order.user_id,
+                market_id=order.market_id,
+                type=TransactionType.ORDER_FILL,
+                amount=flow,
+                shares=qty,
+                # Outcome reflects the user's original intent
+                outcome="no"
+                if intent in (OrderIntent.BUY_NO, OrderIntent.SELL_NO)
+                else "yes",
+                price_at_trade=price,
+                description=f"Order fill: {intent.value} @ {price}",
+            )
         )
-        sell_tx = Transaction(
-            user_id=sell_order.user_id,
-            market_id=market.id,
-            type=TransactionType.ORDER_FILL,
-            amount=price * qty,
-            shares=qty,
-            outcome=sell_outcome,
-            price_at_trade=price,
-            description=f"Order fill: {sell_order.original_intent.value} @ {price}",
+        if fee_u > 0:
+            self.db.add(
+                Transaction(
+                    user_id=order.user_id,
+                    market_id=order.market_id,
+                    type=TransactionType.FEE,
+                    amount=-fee,
+                    description=f"Trading fee {settings.TRADE_FEE_PERCENT}%",
+                )
+            )
+        if flow_u < 0:
+            amounts = {"fill_bought": -flow}
+        else:
+            amounts = {"fill_sold": flow}
+        await self.user_stats.record(
+            order.user_id, fills=1, fees=fee, **amounts, **pos_delta
         )
-        self.db.add(buy_tx)
-        self.db.add(sell_tx)
-
-        return fill
 
     def _determine_settlement(
         self, buy_intent: OrderIntent, sell_intent: OrderIntent
@@ -430,41 +813,122 @@ class OrderBookService:
         return SettlementType.MINT
 
     async def cancel_order(self, user_id: uuid.UUID, order_id: uuid.UUID) -> dict:
-        order = await self.db.get(Order, order_id, with_for_update=True)
-        if order is None:
+        market_id = await self.db.scalar(
+            select(Order.market_id).where(Order.id == order_id)
+        )
+        if market_id is None:
             raise HTTPException(status.HTTP_404_NOT_FOUND, "Order not found")
+        markets = await self._lock_markets({market_id})
+        order = await self.db.get(Order, order_id, with_for_update=True)
         if order.user_id != user_id:
             raise HTTPException(status.HTTP_403_FORBIDDEN, "Not your order")
-        if order.status in (OrderStatus.FILLED, OrderStatus.CANCELLED):
+        if order.status not in ACTIVE_STATUSES:
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST, "Order cannot be cancelled"
             )
 
+        user = await self.db.get(User, user_id, with_for_update=True)
+        result = await self._cancel_open_order(order, user)
+        markets[market_id].open_order_count -= 1
+
+        await self.db.commit()
+        await self._invalidate(order.market_id)
+
+        return result
+
+    async def cancel_orders(
+        self,
+        user_id: uuid.UUID,
+        order_ids: list[uuid.UUID] | None = None,
+        market_id: uuid.UUID | None = None,
+        side: OrderSide | None = None,
+    ) -> dict:
+        """Cancel the user's open orders matching every given filter.
+
+        Ids that are not the user's open orders are skipped, so retrying a
+        batch cancel is harmless.
+        """
+        if order_ids is None and market_id is None:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST, "Specify order_ids or market_id"
+            )
+        if order_ids is not None:
+            self._check_batch_size(len(order_ids))
+
+        if market_id is not None:
+            market_ids = {market_id}
+        else:
+            market_ids = set(
+                await self.db.scalars(
+                    select(Order.market_id).where(
+                        Order.id.in_(order_ids), Order.user_id == user_id
+                    )
+                )
+            )
+        markets = await self._lock_markets(market_ids)
+        user = await self._lock_user(user_id)
+        orders = await self._lock_user_orders(user_id, order_ids, market_id, side)
+        cancelled = [await self._cancel_open_order(o, user) for o in orders]
+        for order in orders:
+            markets[order.market_id].open_order_count -= 1
+
+        await self.db.commit()
+        await self._invalidate(*{o.market_id for o in orders})
+
+        return {"cancelled": cancelled}
+
+    async def _lock_user_orders(
+        self,
+        user_id: uuid.UUID,
+        order_ids: list[uuid.UUID] | None = None,
+        market_id: uuid.UUID | None = None,
+        side: OrderSide | None = None,
+    ) -> list[Order]:
+        query = select(Order).where(
+            Order.user_id == user_id,
+            is_open(),
+        )
+        if order_ids is not None:
+            query = query.where(Order.id.in_(order_ids))
+        if market_id:
+            query = query.where(Order.market_id == market_id)
+        if side:
+            query = query.where(Order.side == side)
+
+        # Lock in a stable order so concurrent batches cannot deadlock
+        result = await self.db.execute(query.order_by(Order.id).with_for_update())
+        return list(result.scalars().all())
+
+    async def _cancel_open_order(self, order: Order, user: User) -> dict:
+        """Cancel one order and release its reserves. Caller holds locks."""
         unfilled = order.quantity - order.filled_quantity
-        order.status = OrderStatus.CANCELLED
 
         # Release reserves
-        user = await self.db.get(User, user_id, with_for_update=True)
-
         if order.original_intent in (OrderIntent.BUY_YES, OrderIntent.BUY_NO):
             # Release PRC reserve (intent price × unfilled qty)
-            intent_price = order.price
-            if order.original_intent == OrderIntent.BUY_NO:
-                intent_price = Decimal("1") - order.price
-            reserve_release = intent_price * unfilled
-            user.reserved_balance = max(
-                Decimal("0"), user.reserved_balance - reserve_release
+            reserve_release = to_decimal(_release_u(order, to_micros(unfilled)), 2)
+            self.ledger.post(
+                "order_release",
+                reserved(user, -reserve_release),
+                available(user, reserve_release),
+                market_id=order.market_id,
             )
         elif order.original_intent == OrderIntent.SELL_YES:
-            pos = await self._get_or_create_position(user_id, order.market_id, "yes")
+            pos = await self._get_or_create_position(
+                order.user_id, order.market_id, "yes"
+            )
             pos.reserved_shares = max(Decimal("0"), pos.reserved_shares - unfilled)
         elif order.original_intent == OrderIntent.SELL_NO:
-            pos = await self._get_or_create_position(user_id, order.market_id, "no")
+            pos = await self._get_or_create_position(
+                order.user_id, order.market_id, "no"
+            )
             pos.reserved_shares = max(Decimal("0"), pos.reserved_shares - unfilled)
 
+        order.status = OrderStatus.CANCELLED
+
         # Record cancel transaction
         tx = Transaction(
-            user_id=user_id,
+            user_id=order.user_id,
             market_id=order.market_id,
             type=TransactionType.ORDER_CANCEL,
             amount=Decimal("0"),
@@ -472,9 +936,6 @@ class OrderBookService:
         )
         self.db.add(tx)
 
-        await self.db.commit()
-        await self.redis.delete(f"orderbook:{order.market_id}")
-
         return {
             "order_id": str(order.id),
             "cancelled_quantity": float(unfilled),
@@ -486,7 +947,7 @@ class OrderBookService:
             select(Order)
             .where(
                 Order.market_id == market_id,
-                Order.status.in_([OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED]),
+                is_open(),
             )
             .with_for_update()
         )
@@ -500,11 +961,12 @@ class OrderBookService:
             user = await self.db.get(User, order.user_id, with_for_update=True)
 
             if order.original_intent in (OrderIntent.BUY_YES, OrderIntent.BUY_NO):
-                intent_price = order.price
-                if order.original_intent == OrderIntent.BUY_NO:
-                    intent_price = Decimal("1") - order.price
-                user.reserved_balance = max(
-                    Decimal("0"), user.reserved_balance - intent_price * unfilled
+                reserve_release = to_decimal(_release_u(order, to_micros(unfilled)), 2)
+                self.ledger.post(
+                    "order_release",
+                    reserved(user, -reserve_release),
+                    available(user, reserve_release),
+                    market_id=market_id,
                 )
             elif order.original_intent == OrderIntent.SELL_YES:
                 pos = await self._get_or_create_position(
@@ -517,8 +979,146 @@ class OrderBookService:
 
             count += 1
 
+        await self.db.execute(
+            update(Market).where(Market.id == market_id).values(open_order_count=0)
+        )
         return count
 
+    async def expire_orders(self, now: datetime, limit: int) -> int:
+        """Expire up to `limit` GTT orders past expires_at and release reserves.
+
+        Orders are claimed with SKIP LOCKED so the sweeper never waits on a
+        matching transaction; reserves are released with one UPDATE per table.
+        Returns the number of orders expired.
+        """
+        due = (Order.expires_at <= now, is_open())
+        # Markets first, as everywhere else; busy ones wait for the next sweep
+        market_ids = (
+            await self.db.scalars(
+                select(Market.id)
+                .where(Market.id.in_(select(Order.market_id).where(*due)))
+                .order_by(Market.id)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not market_ids:
+            await self.db.rollback()
+            return 0
+        claimed = (
+            select(Order.id)
+            .where(*due, Order.market_id.in_(market_ids))
+            .order_by(Order.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            update(Order)
+            .where(Order.id.in_(claimed))
+            .values(status=OrderStatus.EXPIRED)
+            .returning(
+                Order.user_id,
+                Order.market_id,
+                Order.original_intent,
+                Order.price,
+                Order.quantity,
+                Order.filled_quantity,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        if not rows:
+            await self.db.rollback()
+            return 0
+
+        expired = Counter(row.market_id for row in rows)
+        v = values(
+            column("market_id", UUID(as_uuid=True)),
+            column("n", Integer),
+            name="expired",
+        ).data(sorted(expired.items()))
+        await self.db.execute(
+            update(Market)
+            .where(Market.id == v.c.market_id)
+            .values(open_order_count=Market.open_order_count - v.c.n)
+            .execution_options(synchronize_session=False)
+        )
+
+        balance_release: dict[uuid.UUID, int] = defaultdict(int)
+        share_release: dict[tuple[uuid.UUID, uuid.UUID, str], int] = defaultdict(int)
+        for user_id, market_id, intent, price, quantity, filled in rows:
+            unfilled_u = to_micros(quantity) - to_micros(filled)
+            if intent in (OrderIntent.BUY_YES, OrderIntent.BUY_NO):
+                price_u = to_micros(price)
+                if intent == OrderIntent.BUY_NO:
+                    price_u = SCALE - price_u
+                filled_u = to_micros(filled)
+                balance_release[user_id] += _reserve_u(
+                    price_u, filled_u + unfilled_u
+                ) - _reserve_u(price_u, filled_u)
+            else:
+                outcome = "yes" if intent == OrderIntent.SELL_YES else "no"
+                share_release[(user_id, market_id, outcome)] += unfilled_u
+
+        if balance_release:
+            releases = [
+                (user_id, to_decimal(a, 2))
+                for user_id, a in sorted(balance_release.items())
+            ]
+            await self.ledger.record(
+                "order_expiry",
+                (
+                    (
+                        Leg(user_account(user_id, "reserved"), -amount),
+                        Leg(user_account(user_id, "available"), amount),
+                    )
+                    for user_id, amount in releases
+                ),
+            )
+            # An UPDATE ... FROM locks rows in join order; take them by id first
+            await self.db.execute(
+                select(User.id)
+                .where(User.id.in_([user_id for user_id, _ in releases]))
+                .order_by(User.id)
+                .with_for_update()
+            )
+            v = values(
+                column("user_id", UUID(as_uuid=True)),
+                column("amount", Numeric(16, 2)),
+                name="release",
+            ).data(releases)
+            await self.db.execute(
+                update(User)
+                .where(User.id == v.c.user_id)
+                .values(reserved_balance=User.reserved_balance - v.c.amount)
+                .execution_options(synchronize_session=False)
+            )
+
+        if share_release:
+            v = values(
+                column("user_id", UUID(as_uuid=True)),
+                column("market_id", UUID(as_uuid=True)),
+                column("outcome", String(100)),
+                column("qty", Numeric(16, 6)),
+                name="release",
+            ).data([(*k, to_decimal(q)) for k, q in sorted(share_release.items())])
+            await self.db.execute(
+                update(Position)
+                .where(
+                    Position.user_id == v.c.user_id,
+                    Position.market_id == v.c.market_id,
+                    Position.outcome == v.c.outcome,
+                )
+                .values(
+                    reserved_shares=func.greatest(0, Position.reserved_shares - v.c.qty)
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+        await self.db.commit()
+        await self._invalidate(*expired)
+        return len(rows)
+
     async def get_order_book(self, market_id: uuid.UUID) -> dict:
         """Get aggregated order book (bids/asks by price level)."""
         # Try cache first (1 second TTL)
@@ -528,43 +1128,37 @@ class OrderBookService:
             return json.loads(cached)
 
         # Bids (BUY side) — highest price first
-        bid_result = await self.db.execute(
-            select(Order.price, Order.quantity, Order.filled_quantity).where(
-                Order.market_id == market_id,
-                Order.side == OrderSide.BUY,
-                Order.status.in_([OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED]),
-            )
-        )
+        bid_result = await self.db.execute(_book_side_query(market_id, OrderSide.BUY))
         bids_raw = bid_result.all()
 
         # Asks (SELL side) — lowest price first
-        ask_result = await self.db.execute(
-            select(Order.price, Order.quantity, Order.filled_quantity).where(
-                Order.market_id == market_id,
-                Order.side == OrderSide.SELL,
-                Order.status.in_([OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED]),
-            )
-        )
+        ask_result = await self.db.execute(_book_side_query(market_id, OrderSide.SELL))
         asks_raw = ask_result.all()
 
-        # Aggregate by price level
-        bid_levels: dict[str, float] = {}
+        # Aggregate by price level in integer micro-units
+        bid_levels: dict[str, int] = {}
         for price, qty, filled in bids_raw:
             key = str(price)
-            bid_levels[key] = bid_levels.get(key, 0) + float(qty - filled)
+            bid_levels[key] = bid_levels.get(key, 0) + to_micros(qty - filled)
 
-        ask_levels: dict[str, float] = {}
+        ask_levels: dict[str, int] = {}
         for price, qty, filled in asks_raw:
             key = str(price)
-            ask_levels[key] = ask_levels.get(key, 0) + float(qty - filled)
+            ask_levels[key] = ask_levels.get(key, 0) + to_micros(qty - filled)
 
         bids = sorted(
-            [{"price": float(k), "quantity": v} for k, v in bid_levels.items()],
+            [
+                {"price": float(k), "quantity": micros_to_float(v)}
+                for k, v in bid_levels.items()
+            ],
             key=lambda x: x["price"],
             reverse=True,
         )
         asks = sorted(
-            [{"price": float(k), "quantity": v} for k, v in ask_levels.items()],
+            [
+                {"price": float(k), "quantity": micros_to_float(v)}
+                for k, v in ask_levels.items()
+            ],
             key=lambda x: x["price"],
         )
 
@@ -586,18 +1180,26 @@ class OrderBookService:
         market_id: uuid.UUID | None = None,
         active_only: bool = True,
     ) -> list[dict]:
-        query = select(Order).where(Order.user_id == user_id)
+        def where(t):
+            clause = t.c.user_id == user_id
+            if market_id:
+                clause &= t.c.market_id == market_id
+            return clause
 
-        if market_id:
-            query = query.where(Order.market_id == market_id)
         if active_only:
-            query = query.where(
-                Order.status.in_([OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED])
+            # Archived markets never have live orders
+            orders = Order.__table__
+            query = select(orders).where(
+                where(orders),
+                orders.c.status.in_(ACTIVE_STATUSES),
             )
+        else:
+            orders = with_archive(Order, where)
+            query = select(orders)
 
-        query = query.order_by(Order.created_at.desc())
+        query = query.order_by(orders.c.created_at.desc())
         result = await self.db.execute(query)
-        orders = result.scalars().all()
+        orders = result.all()
 
         return [
             {
@@ -609,19 +1211,25 @@ class OrderBookService:
                 "filled_quantity": float(o.filled_quantity),
                 "status": o.status.value,
                 "original_intent": o.original_intent.value,
+                "time_in_force": o.time_in_force.value,
+                "expires_at": o.expires_at.isoformat() if o.expires_at else None,
                 "created_at": o.created_at.isoformat(),
             }
             for o in orders
         ]
 
     async def get_trades(self, market_id: uuid.UUID, limit: int = 50) -> list[dict]:
+        archived_at = await self.db.scalar(
+            select(Market.archived_at).where(Market.id == market_id)
+        )
+        trade_fills = archive_table(TradeFill) if archived_at else TradeFill.__table__
         result = await self.db.execute(
-            select(TradeFill)
-            .where(TradeFill.market_id == market_id)
-            .order_by(TradeFill.created_at.desc())
+            select(trade_fills)
+            .where(trade_fills.c.market_id == market_id)
+            .order_by(trade_fills.c.created_at.desc())
             .limit(limit)
         )
-        fills = result.scalars().all()
+        fills = result.all()
         return [
             {
                 "id": str(f.id),
@@ -650,6 +1258,14 @@ class OrderBookService:
         )
         position = result.scalar_one_or_none()
         if position is None:
+            if await self.stats.is_new_trader(user_id, market_id):
+                await self.stats.record(market_id, new_traders=1)
+                # Callers hold the market lock
+                await self.db.execute(
+                    update(Market)
+                    .where(Market.id == market_id)
+                    .values(total_traders=Market.total_traders + 1)
+                )
             position = Position(
                 user_id=user_id,
                 market_id=market_id,
@@ -0,0 +1,108 @@
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Tables range-partitioned by created_at month (see MonthPartitionMixin)
+PARTITIONED_TABLES = ("transactions", "price_history")
+
+
+def month_start(value: datetime, offset: int = 0) -> datetime:
+    """First instant (UTC) of the month `offset` months after `value`'s month."""
+    index = value.year * 12 + value.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+class PartitionService:
+    """Creates monthly partitions ahead of time and detaches expired ones."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def ensure_partitions(
+        self, table: str, now: datetime, months_ahead: int
+    ) -> list[str]:
+        """Make sure partitions exist from `now`'s month to `months_ahead` later.
+
+        Rows that already landed in the DEFAULT partition for a new month are
+        moved into it before it is attached. Returns the partitions created.
+        """
+        created = []
+        for offset in range(months_ahead + 1):
+            start = month_start(now, offset)
+            if await self._create_partition(table, start, month_start(start, 1)):
+                created.append(partition_name(table, start))
+        await self.db.commit()
+        return created
+
+    async def detach_before(self, table: str, cutoff: datetime) -> list[str]:
+        """Detach partitions that end on or before `cutoff`'s month.
+
+        Detached partitions stay as plain tables, so they can be exported or
+        dropped later without touching the parent.
+        """
+        limit = month_start(cutoff)
+        detached = []
+        for name, upper in await self._partition_bounds(table):
+            if upper <= limit:
+                await self.db.execute(
+                    text(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                )
+                detached.append(name)
+        await self.db.commit()
+        return detached
+
+    async def _create_partition(
+        self, table: str, start: datetime, end: datetime
+    ) -> bool:
+        name = partition_name(table, start)
+        exists = await self.db.scalar(text("SELECT to_regclass(:name)"), {"name": name})
+        if exists:
+            return False
+
+        bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        await self.db.execute(
+            text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)")
+        )
+        await self.db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {table}_default "
+                "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"start": start, "end": end},
+        )
+        # ATTACH builds the parent's indexes on the new partition
+        await self.db.execute(
+            text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}")
+        )
+        logger.info(f"Partition created: {name}")
+        return True
+
+    async def _partition_bounds(self, table: str) -> list[tuple[str, datetime]]:
+        """(name, upper bound) of each monthly partition, oldest first."""
+        result = await self.db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table ORDER BY c.relname"
+            ),
+            {"table": table},
+        )
+        bounds = []
+        for (name,) in result.all():
+            suffix = name.removeprefix(f"{table}_")
+            try:
+                month = datetime.strptime(suffix, "%Y_%m").replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue  # DEFAULT partition
+            bounds.append((name, month_start(month, 1)))
+        return bounds
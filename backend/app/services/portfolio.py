@@ -0,0 +1,159 @@
+import json
+import uuid
+from collections import defaultdict
+
+from redis.asyncio import Redis
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from app.core.config import settings
+from app.models.market import Market, MarketStatus
+from app.models.order import Order, OrderSide, is_open
+from app.models.position import Position
+from app.services.market_maker.factory import get_market_maker, get_market_state
+
+# Invalidated on the user's own trades; the TTL bounds drift from other
+# traders moving prices in between
+CACHE_TTL = 30  # seconds
+
+VALUED_STATUSES = (MarketStatus.OPEN, MarketStatus.TRADING_CLOSED)
+
+
+def _sell_into_book(levels: list[tuple[float, float]], shares: float) -> float:
+    """Revenue from selling `shares` into (price, quantity) levels, best first."""
+    revenue = 0.0
+    for price, quantity in levels:
+        take = min(shares, quantity)
+        revenue += take * price
+        shares -= take
+        if shares <= 0:
+            break
+    return revenue
+
+
+class PortfolioService:
+    """Mark-to-market valuation of a user's open positions."""
+
+    def __init__(self, db: AsyncSession, redis: Redis):
+        self.db = db
+        self.redis = redis
+        self.fee_rate = settings.TRADE_FEE_PERCENT / 100
+
+    async def get(self, user_id: uuid.UUID) -> dict:
+        cache_key = f"portfolio:{user_id}"
+        cached = await self.redis.get(cache_key)
+        if cached:
+            return json.loads(cached)
+
+        # One query for every open position together with its market's state
+        result = await self.db.execute(
+            select(Position, Market)
+            .join(Market, Market.id == Position.market_id)
+            .where(
+                Position.user_id == user_id,
+                Position.shares > 0,
+                Market.status.in_(VALUED_STATUSES),
+            )
+            .order_by(Market.closes_at)
+            .options(noload(Market.positions))
+        )
+        rows = result.all()
+
+        clob_ids = {m.id for _, m in rows if m.amm_type == "clob"}
+        bids = await self._bid_levels(user_id, clob_ids) if clob_ids else {}
+
+        positions = []
+        for position, market in rows:
+            shares = float(position.shares)
+            if market.amm_type == "clob":
+                price, liquidation = self._value_clob(
+                    market, position.outcome, shares, bids
+                )
+            else:
+                mm = get_market_maker(market.amm_type)
+                state = get_market_state(market)
+                price = mm.get_price(state, position.outcome)
+                liquidation = mm.get_sale_revenue(state, position.outcome, shares)
+
+            cost = float(position.total_cost)
+            positions.append(
+                {
+                    "market_id": str(market.id),
+                    "market_title": market.title,
+                    "market_status": market.status.value,
+                    "outcome": position.outcome,
+                    "shares": shares,
+                    "total_cost": cost,
+                    "price": round(price, 4),
+                    "value": round(shares * price, 2),
+                    "liquidation_value": round(liquidation, 2),
+                    "unrealized_pnl": round(liquidation - cost, 2),
+                }
+            )
+
+        totals = {
+            key: round(sum(p[key] for p in positions), 2)
+            for key in ("total_cost", "value", "liquidation_value", "unrealized_pnl")
+        }
+        portfolio = {"positions": positions, "totals": totals}
+        await self.redis.setex(cache_key, CACHE_TTL, json.dumps(portfolio))
+        return portfolio
+
+    async def invalidate(self, *user_ids: uuid.UUID) -> None:
+        for user_id in user_ids:
+            await self.redis.delete(f"portfolio:{user_id}")
+
+    async def _bid_levels(
+        self, user_id: uuid.UUID, market_ids: set[uuid.UUID]
+    ) -> dict[tuple[uuid.UUID, str], list[tuple[float, float]]]:
+        """Resting liquidity a holder can sell into, per (market, outcome).
+
+        YES sells hit the book's bids; NO sells hit its asks at 1 - price.
+        Levels are best first, the user's own orders excluded.
+        """
+        result = await self.db.execute(
+            select(
+                Order.market_id,
+                Order.side,
+                Order.price,
+                func.sum(Order.quantity - Order.filled_quantity),
+            )
+            .where(
+                Order.market_id.in_(market_ids),
+                is_open(),
+                or_(Order.expires_at.is_(None), Order.expires_at > func.now()),
+                Order.user_id != user_id,
+            )
+            .group_by(Order.market_id, Order.side, Order.price)
+        )
+        levels: dict[tuple[uuid.UUID, str], list[tuple[float, float]]] = defaultdict(
+            list
+        )
+        for market_id, side, price, quantity in result.all():
+            if side == OrderSide.BUY:
+                levels[market_id, "yes"].append((float(price), float(quantity)))
+            else:
+                levels[market_id, "no"].append((1 - float(price), float(quantity)))
+        for book in levels.values():
+            book.sort(reverse=True)
+        return levels
+
+    def _value_clob(
+        self,
+        market: Market,
+        outcome: str,
+        shares: float,
+        bids: dict[tuple[uuid.UUID, str], list[tuple[float, float]]],
+    ) -> tuple[float, float]:
+        """(mark price, liquidation value) of a CLOB position.
+
+        Marks at the last trade and liquidates by walking the bids, net of
+        the seller's fee.
+        """
+        last_yes = (
+            float(market.last_trade_price_yes) if market.last_trade_price_yes else 0.5
+        )
+        price = last_yes if outcome == "yes" else 1 - last_yes
+        revenue = _sell_into_book(bids.get((market.id, outcome), []), shares)
+        return price, revenue * (1 - self.fee_rate)
@@ -1,37 +1,153 @@
-import json
+import html
 import logging
-import secrets
 import uuid
+from collections import Counter, defaultdict
+from collections.abc import Sequence
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from fastapi import HTTPException, status
 from redis.asyncio import Redis
-from sqlalchemy import or_, select
+from sqlalchemy import (
+    Row,
+    String,
+    and_,
+    column,
+    func,
+    select,
+    tuple_,
+    union,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
 
 from app.core.config import settings
-from app.models.private_bet import PrivateBet, PrivateBetParticipant, PrivateBetStatus
+from app.models.private_bet import (
+    PrivateBet,
+    PrivateBetInvite,
+    PrivateBetParticipant,
+    PrivateBetStatus,
+)
 from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
+from app.services import deadlines, invite_codes
+from app.services.broadcast import Outbound, Sender
+from app.services.ledger import LedgerService, available, house
+from app.services.settlement import (
+    SettlementService,
+    invalidate_bet_caches,
+    my_bets_key,
+    vote_outcome,
+)
 
 logger = logging.getLogger(__name__)
 
-FEE_RATE = Decimal("0.02")
 MAX_CODE_RETRIES = 5
 
 
-def _generate_invite_code() -> str:
-    return secrets.token_urlsafe(4)[:6].upper()
+async def participant_ranges(
+    db: AsyncSession, bet_id: uuid.UUID, chunk: int
+) -> list[tuple[uuid.UUID | None, uuid.UUID | None]]:
+    """Split the bet's participants into (after, upto] user id ranges of `chunk`."""
+    numbered = (
+        select(
+            PrivateBetParticipant.user_id,
+            func.row_number().over(order_by=PrivateBetParticipant.user_id).label("n"),
+        )
+        .where(PrivateBetParticipant.bet_id == bet_id)
+        .subquery()
+    )
+    bounds = (
+        await db.scalars(
+            select(numbered.c.user_id)
+            .where(numbered.c.n % chunk == 0)
+            .order_by(numbered.c.user_id)
+        )
+    ).all()
+    return list(zip([None, *bounds], [*bounds, None]))
+
+
+async def send_voting_notices(
+    db: AsyncSession,
+    sender: Sender,
+    bet_id: uuid.UUID,
+    after: uuid.UUID | None,
+    upto: uuid.UUID | None,
+) -> Counter[str]:
+    """Tell participants with user ids in (after, upto] that voting started.
+
+    Each participant's delivery result is saved in voting_notice and those
+    already notified are skipped, so a retried job re-sends at most what it
+    sent before it failed. Counts by result.
+    """
+    title = await db.scalar(select(PrivateBet.title).where(PrivateBet.id == bet_id))
+    query = (
+        select(PrivateBetParticipant.user_id, User.telegram_id)
+        .join(User, User.id == PrivateBetParticipant.user_id)
+        .where(
+            PrivateBetParticipant.bet_id == bet_id,
+            PrivateBetParticipant.voting_notice.is_(None),
+        )
+        .order_by(PrivateBetParticipant.user_id)
+    )
+    if after is not None:
+        query = query.where(PrivateBetParticipant.user_id > after)
+    if upto is not None:
+        query = query.where(PrivateBetParticipant.user_id <= upto)
+    rows = (await db.execute(query)).all()
+    # Don't sit idle in a transaction while the chunk is sent
+    await db.rollback()
+    if title is None or not rows:
+        return Counter()
+
+    text = (
+        f"🗳 <b>Голосование началось!</b>\n\n"
+        f"Спор: <i>{html.escape(title)}</i>\n\n"
+        f"Нажмите кнопку и проголосуйте за реальный исход."
+    )
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="🗳 Проголосовать",
+                    web_app=WebAppInfo(url=f"{settings.WEBAPP_URL}/bet/{bet_id}"),
+                )
+            ]
+        ]
+    )
+    results = await sender.send_each(
+        Outbound(telegram_id, text, keyboard) for _, telegram_id in rows
+    )
+
+    notices = values(
+        column("user_id", UUID(as_uuid=True)),
+        column("result", String(10)),
+        name="notices",
+    ).data([(user_id, result) for (user_id, _), result in zip(rows, results)])
+    await db.execute(
+        update(PrivateBetParticipant)
+        .where(
+            PrivateBetParticipant.bet_id == bet_id,
+            PrivateBetParticipant.user_id == notices.c.user_id,
+        )
+        .values(voting_notice=notices.c.result)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return Counter(results)
 
 
 class PrivateBetService:
     def __init__(self, db: AsyncSession, redis: Redis):
         self.db = db
         self.redis = redis
+        self.ledger = LedgerService(db)
+        self.settlement = SettlementService(db)
 
     async def create_bet(
         self,
@@ -60,35 +176,18 @@ class PrivateBetService:
         if user.balance < stake_amount:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Insufficient balance")
 
-        # Generate unique invite code with retry
-        invite_code = None
-        for _ in range(MAX_CODE_RETRIES):
-            code = _generate_invite_code()
-            existing = await self.db.execute(
-                select(PrivateBet).where(PrivateBet.invite_code == code)
-            )
-            if existing.scalar_one_or_none() is None:
-                invite_code = code
-                break
-        if invite_code is None:
-            raise HTTPException(
-                status.HTTP_500_INTERNAL_SERVER_ERROR,
-                "Failed to generate unique invite code",
-            )
-
         voting_deadline = closes_at + timedelta(hours=24)
 
-        # Normalize allowed usernames: lowercase, strip @
-        usernames_json = None
+        # Normalize allowed usernames: lowercase, strip @, no duplicates
+        invited = []
         if is_closed and allowed_usernames:
-            normalized = [u.lower().lstrip("@") for u in allowed_usernames if u.strip()]
-            usernames_json = json.dumps(normalized) if normalized else None
+            normalized = (u.strip().lstrip("@").lower() for u in allowed_usernames)
+            invited = list(dict.fromkeys(u for u in normalized if u))
 
         bet = PrivateBet(
             title=title,
             description=description,
             stake_amount=stake_amount,
-            invite_code=invite_code,
             status=PrivateBetStatus.OPEN,
             created_by=user_id,
             closes_at=closes_at,
@@ -96,11 +195,21 @@ class PrivateBetService:
             total_pool=stake_amount,
             yes_count=1 if outcome == "yes" else 0,
             no_count=1 if outcome == "no" else 0,
-            is_closed=is_closed,
-            allowed_usernames=usernames_json,
+            # A closed bet without invites would be open to nobody
+            is_closed=bool(invited),
+            invites=[PrivateBetInvite(username=u) for u in invited],
         )
-        self.db.add(bet)
-        await self.db.flush()
+        # Codes are unique by construction; a clash can only be with a code
+        # from before the allocator, so just take the next one
+        for attempt in range(MAX_CODE_RETRIES):
+            bet.invite_code = await invite_codes.allocate(self.db)
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(bet)
+                break
+            except IntegrityError:
+                if attempt == MAX_CODE_RETRIES - 1:
+                    raise
 
         # Creator is the first participant
         participant = PrivateBetParticipant(
@@ -111,7 +220,9 @@ class PrivateBetService:
         self.db.add(participant)
 
         # Deduct stake
-        user.balance -= stake_amount
+        self.ledger.post(
+            "bet_stake", available(user, -stake_amount), house("bets", stake_amount)
+        )
 
         tx = Transaction(
             user_id=user_id,
@@ -123,6 +234,8 @@ class PrivateBetService:
 
         await self.db.commit()
         await self.db.refresh(bet)
+        await self.redis.delete(my_bets_key(user_id))
+        await deadlines.schedule(self.redis, deadlines.BET, bet.id, bet.closes_at)
         return bet
 
     async def join_bet(
@@ -146,13 +259,14 @@ class PrivateBetService:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Bet is no longer open")
 
         # Check closed bet whitelist
-        if bet.is_closed and bet.allowed_usernames:
+        if bet.is_closed:
             user = await self.db.get(User, user_id)
             if user is None:
                 raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
-            allowed = json.loads(bet.allowed_usernames)
-            username = (user.username or "").lower()
-            if not username or username not in allowed:
+            invited = user.username and await self.db.get(
+                PrivateBetInvite, (bet.id, user.username.lower())
+            )
+            if not invited:
                 raise HTTPException(
                     status.HTTP_403_FORBIDDEN,
                     "Этот спор только для приглашённых",
@@ -183,7 +297,11 @@ class PrivateBetService:
         )
         self.db.add(participant)
 
-        user.balance -= bet.stake_amount
+        self.ledger.post(
+            "bet_stake",
+            available(user, -bet.stake_amount),
+            house("bets", bet.stake_amount),
+        )
 
         if outcome == "yes":
             bet.yes_count += 1
@@ -201,6 +319,7 @@ class PrivateBetService:
 
         await self.db.commit()
         await self.db.refresh(bet)
+        await invalidate_bet_caches(self.db, self.redis, [bet.id])
         return bet
 
     async def start_voting(
@@ -231,61 +350,23 @@ class PrivateBetService:
 
         await self.db.commit()
         await self.db.refresh(bet)
-
-        # Notify participants in background
-        await self._notify_voting_started(bet)
+        await invalidate_bet_caches(self.db, self.redis, [bet.id])
+        await self._enqueue_voting_notices(bet.id)
 
         return bet
 
-    async def _notify_voting_started(self, bet: PrivateBet) -> None:
-        """Send Telegram notification to all participants that voting has started."""
-        if not settings.TELEGRAM_BOT_TOKEN:
-            return
-        bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
-        try:
-            result = await self.db.execute(
-                select(PrivateBetParticipant)
-                .where(PrivateBetParticipant.bet_id == bet.id)
-                .options(selectinload(PrivateBetParticipant.user))
-            )
-            participants = result.scalars().all()
+    async def _enqueue_voting_notices(self, bet_id: uuid.UUID) -> None:
+        """One notice job per chunk of participants; jobs carry only ids."""
+        from app.tasks.notifications import send_voting_notifications
 
-            text = (
-                f"🗳 <b>Голосование началось!</b>\n\n"
-                f"Спор: <i>{bet.title}</i>\n\n"
-                f"Нажмите кнопку и проголосуйте за реальный исход."
+        ranges = await participant_ranges(self.db, bet_id, settings.NOTIFY_CHUNK_USERS)
+        for after, upto in ranges:
+            await send_voting_notifications.kiq(
+                str(bet_id),
+                str(after) if after else None,
+                str(upto) if upto else None,
             )
 
-            vote_url = f"{settings.WEBAPP_URL}/bet/{bet.id}"
-            keyboard = InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            text="🗳 Проголосовать",
-                            web_app=WebAppInfo(url=vote_url),
-                        )
-                    ]
-                ]
-            )
-
-            for p in participants:
-                if p.user and p.user.telegram_id:
-                    try:
-                        await bot.send_message(
-                            p.user.telegram_id,
-                            text,
-                            parse_mode="HTML",
-                            reply_markup=keyboard,
-                        )
-                    except Exception:
-                        pass
-
-            logger.info(f"Voting notifications sent for bet {bet.id}")
-        except Exception as e:
-            logger.warning(f"Failed to send voting notifications: {e}")
-        finally:
-            await bot.session.close()
-
     async def cast_vote(
         self,
         user_id: uuid.UUID,
@@ -329,114 +410,101 @@ class PrivateBetService:
         total_participants = bet.yes_count + bet.no_count
         majority = total_participants // 2 + 1
         if bet.yes_votes >= majority or bet.no_votes >= majority:
-            await self._resolve_bet(bet)
+            await self.settlement.settle([(bet, vote_outcome(bet))])
 
         await self.db.commit()
         await self.db.refresh(bet)
+        await invalidate_bet_caches(self.db, self.redis, [bet.id])
         return bet
 
-    async def _resolve_bet(self, bet: PrivateBet) -> None:
-        """Resolve bet based on vote majority. Caller must hold FOR UPDATE lock."""
-        if bet.yes_votes > bet.no_votes:
-            winning_outcome = "yes"
-        elif bet.no_votes > bet.yes_votes:
-            winning_outcome = "no"
-        else:
-            # Tie → cancel and refund
-            await self._cancel_and_refund(bet)
-            return
-
-        bet.status = PrivateBetStatus.RESOLVED
-        bet.resolution_outcome = winning_outcome
-        bet.resolved_at = datetime.now(timezone.utc)
-
-        # Calculate payouts
-        total_pool = bet.total_pool
-        fee = (total_pool * FEE_RATE).quantize(Decimal("0.01"))
-        payout_pool = total_pool - fee
-
-        # Get winners
-        result = await self.db.execute(
-            select(PrivateBetParticipant).where(
-                PrivateBetParticipant.bet_id == bet.id,
-                PrivateBetParticipant.outcome == winning_outcome,
-            )
-        )
-        winners = result.scalars().all()
-
-        if not winners:
-            # No winners (shouldn't happen normally) → refund
-            await self._cancel_and_refund(bet)
-            return
-
-        per_winner = (payout_pool / len(winners)).quantize(Decimal("0.01"))
-
-        for winner in winners:
-            winner.payout = per_winner
-            user = await self.db.get(User, winner.user_id, with_for_update=True)
-            if user:
-                user.balance += per_winner
-                tx = Transaction(
-                    user_id=winner.user_id,
-                    type=TransactionType.BET_PAYOUT,
-                    amount=per_winner,
-                    description=f"Выигрыш в споре: {bet.title[:80]}",
-                )
-                self.db.add(tx)
-
-        logger.info(
-            f"Bet {bet.id} resolved: {winning_outcome}, "
-            f"pool={total_pool}, fee={fee}, per_winner={per_winner}"
-        )
-
-    async def _cancel_and_refund(self, bet: PrivateBet) -> None:
-        """Cancel bet and refund all participants."""
-        bet.status = PrivateBetStatus.CANCELLED
-        bet.resolved_at = datetime.now(timezone.utc)
-
-        result = await self.db.execute(
-            select(PrivateBetParticipant).where(PrivateBetParticipant.bet_id == bet.id)
-        )
-        participants = result.scalars().all()
-
-        for p in participants:
-            p.payout = bet.stake_amount
-            user = await self.db.get(User, p.user_id, with_for_update=True)
-            if user:
-                user.balance += bet.stake_amount
-                tx = Transaction(
-                    user_id=p.user_id,
-                    type=TransactionType.BET_REFUND,
-                    amount=bet.stake_amount,
-                    description=f"Возврат ставки: {bet.title[:80]}",
+    async def get_my_bets(
+        self,
+        user_id: uuid.UUID,
+        username: str | None = None,
+        cursor: str | None = None,
+        limit: int = 20,
+    ) -> tuple[list[Row], str | None]:
+        """Bets the user created, joined or (by `username`) is invited to.
+
+        Newest first, `limit` per page after the bet id `cursor`. Rows are
+        (bet, creator name, user's outcome, user's payout); participant and
+        invite lists are not loaded, the bet's counters stand in for them.
+        Returns the rows and the next page's cursor.
+        """
+        # Each branch is an index lookup; an OR across the outer join below
+        # would scan private_bets
+        branches = [
+            select(PrivateBet.id.label("bet_id")).where(
+                PrivateBet.created_by == user_id
+            ),
+            select(PrivateBetParticipant.bet_id).where(
+                PrivateBetParticipant.user_id == user_id
+            ),
+        ]
+        if username:
+            branches.append(
+                select(PrivateBetInvite.bet_id).where(
+                    PrivateBetInvite.username == username.lower()
                 )
-                self.db.add(tx)
-
-        logger.info(
-            f"Bet {bet.id} cancelled, refunded {len(participants)} participants"
+            )
+        mine = union(*branches).subquery("mine")
+        query = (
+            select(
+                PrivateBet,
+                User.first_name,
+                PrivateBetParticipant.outcome,
+                PrivateBetParticipant.payout,
+            )
+            .join_from(mine, PrivateBet, PrivateBet.id == mine.c.bet_id)
+            .join(User, User.id == PrivateBet.created_by)
+            .outerjoin(
+                PrivateBetParticipant,
+                and_(
+                    PrivateBetParticipant.bet_id == PrivateBet.id,
+                    PrivateBetParticipant.user_id == user_id,
+                ),
+            )
+            .options(noload(PrivateBet.creator))
+            .order_by(PrivateBet.created_at.desc(), PrivateBet.id.desc())
         )
 
-    async def get_my_bets(self, user_id: uuid.UUID) -> list[PrivateBet]:
-        result = await self.db.execute(
-            select(PrivateBet)
-            .where(
-                or_(
-                    PrivateBet.created_by == user_id,
-                    PrivateBet.id.in_(
-                        select(PrivateBetParticipant.bet_id).where(
-                            PrivateBetParticipant.user_id == user_id
-                        )
-                    ),
+        if cursor:
+            try:
+                cursor_id = uuid.UUID(cursor)
+                cursor_at = await self.db.scalar(
+                    select(PrivateBet.created_at).where(PrivateBet.id == cursor_id)
                 )
+                if cursor_at:
+                    query = query.where(
+                        tuple_(PrivateBet.created_at, PrivateBet.id)
+                        < tuple_(cursor_at, cursor_id)
+                    )
+            except ValueError:
+                pass
+
+        result = await self.db.execute(query.limit(limit + 1))
+        rows = list(result.all())
+        has_next = len(rows) > limit
+        if has_next:
+            rows = rows[:limit]
+        next_cursor = str(rows[-1][0].id) if has_next and rows else None
+        return rows, next_cursor
+
+    async def invited_usernames(
+        self, bets: Sequence[PrivateBet]
+    ) -> dict[uuid.UUID, list[str]]:
+        """Whitelists of the closed ones among `bets`, read in one query."""
+        invited: dict[uuid.UUID, list[str]] = defaultdict(list)
+        closed = [bet.id for bet in bets if bet.is_closed]
+        if closed:
+            result = await self.db.execute(
+                select(PrivateBetInvite.bet_id, PrivateBetInvite.username)
+                .where(PrivateBetInvite.bet_id.in_(closed))
+                .order_by(PrivateBetInvite.bet_id, PrivateBetInvite.username)
             )
-            .options(
-                selectinload(PrivateBet.creator),
-                selectinload(PrivateBet.participants),
-            )
-            .order_by(PrivateBet.created_at.desc())
-            .limit(50)
-        )
-        return list(result.scalars().unique().all())
+            for bet_id, username in result.all():
+                invited[bet_id].append(username)
+        return invited
 
     async def get_bet_detail(
         self, bet_id: uuid.UUID, user_id: uuid.UUID
@@ -459,6 +527,7 @@ class PrivateBetService:
                     PrivateBetParticipant.user
                 ),
                 selectinload(PrivateBet.creator),
+                selectinload(PrivateBet.invites),
             )
         )
         return result.scalar_one_or_none()
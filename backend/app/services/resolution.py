@@ -4,32 +4,93 @@ from decimal import Decimal
 
 from fastapi import HTTPException, status
 from redis.asyncio import Redis
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.market import Market, MarketStatus
 from app.models.position import Position
 from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
+from app.services.fixed_point import CENT, ROUND_FLOOR, to_decimal, to_micros
+from app.services.ledger import LedgerService, available, house
 from app.services.order_book import OrderBookService
+from app.services.portfolio import PortfolioService
+from app.services.user_stats import UserStatsService
+
+
+async def recipient_ranges(
+    db: AsyncSession, market_id: uuid.UUID, chunk: int
+) -> list[tuple[uuid.UUID | None, uuid.UUID | None]]:
+    """Split the market's holders into (after, upto] user id ranges of `chunk`."""
+    holders = (
+        select(Position.user_id)
+        .where(Position.market_id == market_id, Position.shares > 0)
+        .distinct()
+        .subquery()
+    )
+    numbered = select(
+        holders.c.user_id,
+        func.row_number().over(order_by=holders.c.user_id).label("n"),
+    ).subquery()
+    bounds = (
+        await db.scalars(
+            select(numbered.c.user_id)
+            .where(numbered.c.n % chunk == 0)
+            .order_by(numbered.c.user_id)
+        )
+    ).all()
+    return list(zip([None, *bounds], [*bounds, None]))
+
+
+async def resolution_recipients(
+    db: AsyncSession,
+    market_id: uuid.UUID,
+    outcome: str,
+    after: uuid.UUID | None,
+    upto: uuid.UUID | None,
+) -> list[tuple[int, Decimal]]:
+    """(telegram_id, payout) of each holder with a user id in (after, upto]."""
+    payout = func.coalesce(
+        func.sum(Position.shares).filter(Position.outcome == outcome), 0
+    )
+    query = (
+        select(User.telegram_id, payout)
+        .join(User, User.id == Position.user_id)
+        .where(Position.market_id == market_id, Position.shares > 0)
+        .group_by(User.id)
+        .order_by(User.id)
+    )
+    if after is not None:
+        query = query.where(Position.user_id > after)
+    if upto is not None:
+        query = query.where(Position.user_id <= upto)
+    return [(telegram_id, amount) for telegram_id, amount in await db.execute(query)]
+
+
+def _pool(market: Market) -> str:
+    """House account holding the market's collateral."""
+    return "clob" if market.amm_type == "clob" else "amm"
 
 
 class ResolutionService:
     def __init__(self, db: AsyncSession, redis: Redis):
         self.db = db
         self.redis = redis
+        self.ledger = LedgerService(db)
+        self.user_stats = UserStatsService(db)
+        self.portfolio = PortfolioService(db, redis)
 
     async def resolve_market(
         self,
         market_id: uuid.UUID,
         outcome: str,
     ) -> dict:
-        if outcome not in ("yes", "no"):
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid outcome")
-
         market = await self.db.get(Market, market_id, with_for_update=True)
         if market is None:
             raise HTTPException(status.HTTP_404_NOT_FOUND, "Market not found")
+        if outcome not in market.outcome_labels:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid outcome")
         if market.status not in (MarketStatus.OPEN, MarketStatus.TRADING_CLOSED):
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST, "Market cannot be resolved"
@@ -50,6 +111,7 @@ class ResolutionService:
         )
         positions = result.scalars().all()
 
+        pool = _pool(market)
         winners = []
         for position in positions:
             user = await self.db.get(User, position.user_id, with_for_update=True)
@@ -57,11 +119,17 @@ class ResolutionService:
                 continue
 
             if position.outcome == outcome:
-                # Winner: payout = shares * 1.00 PRC per share
-                payout = position.shares * Decimal("1.00")
-                user.balance += payout
-                profit = payout - position.total_cost
-                user.total_profit += profit
+                # Winner: 1.00 PRC per share, floored to the cent like sales
+                payout_u = to_micros(position.shares, CENT, ROUND_FLOOR)
+                payout = to_decimal(payout_u, 2)
+                self.ledger.post(
+                    "payout",
+                    available(user, payout),
+                    house(pool, -payout),
+                    market_id=market_id,
+                )
+                profit_u = payout_u - to_micros(position.total_cost)
+                user.total_profit += to_decimal(profit_u, 2)
 
                 tx = Transaction(
                     user_id=position.user_id,
@@ -76,22 +144,19 @@ class ResolutionService:
                 winners.append(position.user_id)
             # Losers get nothing - their cost is already deducted
 
-            # Update win rate
-            if user.total_trades > 0:
-                # Count winning transactions
-                win_result = await self.db.execute(
-                    select(Transaction).where(
-                        Transaction.user_id == user.id,
-                        Transaction.type == TransactionType.PAYOUT,
-                    )
-                )
-                wins = len(win_result.scalars().all())
-                user.win_rate = Decimal(str(round(wins / user.total_trades * 100, 2)))
+        # Book PnL, wins and streaks from the market's ledger rows
+        await self.db.flush()
+        win_rates = await self.user_stats.settle_market(market_id, resolved=True)
+        for user_id, win_rate in win_rates.items():
+            user = await self.db.get(User, user_id)
+            user.win_rate = win_rate
 
         await self.db.commit()
 
         await self.redis.delete(f"market:{market_id}")
         await self.redis.delete("markets:list")
+        await self.portfolio.invalidate(*{p.user_id for p in positions})
+        await self._enqueue_notifications(market_id)
 
         return {
             "market_id": str(market_id),
@@ -100,6 +165,18 @@ class ResolutionService:
             "total_positions": len(positions),
         }
 
+    async def _enqueue_notifications(self, market_id: uuid.UUID) -> None:
+        """One notification job per chunk of holders; jobs carry only ids."""
+        from app.tasks.notifications import send_resolution_notifications
+
+        ranges = await recipient_ranges(self.db, market_id, settings.NOTIFY_CHUNK_USERS)
+        for after, upto in ranges:
+            await send_resolution_notifications.kiq(
+                str(market_id),
+                str(after) if after else None,
+                str(upto) if upto else None,
+            )
+
     async def cancel_market(self, market_id: uuid.UUID) -> dict:
         market = await self.db.get(Market, market_id, with_for_update=True)
         if market is None:
@@ -110,6 +187,8 @@ class ResolutionService:
             )
 
         market.status = MarketStatus.CANCELLED
+        # Settled now: archiving ages finished markets from here
+        market.resolved_at = datetime.now(timezone.utc)
 
         # Refund all positions
         result = await self.db.execute(
@@ -126,7 +205,12 @@ class ResolutionService:
             if user is None:
                 continue
 
-            user.balance += position.total_cost
+            self.ledger.post(
+                "refund",
+                available(user, position.total_cost),
+                house(_pool(market), -position.total_cost),
+                market_id=market_id,
+            )
             refunded += 1
 
             tx = Transaction(
@@ -140,10 +224,13 @@ class ResolutionService:
             )
             self.db.add(tx)
 
+        await self.db.flush()
+        await self.user_stats.settle_market(market_id, resolved=False)
         await self.db.commit()
 
         await self.redis.delete(f"market:{market_id}")
         await self.redis.delete("markets:list")
+        await self.portfolio.invalidate(*{p.user_id for p in positions})
 
         return {
             "market_id": str(market_id),
@@ -0,0 +1,306 @@
+"""Set-based settlement of private bets.
+
+However many bets and participants a chunk holds, it is settled in a fixed
+number of statements: one writes every payout and its transaction, one
+credits the users, one journals the postings. Due bets are taken in chunks
+of at most `max_users` participants, so one transaction never holds many
+user row locks; callers commit after each chunk, then drop the bets'
+cached previews and listings with `invalidate_bet_caches`.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from redis.asyncio import Redis
+from sqlalchemy import (
+    ColumnElement,
+    Numeric,
+    String,
+    cast,
+    column,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.private_bet import PrivateBet, PrivateBetParticipant, PrivateBetStatus
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.services.ledger import CENTS, LedgerService, Leg, house, user_account
+
+logger = logging.getLogger(__name__)
+
+FEE_RATE = Decimal("0.02")
+
+# Transaction type and description prefix of a refund / a winner's payout
+REFUND = (TransactionType.BET_REFUND, "Возврат ставки: ")
+PAYOUT = (TransactionType.BET_PAYOUT, "Выигрыш в споре: ")
+
+
+def vote_outcome(bet: PrivateBet) -> str | None:
+    """Side with more votes, or None on a tie (no votes counts as a tie)."""
+    if bet.yes_votes > bet.no_votes:
+        return "yes"
+    if bet.no_votes > bet.yes_votes:
+        return "no"
+    return None
+
+
+def my_bets_key(user_id: uuid.UUID) -> str:
+    """Redis hash caching the pages of the user's GET /bets/my listing."""
+    return f"bets:my:{user_id}"
+
+
+def preview_key(invite_code: str) -> str:
+    """Redis key caching GET /bets/preview/{code}; the bot reads it too."""
+    return f"bet:preview:{invite_code.upper()}"
+
+
+async def invalidate_bet_caches(
+    db: AsyncSession, redis: Redis, bet_ids: Sequence[uuid.UUID]
+) -> None:
+    """Drop the cached previews of `bet_ids` and the cached bet listings of
+    everyone taking part in them."""
+    if not bet_ids:
+        return
+    codes = await db.scalars(
+        select(PrivateBet.invite_code).where(PrivateBet.id.in_(bet_ids))
+    )
+    user_ids = await db.scalars(
+        select(PrivateBetParticipant.user_id)
+        .where(PrivateBetParticipant.bet_id.in_(bet_ids))
+        .distinct()
+    )
+    keys = [preview_key(code) for code in codes]
+    keys += [my_bets_key(user_id) for user_id in user_ids]
+    if keys:
+        await redis.delete(*keys)
+
+
+class SettlementService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.ledger = LedgerService(db)
+        self.max_users = settings.PRIVATE_BET_SETTLE_USERS
+
+    async def close_expired(
+        self, now: datetime, bet_ids: list[uuid.UUID] | None = None
+    ) -> list[uuid.UUID]:
+        """Close one chunk of OPEN bets past closes_at (only `bet_ids`, if given).
+
+        Bets with both sides taken move to VOTING; the rest are cancelled and
+        refunded. Returns the ids closed; empty once none are due. Caller
+        commits.
+        """
+        where = [
+            PrivateBet.status == PrivateBetStatus.OPEN,
+            PrivateBet.closes_at <= now,
+        ]
+        if bet_ids is not None:
+            where.append(PrivateBet.id.in_(bet_ids))
+        bets = await self._lock_chunk(*where)
+
+        # Cancel if nobody joined, or only one side has participants
+        await self.settle([(b, None) for b in bets if not (b.yes_count and b.no_count)])
+        for bet in bets:
+            if bet.status == PrivateBetStatus.OPEN:
+                bet.status = PrivateBetStatus.VOTING
+                logger.info(f"Private bet moved to voting: {bet.id}")
+        return [bet.id for bet in bets]
+
+    async def resolve_expired(self, now: datetime) -> list[uuid.UUID]:
+        """Settle one chunk of VOTING bets past voting_deadline by majority.
+
+        Ties and bets nobody voted on are cancelled and refunded. Returns the
+        ids settled; empty once none are due. Caller commits.
+        """
+        bets = await self._lock_chunk(
+            PrivateBet.status == PrivateBetStatus.VOTING,
+            PrivateBet.voting_deadline <= now,
+        )
+        await self.settle([(bet, vote_outcome(bet)) for bet in bets])
+        return [bet.id for bet in bets]
+
+    async def _lock_chunk(self, *where: ColumnElement[bool]) -> Sequence[PrivateBet]:
+        """Lock the first bets matching `where` with at most `max_users`
+        participants between them (always at least one bet)."""
+        size = PrivateBet.yes_count + PrivateBet.no_count
+        running = (
+            select(
+                PrivateBet.id,
+                size.label("size"),
+                func.sum(size).over(order_by=PrivateBet.id).label("upto"),
+            )
+            .where(*where)
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(PrivateBet)
+            # Repeated so rows changed while we waited for the lock drop out
+            .where(
+                *where,
+                PrivateBet.id.in_(
+                    select(running.c.id).where(
+                        or_(
+                            running.c.upto <= self.max_users,
+                            # The first bet, even if it alone is over the limit
+                            running.c.upto == running.c.size,
+                        )
+                    )
+                ),
+            )
+            .order_by(PrivateBet.id)
+            .with_for_update()
+        )
+        return result.scalars().all()
+
+    async def settle(self, decisions: Sequence[tuple[PrivateBet, str | None]]) -> None:
+        """Resolve each bet for the given winning side, or cancel it (None).
+
+        Winners split the pool less FEE_RATE; a cancelled bet, or one with
+        nobody on the winning side, refunds every stake. Caller holds the
+        bets' row locks and commits.
+        """
+        if not decisions:
+            return
+        now = datetime.now(timezone.utc)
+        winners = await self._count_sides([bet.id for bet, side in decisions if side])
+
+        plan = []
+        for bet, side in decisions:
+            count = winners.get((bet.id, side), 0)
+            if side and count:
+                fee = (bet.total_pool * FEE_RATE).quantize(CENTS)
+                amount = ((bet.total_pool - fee) / count).quantize(CENTS)
+                bet.status = PrivateBetStatus.RESOLVED
+                bet.resolution_outcome = side
+                tx_type, label = PAYOUT
+                logger.info(
+                    f"Bet {bet.id} resolved: {side}, pool={bet.total_pool}, "
+                    f"fee={fee}, per_winner={amount}"
+                )
+            else:
+                side, amount = None, bet.stake_amount
+                bet.status = PrivateBetStatus.CANCELLED
+                tx_type, label = REFUND
+                logger.info(f"Bet {bet.id} cancelled, refunding all participants")
+            bet.resolved_at = now
+            plan.append((bet.id, side, amount, tx_type.value, label))
+
+        plan = values(
+            column("bet_id", UUID(as_uuid=True)),
+            column("side", String(10)),
+            column("amount", Numeric(12, 2)),
+            column("tx_type", String(20)),
+            column("label", String(40)),
+            name="plan",
+        ).data(plan)
+        participants = PrivateBetParticipant.__table__
+        paid = (
+            update(participants)
+            .where(
+                participants.c.bet_id == plan.c.bet_id,
+                or_(plan.c.side.is_(None), participants.c.outcome == plan.c.side),
+            )
+            .values(payout=plan.c.amount)
+            .returning(
+                participants.c.user_id,
+                participants.c.bet_id,
+                plan.c.amount,
+                plan.c.tx_type,
+                plan.c.label,
+            )
+            .cte("paid")
+        )
+        transactions = Transaction.__table__
+        result = await self.db.execute(
+            insert(transactions)
+            .from_select(
+                [
+                    "id",
+                    "user_id",
+                    "type",
+                    "amount",
+                    "shares",
+                    "price_at_trade",
+                    "description",
+                ],
+                select(
+                    func.gen_random_uuid(),
+                    paid.c.user_id,
+                    cast(paid.c.tx_type, transactions.c.type.type),
+                    paid.c.amount,
+                    literal(0),
+                    literal(0),
+                    func.concat(paid.c.label, func.left(PrivateBet.title, 80)),
+                ).join_from(paid, PrivateBet, PrivateBet.id == paid.c.bet_id),
+            )
+            .returning(
+                transactions.c.user_id, transactions.c.type, transactions.c.amount
+            )
+        )
+        rows = result.all()
+        if not rows:
+            return
+
+        credits: dict[uuid.UUID, Decimal] = defaultdict(Decimal)
+        postings: dict[str, list] = defaultdict(list)
+        for user_id, tx_type, amount in rows:
+            credits[user_id] += amount
+            postings[tx_type.value].append(
+                (
+                    # No User on the leg: the balance columns are updated below
+                    Leg(user_account(user_id, "available"), amount),
+                    house("bets", -amount),
+                )
+            )
+        for kind, entries in postings.items():
+            await self.ledger.record(kind, entries)
+
+        # Lock the users in id order, so settles sharing users (a majority
+        # vote and the scheduled sweep) queue instead of deadlocking. NO KEY
+        # UPDATE, as the UPDATE takes, leaves the transactions' FK checks be
+        await self.db.execute(
+            select(User.id)
+            .where(User.id.in_(credits))
+            .order_by(User.id)
+            .with_for_update(key_share=True)
+        )
+        credit = values(
+            column("user_id", UUID(as_uuid=True)),
+            column("amount", Numeric(14, 2)),
+            name="credit",
+        ).data(sorted(credits.items()))
+        await self.db.execute(
+            update(User)
+            .where(User.id == credit.c.user_id)
+            .values(balance=User.balance + credit.c.amount)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _count_sides(
+        self, bet_ids: list[uuid.UUID]
+    ) -> dict[tuple[uuid.UUID, str], int]:
+        if not bet_ids:
+            return {}
+        result = await self.db.execute(
+            select(
+                PrivateBetParticipant.bet_id,
+                PrivateBetParticipant.outcome,
+                func.count(),
+            )
+            .where(PrivateBetParticipant.bet_id.in_(bet_ids))
+            .group_by(PrivateBetParticipant.bet_id, PrivateBetParticipant.outcome)
+        )
+        return {(bet_id, side): n for bet_id, side, n in result.all()}
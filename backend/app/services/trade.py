@@ -6,21 +6,60 @@ from redis.asyncio import Redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.market import Market, MarketStatus
 from app.models.position import Position
 from app.models.price_history import PriceHistory
 from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
-from app.core.config import settings
-from app.services.market_maker.base import MarketState
-from app.services.market_maker.factory import get_market_maker
+from app.services.fixed_point import (
+    BPS,
+    CENT,
+    PRICE_TICK,
+    ROUND_FLOOR,
+    SCALE,
+    float_to_decimal,
+    float_to_micros,
+    micros_to_float,
+    mul_div,
+    to_decimal,
+    to_micros,
+)
+from app.services.ledger import LedgerService, available, house
+from app.services.market_maker.factory import (
+    MULTI_OUTCOME_TYPES,
+    get_market_maker,
+    get_market_prices,
+    get_market_state,
+)
+from app.services.market_stats import MarketStatsService
+from app.services.portfolio import PortfolioService
+from app.services.user_stats import UserStatsService, position_delta
+
+
+def _add_shares(market: Market, outcome: str, shares_u: int) -> None:
+    """Apply a signed share delta (micro-shares) to the market's `outcome`."""
+    shares = to_decimal(shares_u)
+    if market.amm_type in MULTI_OUTCOME_TYPES:
+        q = list(market.q_outcomes)
+        q[market.outcomes.index(outcome)] += shares
+        # Reassign so the ARRAY column is flagged dirty
+        market.q_outcomes = q
+    elif outcome == "yes":
+        market.q_yes += shares
+    else:
+        market.q_no += shares
 
 
 class TradeService:
     def __init__(self, db: AsyncSession, redis: Redis):
         self.db = db
         self.redis = redis
-        self.fee_percent = Decimal(str(settings.TRADE_FEE_PERCENT)) / Decimal("100")
+        self.fee_bps = round(settings.TRADE_FEE_PERCENT * 100)
+        self.ledger = LedgerService(db)
+        self.stats = MarketStatsService(db, redis)
+        self.user_stats = UserStatsService(db)
+        self.portfolio = PortfolioService(db, redis)
 
     async def buy(
         self,
@@ -29,8 +68,6 @@ class TradeService:
         outcome: str,
         amount: Decimal,
     ) -> dict:
-        if outcome not in ("yes", "no"):
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid outcome")
         if amount <= 0:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Amount must be positive")
 
@@ -42,11 +79,13 @@ class TradeService:
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST, "Market is not open for trading"
             )
-        if market.amm_type != "lmsr":
+        if market.amm_type == "clob":
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST,
                 "This market uses CLOB. Use /v1/orderbook/orders",
             )
+        if outcome not in market.outcome_labels:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid outcome")
 
         # Check bet limits
         if amount < market.min_bet:
@@ -64,31 +103,38 @@ class TradeService:
         if user.balance < amount:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Insufficient balance")
 
-        # Calculate fee
-        fee = (amount * self.fee_percent).quantize(Decimal("0.01"))
-        net_amount = amount - fee
+        # All arithmetic below is in integer micro-units
+        amount_u = to_micros(amount, CENT)
+        fee_u = mul_div(amount_u, self.fee_bps, BPS, CENT)
+        net_u = amount_u - fee_u
 
         # Calculate shares via MarketMaker (on net amount after fee)
         mm = get_market_maker(market.amm_type)
-        state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        shares = mm.get_shares_for_amount(state, outcome, float(net_amount))
+        state = get_market_state(market)
+        shares = mm.get_shares_for_amount(state, outcome, micros_to_float(net_u))
+        shares_u = float_to_micros(shares, rounding=ROUND_FLOOR)
 
-        if shares <= 0:
+        if shares_u <= 0:
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST, "Cannot purchase zero shares"
             )
 
+        amount_d = to_decimal(amount_u, 2)
+        fee_d = to_decimal(fee_u, 2)
+        shares_d = to_decimal(shares_u)
+
         # Update market quantities
-        if outcome == "yes":
-            market.q_yes += Decimal(str(shares))
-        else:
-            market.q_no += Decimal(str(shares))
-        market.total_volume += amount
+        _add_shares(market, outcome, shares_u)
+        market.total_volume += amount_d
 
         # Update user balance
-        user.balance -= amount
+        self.ledger.post(
+            "buy",
+            available(user, -amount_d),
+            house("amm", amount_d - fee_d),
+            house("fees", fee_d),
+            market_id=market_id,
+        )
         user.total_trades += 1
 
         # Upsert position
@@ -103,52 +149,54 @@ class TradeService:
         )
         position = result.scalar_one_or_none()
 
+        new_trader = False
         if position is None:
+            held = (Decimal("0"), Decimal("0"))
+            new_trader = await self.stats.is_new_trader(user_id, market_id)
             position = Position(
                 user_id=user_id,
                 market_id=market_id,
                 outcome=outcome,
-                shares=Decimal(str(shares)),
-                total_cost=amount,
-                avg_price=amount / Decimal(str(shares)),
+                shares=shares_d,
+                total_cost=amount_d,
+                avg_price=to_decimal(mul_div(amount_u, SCALE, shares_u, PRICE_TICK), 4),
             )
             self.db.add(position)
-            market.total_traders += 1
+            market.total_traders += int(new_trader)
         else:
-            total_shares = position.shares + Decimal(str(shares))
-            position.total_cost += amount
-            position.avg_price = position.total_cost / total_shares
-            position.shares = total_shares
+            held = (position.shares, position.total_cost)
+            total_shares_u = to_micros(position.shares) + shares_u
+            total_cost_u = to_micros(position.total_cost) + amount_u
+            position.total_cost = to_decimal(total_cost_u, 2)
+            position.avg_price = to_decimal(
+                mul_div(total_cost_u, SCALE, total_shares_u, PRICE_TICK), 4
+            )
+            position.shares = to_decimal(total_shares_u)
 
         # Get new price
-        new_state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        price_yes = mm.get_price(new_state, "yes")
-        price_no = mm.get_price(new_state, "no")
+        price_yes, price_no, prices = get_market_prices(market)
+        price_outcome = mm.get_price(get_market_state(market), outcome)
 
         # Record buy transaction
         tx = Transaction(
             user_id=user_id,
             market_id=market_id,
             type=TransactionType.BUY,
-            amount=-amount,
-            shares=Decimal(str(shares)),
+            amount=-amount_d,
+            shares=shares_d,
             outcome=outcome,
-            price_at_trade=Decimal(
-                str(round(price_yes if outcome == "yes" else price_no, 4))
-            ),
-            description=f"Buy {outcome.upper()} | fee: {fee} PRC",
+            price_at_trade=float_to_decimal(price_outcome, 4),
+            description=f"Buy {outcome.upper()} | fee: {fee_d} PRC",
         )
         self.db.add(tx)
 
         # Record fee transaction
-        if fee > 0:
+        if fee_u > 0:
             fee_tx = Transaction(
                 user_id=user_id,
                 market_id=market_id,
                 type=TransactionType.FEE,
-                amount=-fee,
+                amount=-fee_d,
                 description=f"Trading fee {settings.TRADE_FEE_PERCENT}%",
             )
             self.db.add(fee_tx)
@@ -156,25 +204,44 @@ class TradeService:
         # Record price history
         ph = PriceHistory(
             market_id=market_id,
-            price_yes=Decimal(str(round(price_yes, 4))),
-            price_no=Decimal(str(round(price_no, 4))),
+            price_yes=float_to_decimal(price_yes, 4),
+            price_no=float_to_decimal(price_no, 4),
             q_yes=market.q_yes,
             q_no=market.q_no,
+            prices=[float_to_decimal(p, 4) for p in prices] if prices else None,
         )
         self.db.add(ph)
 
+        await self.stats.record(
+            market_id,
+            buys=1,
+            buy_volume=amount_d,
+            fees=fee_d,
+            new_traders=int(new_trader),
+        )
+        await self.user_stats.record(
+            user_id,
+            buys=1,
+            buy_amount=amount_d,
+            fees=fee_d,
+            **position_delta(position, *held),
+        )
+
         await self.db.commit()
 
         # Invalidate cache
         await self.redis.delete(f"market:{market_id}")
         await self.redis.delete("markets:list")
+        await self.stats.invalidate(market_id)
+        await self.portfolio.invalidate(user_id)
 
         return {
-            "shares": round(shares, 6),
-            "cost": float(amount),
-            "fee": float(fee),
-            "price_yes": round(price_yes, 4),
-            "price_no": round(price_no, 4),
+            "shares": micros_to_float(shares_u),
+            "cost": micros_to_float(amount_u),
+            "fee": micros_to_float(fee_u),
+            "price_yes": price_yes,
+            "price_no": price_no,
+            "prices": prices,
             "new_balance": float(user.balance),
         }
 
@@ -185,8 +252,6 @@ class TradeService:
         outcome: str,
         shares: Decimal,
     ) -> dict:
-        if outcome not in ("yes", "no"):
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid outcome")
         if shares <= 0:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Shares must be positive")
 
@@ -197,11 +262,13 @@ class TradeService:
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST, "Market is not open for trading"
             )
-        if market.amm_type != "lmsr":
+        if market.amm_type == "clob":
             raise HTTPException(
                 status.HTTP_400_BAD_REQUEST,
                 "This market uses CLOB. Use /v1/orderbook/orders",
             )
+        if outcome not in market.outcome_labels:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid outcome")
 
         user = await self.db.get(User, user_id, with_for_update=True)
         if user is None:
@@ -222,67 +289,79 @@ class TradeService:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Insufficient shares")
 
         # Calculate revenue
+        shares_u = to_micros(shares, rounding=ROUND_FLOOR)
         mm = get_market_maker(market.amm_type)
-        state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        revenue = mm.get_sale_revenue(state, outcome, float(shares))
-        revenue_decimal = Decimal(str(round(revenue, 2)))
+        state = get_market_state(market)
+        revenue = mm.get_sale_revenue(state, outcome, micros_to_float(shares_u))
+        revenue_u = float_to_micros(revenue, CENT, ROUND_FLOOR)
+        revenue_d = to_decimal(revenue_u, 2)
 
         # Update market
-        if outcome == "yes":
-            market.q_yes -= shares
-        else:
-            market.q_no -= shares
+        _add_shares(market, outcome, -shares_u)
 
         # Update user
-        user.balance += revenue_decimal
+        self.ledger.post(
+            "sell",
+            available(user, revenue_d),
+            house("amm", -revenue_d),
+            market_id=market_id,
+        )
 
-        # Update position
-        position.shares -= shares
-        cost_proportion = shares / (position.shares + shares)
-        position.total_cost -= position.total_cost * cost_proportion
+        # Update position: release cost pro rata to the shares sold
+        held = (position.shares, position.total_cost)
+        held_u = to_micros(position.shares)
+        cost_u = to_micros(position.total_cost)
+        released_u = mul_div(cost_u, shares_u, held_u, CENT)
+        position.shares = to_decimal(held_u - shares_u)
+        position.total_cost = to_decimal(cost_u - released_u, 2)
 
         # New prices
-        new_state = MarketState(
-            q_yes=market.q_yes, q_no=market.q_no, liquidity_b=market.liquidity_b
-        )
-        price_yes = mm.get_price(new_state, "yes")
-        price_no = mm.get_price(new_state, "no")
+        price_yes, price_no, prices = get_market_prices(market)
+        price_outcome = mm.get_price(get_market_state(market), outcome)
 
         # Record transaction
         tx = Transaction(
             user_id=user_id,
             market_id=market_id,
             type=TransactionType.SELL,
-            amount=revenue_decimal,
-            shares=shares,
+            amount=revenue_d,
+            shares=to_decimal(shares_u),
             outcome=outcome,
-            price_at_trade=Decimal(
-                str(round(price_yes if outcome == "yes" else price_no, 4))
-            ),
+            price_at_trade=float_to_decimal(price_outcome, 4),
         )
         self.db.add(tx)
 
         # Price history
         ph = PriceHistory(
             market_id=market_id,
-            price_yes=Decimal(str(round(price_yes, 4))),
-            price_no=Decimal(str(round(price_no, 4))),
+            price_yes=float_to_decimal(price_yes, 4),
+            price_no=float_to_decimal(price_no, 4),
             q_yes=market.q_yes,
             q_no=market.q_no,
+            prices=[float_to_decimal(p, 4) for p in prices] if prices else None,
         )
         self.db.add(ph)
 
+        await self.stats.record(market_id, sells=1, sell_volume=revenue_d)
+        await self.user_stats.record(
+            user_id,
+            sells=1,
+            sell_amount=revenue_d,
+            **position_delta(position, *held),
+        )
+
         await self.db.commit()
 
         await self.redis.delete(f"market:{market_id}")
         await self.redis.delete("markets:list")
+        await self.stats.invalidate(market_id)
+        await self.portfolio.invalidate(user_id)
 
         return {
-            "shares_sold": float(shares),
-            "revenue": float(revenue_decimal),
-            "price_yes": round(price_yes, 4),
-            "price_no": round(price_no, 4),
+            "shares_sold": micros_to_float(shares_u),
+            "revenue": micros_to_float(revenue_u),
+            "price_yes": price_yes,
+            "price_no": price_no,
+            "prices": prices,
             "new_balance": float(user.balance),
         }
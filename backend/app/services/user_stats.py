@@ -0,0 +1,266 @@
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.archive import with_archive
+from app.models.market import Market, MarketStatus
+from app.models.position import Position
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.models.user_stats import UserStats
+
+# Cash flows that make up a user's PnL in a market; FEE rows are already
+# included in the gross BUY and the net ORDER_FILL amounts
+TRADING_TYPES = (
+    TransactionType.BUY,
+    TransactionType.SELL,
+    TransactionType.ORDER_FILL,
+    TransactionType.PAYOUT,
+)
+BONUS_TYPES = (TransactionType.BONUS, TransactionType.REFERRAL, TransactionType.DAILY)
+SETTLED_STATUSES = (MarketStatus.RESOLVED, MarketStatus.CANCELLED)
+
+
+def position_delta(
+    position: Position, shares: Decimal, total_cost: Decimal
+) -> dict[str, int | Decimal]:
+    """Counters to record for `position` having changed from `shares` and
+    `total_cost` to its current values. Positions count while they hold shares.
+    """
+    was_held, is_held = shares > 0, position.shares > 0
+    return {
+        "active_positions": int(is_held) - int(was_held),
+        "position_cost": (position.total_cost if is_held else 0)
+        - (total_cost if was_held else 0),
+    }
+
+
+def _blank(user_id: uuid.UUID) -> UserStats:
+    """Stats of a user with no recorded activity."""
+    return UserStats(
+        user_id=user_id,
+        **{
+            c.name: c.default.arg
+            for c in UserStats.__table__.columns
+            if c.default is not None
+        },
+    )
+
+
+class UserStatsService:
+    """Incremental user_stats read model, rebuildable from the ledger."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record(self, user_id: uuid.UUID, **deltas: int | Decimal) -> None:
+        """Add counters (column name → delta) to a user's row. Caller commits."""
+        stmt = insert(UserStats).values(user_id=user_id, **deltas)
+        row = UserStats.__table__.c
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[row.user_id],
+                set_={
+                    **{k: row[k] + stmt.excluded[k] for k in deltas},
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    async def settle_market(
+        self, market_id: uuid.UUID, resolved: bool
+    ) -> dict[uuid.UUID, Decimal]:
+        """Book realized PnL of every trader in a resolved or cancelled market.
+
+        PnL per user is the sum of the market's trading cash flows, computed
+        in one GROUP BY; payouts must be flushed first. Wins, losses and
+        streaks only move for resolved markets. Returns each settled user's
+        new win rate. Caller commits.
+        """
+        tx = Transaction.__table__
+        pnl = func.sum(tx.c.amount)
+        is_payout = tx.c.type == TransactionType.PAYOUT
+        per_user = (
+            select(
+                tx.c.user_id,
+                pnl.label("pnl"),
+                func.count().filter(is_payout).label("payouts"),
+                func.coalesce(func.sum(tx.c.amount).filter(is_payout), 0).label(
+                    "payout_amount"
+                ),
+            )
+            .where(tx.c.market_id == market_id, tx.c.type.in_(TRADING_TYPES))
+            .group_by(tx.c.user_id)
+            .subquery()
+        )
+        if resolved:
+            win = case((per_user.c.pnl > 0, 1), else_=0)
+            loss = case((per_user.c.pnl < 0, 1), else_=0)
+        else:
+            win = loss = literal(0)
+
+        columns = [
+            "user_id",
+            "realized_pnl",
+            "payouts",
+            "payout_amount",
+            "wins",
+            "losses",
+            "current_streak",
+            "best_streak",
+        ]
+        stmt = insert(UserStats).from_select(
+            columns,
+            select(
+                per_user.c.user_id,
+                per_user.c.pnl,
+                per_user.c.payouts,
+                per_user.c.payout_amount,
+                win,
+                loss,
+                win - loss,
+                win,
+            ),
+        )
+        row = UserStats.__table__.c
+        # SET expressions see the old row, so best_streak can reuse the streak
+        streak = case(
+            (stmt.excluded.wins > 0, func.greatest(row.current_streak, 0) + 1),
+            (stmt.excluded.losses > 0, func.least(row.current_streak, 0) - 1),
+            else_=row.current_streak,
+        )
+        result = await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[row.user_id],
+                set_={
+                    **{
+                        k: row[k] + stmt.excluded[k]
+                        for k in ("realized_pnl", "payouts", "payout_amount")
+                    },
+                    "wins": row.wins + stmt.excluded.wins,
+                    "losses": row.losses + stmt.excluded.losses,
+                    "current_streak": streak,
+                    "best_streak": func.greatest(row.best_streak, streak),
+                    "updated_at": func.now(),
+                },
+            ).returning(row.user_id, row.wins, row.losses)
+        )
+        return {
+            user_id: UserStats(wins=wins, losses=losses).win_rate
+            for user_id, wins, losses in result.all()
+        }
+
+    async def get(self, user_id: uuid.UUID) -> UserStats:
+        return await self.db.get(UserStats, user_id) or _blank(user_id)
+
+    async def rebuild(self, user_ids: list[uuid.UUID]) -> None:
+        """Recompute the rows of `user_ids` from hot and archived transactions
+        and positions.
+
+        Overwrites the incremental values, so callers should hold the user
+        rows locked to keep trades from landing mid-rebuild. Caller commits.
+        """
+        stats = {user_id: _blank(user_id) for user_id in user_ids}
+        txs = with_archive(Transaction, lambda t: t.c.user_id.in_(user_ids))
+
+        result = await self.db.execute(
+            select(
+                txs.c.user_id,
+                txs.c.type,
+                func.count(),
+                func.coalesce(-func.sum(txs.c.amount).filter(txs.c.amount < 0), 0),
+                func.coalesce(func.sum(txs.c.amount).filter(txs.c.amount > 0), 0),
+            ).group_by(txs.c.user_id, txs.c.type)
+        )
+        for user_id, tx_type, count, paid, received in result.all():
+            s = stats[user_id]
+            if tx_type == TransactionType.BUY:
+                s.buys, s.buy_amount = count, paid
+            elif tx_type == TransactionType.SELL:
+                s.sells, s.sell_amount = count, received
+            elif tx_type == TransactionType.ORDER_FILL:
+                s.fills, s.fill_bought, s.fill_sold = count, paid, received
+            elif tx_type == TransactionType.FEE:
+                s.fees = paid
+            elif tx_type == TransactionType.PAYOUT:
+                s.payouts, s.payout_amount = count, received
+            elif tx_type in BONUS_TYPES:
+                s.bonuses += count
+                s.bonus_amount += received
+
+        positions = with_archive(
+            Position, lambda t: t.c.user_id.in_(user_ids) & (t.c.shares > 0)
+        )
+        result = await self.db.execute(
+            select(
+                positions.c.user_id, func.count(), func.sum(positions.c.total_cost)
+            ).group_by(positions.c.user_id)
+        )
+        for user_id, count, cost in result.all():
+            stats[user_id].active_positions = count
+            stats[user_id].position_cost = cost
+
+        # Per-market PnL in settlement order, for realized PnL and streaks
+        result = await self.db.execute(
+            select(txs.c.user_id, Market.status, func.sum(txs.c.amount))
+            .join(Market, Market.id == txs.c.market_id)
+            .where(txs.c.type.in_(TRADING_TYPES), Market.status.in_(SETTLED_STATUSES))
+            .group_by(txs.c.user_id, Market.id)
+            .order_by(txs.c.user_id, Market.resolved_at, Market.id)
+        )
+        for user_id, market_status, pnl in result.all():
+            s = stats[user_id]
+            s.realized_pnl += pnl
+            if market_status != MarketStatus.RESOLVED or pnl == 0:
+                continue
+            if pnl > 0:
+                s.wins += 1
+                s.current_streak = max(s.current_streak, 0) + 1
+            else:
+                s.losses += 1
+                s.current_streak = min(s.current_streak, 0) - 1
+            s.best_streak = max(s.best_streak, s.current_streak)
+
+        columns = [
+            c.name for c in UserStats.__table__.columns if c.name != "updated_at"
+        ]
+        rows = [{c: getattr(s, c) for c in columns} for s in stats.values()]
+        stmt = insert(UserStats).values(rows)
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={
+                    **{c: stmt.excluded[c] for c in columns if c != "user_id"},
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        await self.db.execute(
+            update(User),
+            [{"id": s.user_id, "win_rate": s.win_rate} for s in stats.values()],
+        )
+
+    async def rebuild_all(
+        self, batch_size: int, user_ids: list[uuid.UUID] | None = None
+    ) -> int:
+        """Rebuild every user's row (only `user_ids`, if given), `batch_size`
+        users per transaction."""
+        rebuilt = 0
+        last_id = None
+        while True:
+            query = select(User.id).order_by(User.id).limit(batch_size)
+            if user_ids is not None:
+                query = query.where(User.id.in_(user_ids))
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            batch = (await self.db.scalars(query.with_for_update())).all()
+            if not batch:
+                return rebuilt
+
+            await self.rebuild(list(batch))
+            await self.db.commit()
+            rebuilt += len(batch)
+            last_id = batch[-1]
@@ -0,0 +1,250 @@
+"""Lease locks so each scheduled job runs on one worker at a time.
+
+A lease is a Redis key holding its holder's fencing token, with a TTL the
+holder renews while it runs. Tokens only grow, so a holder whose lease
+lapsed (a stalled worker, a lost connection) has an older token than
+whoever took over.
+
+Postgres enforces the tokens: every transaction a `singleton` job opens
+first upserts the job's job_fences row, which fails once a newer token has
+written and locks the row until commit. A superseded holder's next
+transaction raises LeaseLost instead of writing. Side effects outside
+Postgres (Redis, Telegram) are not fenced; `check_lease` before them only
+narrows the window.
+
+`singleton` wraps a scheduled task in a lease and records run durations and
+skipped (overlapping or duplicate) runs for GET /admin/jobs.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import math
+import time
+from collections.abc import Awaitable, Callable
+from typing import ParamSpec, TypeVar
+
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.job_fence import JobFence
+
+logger = logging.getLogger(__name__)
+
+JOBS_KEY = "jobs"
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Take the lease if free; the token is the lease's next counter value, but
+# at least the server time in microseconds so it keeps growing past
+# job_fences even if the counter key is lost
+ACQUIRE = """
+if redis.call('exists', KEYS[1]) == 1 then return 0 end
+local now = redis.call('time')
+local token = redis.call('incr', KEYS[2])
+local floor = now[1] .. string.format('%06d', now[2])
+if token < tonumber(floor) then
+  token = floor
+  redis.call('set', KEYS[2], token)
+end
+redis.call('set', KEYS[1], token, 'PX', ARGV[1])
+return token
+"""
+# Extend (or, with PEXPIREAT, end) the lease only while we still hold it
+RENEW = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then return 0 end
+return redis.call('pexpire', KEYS[1], ARGV[2])
+"""
+RELEASE = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then return 0 end
+return redis.call('pexpireat', KEYS[1], ARGV[2])
+"""
+
+_current: contextvars.ContextVar["Lease | None"] = contextvars.ContextVar(
+    "lease", default=None
+)
+
+
+class LeaseLost(Exception):
+    """The lease expired or was taken over by a newer holder."""
+
+
+class Lease:
+    """Redis lease with a fencing token, renewed in the background while held."""
+
+    def __init__(
+        self, redis: Redis, name: str, ttl: int = settings.JOB_LEASE_TTL_SECONDS
+    ):
+        self.redis = redis
+        self.name = name
+        self.key = f"lease:{name}"
+        self.ttl_ms = ttl * 1000
+        self.token: int | None = None
+        self.lost = False
+        self._renewer: asyncio.Task | None = None
+
+    async def acquire(self) -> bool:
+        token = await self.redis.eval(
+            ACQUIRE, 2, self.key, f"{self.key}:fence", self.ttl_ms
+        )
+        if not token:
+            return False
+        self.token = int(token)
+        self.lost = False
+        return True
+
+    async def renew(self) -> bool:
+        renewed = await self.redis.eval(RENEW, 1, self.key, self.token, self.ttl_ms)
+        if not renewed:
+            self.lost = True
+        return bool(renewed)
+
+    async def release(self, hold_until: float | None = None) -> None:
+        """Give the lease up, or keep it until the `hold_until` timestamp."""
+        at_ms = math.ceil((hold_until or 0) * 1000)
+        if at_ms <= time.time() * 1000:
+            at_ms = 1  # already past: PEXPIREAT deletes the key
+        await self.redis.eval(RELEASE, 1, self.key, self.token, at_ms)
+
+    async def check(self) -> None:
+        """Raise LeaseLost unless this holder's token is still the one in Redis."""
+        if self.lost or await self.redis.get(self.key) != str(self.token):
+            self.lost = True
+            raise LeaseLost(f"{self.key} token {self.token} was superseded")
+
+    async def _keep_renewed(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_ms / 3000)
+            if not await self.renew():
+                logger.warning(f"Lost {self.key} (token {self.token})")
+                return
+
+    async def __aenter__(self) -> "Lease":
+        self._renewer = asyncio.create_task(self._keep_renewed())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._renewer.cancel()
+
+
+async def check_lease() -> None:
+    """Inside a `singleton` job, raise LeaseLost if its lease was lost.
+
+    Database writes are fenced anyway; call this before side effects
+    elsewhere.
+    """
+    lease = _current.get()
+    if lease is not None:
+        await lease.check()
+
+
+@event.listens_for(Session, "after_begin")
+def _fence_transaction(session: Session, transaction, connection) -> None:
+    """Stamp each transaction of a `singleton` job with the job's lease token."""
+    lease = _current.get()
+    if lease is None:
+        return
+    stmt = insert(JobFence).values(name=lease.name, token=lease.token)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[JobFence.name],
+        set_={"token": stmt.excluded.token},
+        where=JobFence.token <= stmt.excluded.token,
+    ).returning(JobFence.token)
+    if connection.execute(stmt).first() is None:
+        lease.lost = True
+        raise LeaseLost(f"{lease.key} token {lease.token} was fenced off")
+
+
+def singleton(
+    ttl: int = settings.JOB_LEASE_TTL_SECONDS,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R | None]]]:
+    """Run the job only if no other worker holds its lease; else skip it.
+
+    The lease is kept until the end of the minute the run started in, so a
+    second scheduler firing the same cron tick skips instead of running the
+    job again after the first copy finished.
+    """
+
+    def wrap(job: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R | None]]:
+        name = job.__name__
+        stats_key = f"{JOBS_KEY}:{name}"
+
+        @functools.wraps(job)
+        async def run(*args: P.args, **kwargs: P.kwargs) -> R | None:
+            redis = await get_redis()
+            lease = Lease(redis, f"job:{name}", ttl)
+            try:
+                if not await lease.acquire():
+                    logger.info(f"Job {name} skipped: already running")
+                    async with redis.pipeline(transaction=True) as pipe:
+                        pipe.sadd(JOBS_KEY, name)
+                        pipe.hincrby(stats_key, "skipped", 1)
+                        await pipe.execute()
+                    return None
+
+                started = time.time()
+                token = _current.set(lease)
+                try:
+                    async with lease:
+                        return await job(*args, **kwargs)
+                finally:
+                    _current.reset(token)
+                    duration_ms = int((time.time() - started) * 1000)
+                    await _record_run(redis, name, started, duration_ms, lease.lost)
+                    await lease.release(hold_until=(started // 60 + 1) * 60)
+            finally:
+                await redis.aclose()
+
+        return run
+
+    return wrap
+
+
+async def _record_run(
+    redis: Redis, name: str, started: float, duration_ms: int, lost: bool
+) -> None:
+    key = f"{JOBS_KEY}:{name}"
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.sadd(JOBS_KEY, name)
+        pipe.hincrby(key, "runs", 1)
+        pipe.hincrby(key, "lease_lost", int(lost))
+        pipe.hincrby(key, "total_duration_ms", duration_ms)
+        pipe.hset(
+            key,
+            mapping={"last_started": started, "last_duration_ms": duration_ms},
+        )
+        await pipe.execute()
+    # HSET has no max; a lost race here only under-reports a peak
+    if duration_ms > int(await redis.hget(key, "max_duration_ms") or 0):
+        await redis.hset(key, "max_duration_ms", duration_ms)
+
+
+async def job_stats(redis: Redis) -> list[dict]:
+    """Run counts and durations of every singleton job that has run."""
+    stats = []
+    for name in sorted(await redis.smembers(JOBS_KEY)):
+        state = await redis.hgetall(f"{JOBS_KEY}:{name}")
+        runs = int(state.get("runs", 0))
+        stats.append(
+            {
+                "name": name,
+                "runs": runs,
+                "skipped": int(state.get("skipped", 0)),
+                "lease_lost": int(state.get("lease_lost", 0)),
+                "last_started": float(state["last_started"])
+                if "last_started" in state
+                else None,
+                "last_duration_ms": int(state.get("last_duration_ms", 0)),
+                "max_duration_ms": int(state.get("max_duration_ms", 0)),
+                "avg_duration_ms": int(state.get("total_duration_ms", 0)) // runs
+                if runs
+                else 0,
+            }
+        )
+    return stats
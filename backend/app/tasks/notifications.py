@@ -1,59 +1,134 @@
 import html
 import logging
+import uuid
+from decimal import Decimal
 
 from aiogram import Bot
+from sqlalchemy import select
+from taskiq import TaskiqEvents, TaskiqState
 
 from app.core.config import settings
+from app.core.database import async_session
+from app.core.redis import get_redis
+from app.models.market import Market
+from app.services.broadcast import DELIVERED, BroadcastService, Outbound, Sender
+from app.services.private_bet import send_voting_notices
+from app.services.resolution import resolution_recipients
 from app.tasks.broker import broker
 
 logger = logging.getLogger(__name__)
 
 
+# One Bot (and HTTP session) per worker process, shared by every task
+_bot: Bot | None = None
+
+
+def get_bot() -> Bot:
+    global _bot
+    if _bot is None:
+        _bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
+    return _bot
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def close_bot(state: TaskiqState) -> None:
+    if _bot is not None:
+        await _bot.session.close()
+
+
 def _answer_label(outcome: str) -> str:
     return "ДА" if outcome.lower() == "yes" else "НЕТ"
 
 
+def _resolution_text(title: str, outcome: str, payout: Decimal) -> str:
+    safe_title = html.escape(title)
+    answer = _answer_label(outcome)
+    if payout > 0:
+        return (
+            f"🎉 <b>Ты угадал!</b>\n\n"
+            f"❓ «{safe_title}»\n"
+            f"✅ Ответ: <b>{answer}</b>\n\n"
+            f"💰 Тебе начислено: <b>+{payout:,.0f} PRC</b>\n\n"
+            f"🔥 Отличная интуиция!"
+        )
+    return (
+        f"📋 <b>Результат вопроса</b>\n\n"
+        f"❓ «{safe_title}»\n"
+        f"✅ Ответ: <b>{answer}</b>\n\n"
+        f"Твоя ставка не сыграла.\n"
+        f"Но на платформе ещё много вопросов 👇"
+    )
+
+
+@broker.task
+async def run_broadcast(broadcast_id: str) -> None:
+    """Send a broadcast registered with BroadcastService.start."""
+    redis = await get_redis()
+    try:
+        async with async_session() as db:
+            sender = Sender(get_bot(), redis)
+            await BroadcastService(db, redis, sender).run(broadcast_id)
+    finally:
+        await redis.aclose()
+
+
 @broker.task
 async def send_resolution_notifications(
     market_id: str,
-    market_title: str,
-    outcome: str,
-    winners: list[dict],
-    losers: list[dict],
+    after_user_id: str | None,
+    upto_user_id: str | None,
 ) -> None:
-    """Send notifications to all participants of a resolved market."""
-    bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
-    safe_title = html.escape(market_title)
-    answer = _answer_label(outcome)
+    """Notify the holders of a resolved market with user ids in (after, upto].
 
+    The job carries only ids; recipients and payouts are loaded here.
+    """
+    async with async_session() as db:
+        result = await db.execute(
+            select(Market.title, Market.resolution_outcome).where(
+                Market.id == uuid.UUID(market_id)
+            )
+        )
+        title, outcome = result.one()
+        recipients = await resolution_recipients(
+            db,
+            uuid.UUID(market_id),
+            outcome,
+            uuid.UUID(after_user_id) if after_user_id else None,
+            uuid.UUID(upto_user_id) if upto_user_id else None,
+        )
+
+    redis = await get_redis()
     try:
-        for winner in winners:
-            try:
-                text = (
-                    f"🎉 <b>Ты угадал!</b>\n\n"
-                    f"❓ «{safe_title}»\n"
-                    f"✅ Ответ: <b>{answer}</b>\n\n"
-                    f"💰 Тебе начислено: <b>+{winner['payout']:,.0f} PRC</b>\n\n"
-                    f"🔥 Отличная интуиция!"
-                )
-                await bot.send_message(winner["telegram_id"], text, parse_mode="HTML")
-            except Exception as e:
-                logger.error(f"Failed to notify winner {winner['telegram_id']}: {e}")
-
-        for loser in losers:
-            try:
-                text = (
-                    f"📋 <b>Результат вопроса</b>\n\n"
-                    f"❓ «{safe_title}»\n"
-                    f"✅ Ответ: <b>{answer}</b>\n\n"
-                    f"Твоя ставка не сыграла.\n"
-                    f"Но на платформе ещё много вопросов 👇"
-                )
-                await bot.send_message(loser["telegram_id"], text, parse_mode="HTML")
-            except Exception as e:
-                logger.error(f"Failed to notify loser {loser['telegram_id']}: {e}")
+        counts = await Sender(get_bot(), redis).send_all(
+            Outbound(telegram_id, _resolution_text(title, outcome, payout))
+            for telegram_id, payout in recipients
+        )
     finally:
-        await bot.session.close()
+        await redis.aclose()
+    logger.info(f"Resolution notifications for {market_id}: {dict(counts)}")
+
+
+@broker.task
+async def send_voting_notifications(
+    bet_id: str,
+    after_user_id: str | None,
+    upto_user_id: str | None,
+) -> None:
+    """Tell the participants of a private bet with user ids in (after, upto]
+    that voting started."""
+    redis = await get_redis()
+    try:
+        async with async_session() as db:
+            counts = await send_voting_notices(
+                db,
+                Sender(get_bot(), redis),
+                uuid.UUID(bet_id),
+                uuid.UUID(after_user_id) if after_user_id else None,
+                uuid.UUID(upto_user_id) if upto_user_id else None,
+            )
+    finally:
+        await redis.aclose()
+    logger.info(f"Voting notices for bet {bet_id}: {dict(counts)}")
 
 
 @broker.task
@@ -65,21 +140,21 @@ async def send_trade_confirmation(
     cost: float,
 ) -> None:
     """Send trade confirmation to user."""
-    bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
     safe_title = html.escape(market_title)
     side = _answer_label(outcome)
+    text = (
+        f"✅ <b>Прогноз принят!</b>\n\n"
+        f"❓ {safe_title}\n"
+        f"🎯 Ты поставил на: <b>{side}</b>\n"
+        f"💳 Ставка: <b>{cost:,.0f} PRC</b>\n\n"
+        f"Результат появится после закрытия вопроса.\n"
+        f"Удачи! 🍀"
+    )
 
+    redis = await get_redis()
     try:
-        text = (
-            f"✅ <b>Прогноз принят!</b>\n\n"
-            f"❓ {safe_title}\n"
-            f"🎯 Ты поставил на: <b>{side}</b>\n"
-            f"💳 Ставка: <b>{cost:,.0f} PRC</b>\n\n"
-            f"Результат появится после закрытия вопроса.\n"
-            f"Удачи! 🍀"
-        )
-        await bot.send_message(telegram_id, text, parse_mode="HTML")
-    except Exception as e:
-        logger.error(f"Failed to send trade confirmation to {telegram_id}: {e}")
+        result = await Sender(get_bot(), redis).send(Outbound(telegram_id, text))
     finally:
-        await bot.session.close()
+        await redis.aclose()
+    if result != DELIVERED:
+        logger.error(f"Trade confirmation to {telegram_id} {result}")
@@ -1,23 +1,36 @@
 import json
 import logging
-from datetime import datetime, timezone
-from decimal import Decimal
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import select
+from sqlalchemy.orm import noload
 
 from app.core.config import settings
 from app.core.database import async_session
 from app.core.redis import get_redis
 from app.models.market import Market, MarketStatus
-from app.models.private_bet import PrivateBet, PrivateBetParticipant, PrivateBetStatus
-from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
+from app.services.archive import ArchiveService
+from app.services.broadcast import BroadcastService, Sender
+from app.services.deadlines import DeadlineService
+from app.services.ledger import LedgerService
+from app.services.market_maker.factory import get_market_prices
+from app.services.market_stats import MarketStatsService
+from app.services.order_book import OrderBookService
+from app.services.partitions import PartitionService, month_start
+from app.services.settlement import SettlementService, invalidate_bet_caches
+from app.services.user_stats import UserStatsService
 from app.tasks.broker import broker
+from app.tasks.locks import check_lease, singleton
+from app.tasks.notifications import get_bot
 
 logger = logging.getLogger(__name__)
 
 
 @broker.task(schedule=[{"cron": "*/5 * * * *"}])
+@singleton()
 async def refresh_leaderboard() -> None:
     """Refresh leaderboard cache every 5 minutes."""
     redis = await get_redis()
@@ -56,37 +69,152 @@ async def refresh_leaderboard() -> None:
 
 
 @broker.task(schedule=[{"cron": "* * * * *"}])
-async def close_expired_markets() -> None:
-    """Close markets that have passed their closing time."""
+@singleton()
+async def run_deadlines() -> None:
+    """Close markets and private bets the moment their deadlines pass.
+
+    Each run sleeps from deadline to deadline until just before the next
+    minute's run takes over; an overlapping run finds the lease and skips.
+    """
+    until = (time.time() // 60 + 1) * 60 - 1
+    redis = await get_redis()
+    try:
+        async with async_session() as db:
+            closed = await DeadlineService(db, redis).run(until)
+    finally:
+        await redis.aclose()
+
+    if closed:
+        logger.info(f"Closed {closed} markets / private bets on deadline")
+
+
+@broker.task(schedule=[{"cron": "*/10 * * * *"}])
+@singleton()
+async def sweep_deadlines() -> None:
+    """Safety net: close anything past due in Postgres, re-seed the deadline set."""
+    redis = await get_redis()
+    try:
+        async with async_session() as db:
+            closed = await DeadlineService(db, redis).sweep()
+    finally:
+        await redis.aclose()
+
+    if closed:
+        logger.warning(f"Deadline sweep closed {closed} overdue markets / bets")
+
+
+@broker.task(schedule=[{"cron": "* * * * *"}])
+@singleton()
+async def expire_gtt_orders() -> None:
+    """Expire good-till-time orders and release their reservations."""
     now = datetime.now(timezone.utc)
+    redis = await get_redis()
+    total = 0
     async with async_session() as db:
-        result = await db.execute(
-            select(Market).where(
-                Market.status == MarketStatus.OPEN,
-                Market.closes_at <= now,
-            )
+        service = OrderBookService(db, redis)
+        while True:
+            expired = await service.expire_orders(now, settings.ORDER_EXPIRY_BATCH)
+            total += expired
+            if expired < settings.ORDER_EXPIRY_BATCH:
+                break
+    await redis.aclose()
+
+    if total:
+        logger.info(f"Expired {total} GTT orders")
+
+
+@broker.task(schedule=[{"cron": "30 3 * * *"}])
+@singleton()
+async def archive_finished_markets() -> None:
+    """Move rows of long-finished markets to the archive tables."""
+    now = datetime.now(timezone.utc)
+    redis = await get_redis()
+    async with async_session() as db:
+        archived = await ArchiveService(db, redis).archive_due(
+            now, settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_BATCH_MARKETS
         )
-        markets = result.scalars().all()
+    await redis.aclose()
 
-        for market in markets:
-            market.status = MarketStatus.TRADING_CLOSED
-            logger.info(f"Market closed: {market.id} - {market.title}")
+    if archived:
+        logger.info(f"Archived {archived} finished markets")
 
-        if markets:
-            await db.commit()
 
+@broker.task(schedule=[{"cron": "15 0 * * *"}])
+@singleton()
+async def maintain_partitions() -> None:
+    """Create upcoming monthly partitions and detach expired ones."""
+    now = datetime.now(timezone.utc)
+    retention = {
+        "transactions": settings.TRANSACTIONS_RETENTION_MONTHS,
+        "price_history": settings.PRICE_HISTORY_RETENTION_MONTHS,
+    }
+    async with async_session() as db:
+        service = PartitionService(db)
+        for table, months in retention.items():
+            await service.ensure_partitions(table, now, settings.PARTITION_MONTHS_AHEAD)
+            if months > 0:
+                detached = await service.detach_before(table, month_start(now, -months))
+                if detached:
+                    logger.info(f"Detached partitions: {detached}")
+
+
+@broker.task(schedule=[{"cron": "5 * * * *"}])
+@singleton()
+async def prune_market_stats_hourly() -> None:
+    """Drop hourly volume buckets that left the 24h window."""
+    before = datetime.now(timezone.utc) - timedelta(hours=48)
     redis = await get_redis()
-    await redis.delete("markets:list")
+    async with async_session() as db:
+        await MarketStatsService(db, redis).prune_hourly(before)
     await redis.aclose()
 
 
+@broker.task
+@singleton()
+async def rebuild_user_stats(user_ids: list[str] | None = None) -> None:
+    """Recompute user_stats from the ledger (only `user_ids`, if given).
+
+    Not scheduled: user_stats is kept up to date as events happen. Kicked
+    from POST /admin/user-stats/rebuild after a backfill or to repair drift.
+    """
+    async with async_session() as db:
+        rebuilt = await UserStatsService(db).rebuild_all(
+            settings.USER_STATS_REBUILD_BATCH,
+            [uuid.UUID(u) for u in user_ids] if user_ids is not None else None,
+        )
+    logger.info(f"Rebuilt stats of {rebuilt} users")
+
+
+@broker.task(schedule=[{"cron": "15 * * * *"}])
+@singleton()
+async def snapshot_ledger() -> None:
+    """Snapshot journal balances so balance reads only sum a short tail."""
+    async with async_session() as db:
+        count = await LedgerService(db).snapshot(
+            timedelta(seconds=settings.LEDGER_SNAPSHOT_LAG_SECONDS)
+        )
+        await db.commit()
+    if count:
+        logger.info(f"Ledger snapshot: {count} accounts")
+
+
+@broker.task(schedule=[{"cron": "30 5 * * *"}])
+@singleton()
+async def reconcile_balances() -> None:
+    """Verify users.balance / reserved_balance against the journal."""
+    async with async_session() as db:
+        mismatches = await LedgerService(db).reconcile(settings.LEDGER_RECONCILE_BATCH)
+    if mismatches:
+        logger.error(f"Balance reconciliation: {len(mismatches)} mismatched accounts")
+
+
 @broker.task(schedule=[{"cron": "0 6 * * *"}])
+@singleton()
 async def send_daily_digests() -> None:
     """Send daily digest notifications at 09:00 MSK (06:00 UTC)."""
     import html as html_mod
 
-    from aiogram import Bot
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+    from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
     async with async_session() as db:
         # Get hot markets
@@ -95,191 +223,78 @@ async def send_daily_digests() -> None:
             .where(Market.status == MarketStatus.OPEN)
             .order_by(Market.total_volume.desc())
             .limit(5)
+            .options(noload(Market.positions))
         )
         hot_markets = result.scalars().all()
 
-        if not hot_markets:
-            return
+    if not hot_markets:
+        return
 
-        # Get all active users
-        result = await db.execute(select(User).where(User.is_active).limit(1000))
-        users = result.scalars().all()
-
-    bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
     nums = ["", "1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣"]
-    try:
-        lines = [
-            "☀️ <b>Доброе утро!</b>\n",
-            "Вот что обсуждают прямо сейчас:\n",
-        ]
-        for i, m in enumerate(hot_markets, 1):
-            safe_title = html_mod.escape(m.title)
-            price_pct = float(m.price_yes) * 100 if m.price_yes else 50
-            num = nums[i] if i < len(nums) else f"<b>{i}.</b>"
-            lines.append(
-                f"{num} {safe_title}\n     → <b>{price_pct:.0f}%</b> думают что ДА\n"
-            )
-        lines.append("Согласен? Поставь свой прогноз 👇")
-        text = "\n".join(lines)
-
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="▶️ Сделать прогноз",
-                        callback_data="open_market:home",
-                    )
-                ]
-            ]
+    lines = [
+        "☀️ <b>Доброе утро!</b>\n",
+        "Вот что обсуждают прямо сейчас:\n",
+    ]
+    for i, m in enumerate(hot_markets, 1):
+        safe_title = html_mod.escape(m.title)
+        price_pct = get_market_prices(m)[0] * 100
+        num = nums[i] if i < len(nums) else f"<b>{i}.</b>"
+        lines.append(
+            f"{num} {safe_title}\n     → <b>{price_pct:.0f}%</b> думают что ДА\n"
         )
-
-        sent = 0
-        for user in users:
-            try:
-                await bot.send_message(
-                    user.telegram_id,
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML",
+    lines.append("Согласен? Поставь свой прогноз 👇")
+    text = "\n".join(lines)
+
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="▶️ Сделать прогноз",
+                    callback_data="open_market:home",
                 )
-                sent += 1
-            except Exception:
-                pass
+            ]
+        ]
+    )
 
-        logger.info(f"Daily digest sent to {sent}/{len(users)} users")
+    redis = await get_redis()
+    try:
+        async with async_session() as db:
+            service = BroadcastService(db, redis, Sender(get_bot(), redis))
+            await check_lease()
+            broadcast_id = await service.start(text, keyboard)
+            await service.run(broadcast_id)
     finally:
-        await bot.session.close()
-
-
-FEE_RATE = Decimal("0.02")
+        await redis.aclose()
 
 
-@broker.task(schedule=[{"cron": "* * * * *"}])
-async def close_expired_private_bets() -> None:
-    """Move OPEN private bets past closes_at to VOTING (or CANCEL if one-sided)."""
-    now = datetime.now(timezone.utc)
-    async with async_session() as db:
-        result = await db.execute(
-            select(PrivateBet)
-            .where(
-                PrivateBet.status == PrivateBetStatus.OPEN,
-                PrivateBet.closes_at <= now,
-            )
-            .with_for_update()
-        )
-        bets = result.scalars().all()
-
-        for bet in bets:
-            total = bet.yes_count + bet.no_count
-            # Cancel if nobody joined, or only one side has participants
-            if total <= 1 or bet.yes_count == 0 or bet.no_count == 0:
-                bet.status = PrivateBetStatus.CANCELLED
-                bet.resolved_at = now
-                # Refund all
-                p_result = await db.execute(
-                    select(PrivateBetParticipant).where(
-                        PrivateBetParticipant.bet_id == bet.id
-                    )
-                )
-                for p in p_result.scalars().all():
-                    p.payout = bet.stake_amount
-                    user = await db.get(User, p.user_id, with_for_update=True)
-                    if user:
-                        user.balance += bet.stake_amount
-                        db.add(
-                            Transaction(
-                                user_id=p.user_id,
-                                type=TransactionType.BET_REFUND,
-                                amount=bet.stake_amount,
-                                description=f"Возврат ставки: {bet.title[:80]}",
-                            )
-                        )
-                logger.info(f"Private bet cancelled (one-sided): {bet.id}")
-            else:
-                bet.status = PrivateBetStatus.VOTING
-                logger.info(f"Private bet moved to voting: {bet.id}")
-
-        if bets:
-            await db.commit()
+@broker.task(schedule=[{"cron": "*/5 * * * *"}])
+@singleton()
+async def resume_broadcasts() -> None:
+    """Finish broadcasts whose worker stopped before the last page."""
+    redis = await get_redis()
+    try:
+        async with async_session() as db:
+            await BroadcastService(db, redis, Sender(get_bot(), redis)).resume_all()
+    finally:
+        await redis.aclose()
 
 
 @broker.task(schedule=[{"cron": "*/5 * * * *"}])
+@singleton()
 async def resolve_expired_voting() -> None:
     """Resolve VOTING private bets past voting_deadline by majority vote."""
     now = datetime.now(timezone.utc)
-    async with async_session() as db:
-        result = await db.execute(
-            select(PrivateBet)
-            .where(
-                PrivateBet.status == PrivateBetStatus.VOTING,
-                PrivateBet.voting_deadline <= now,
-            )
-            .with_for_update()
-        )
-        bets = result.scalars().all()
-
-        for bet in bets:
-            total_votes = bet.yes_votes + bet.no_votes
-            if total_votes == 0 or bet.yes_votes == bet.no_votes:
-                # No votes or tie → cancel and refund
-                bet.status = PrivateBetStatus.CANCELLED
-                bet.resolved_at = now
-                p_result = await db.execute(
-                    select(PrivateBetParticipant).where(
-                        PrivateBetParticipant.bet_id == bet.id
-                    )
-                )
-                for p in p_result.scalars().all():
-                    p.payout = bet.stake_amount
-                    user = await db.get(User, p.user_id, with_for_update=True)
-                    if user:
-                        user.balance += bet.stake_amount
-                        db.add(
-                            Transaction(
-                                user_id=p.user_id,
-                                type=TransactionType.BET_REFUND,
-                                amount=bet.stake_amount,
-                                description=f"Возврат ставки: {bet.title[:80]}",
-                            )
-                        )
-                logger.info(f"Private bet cancelled (tie/no votes): {bet.id}")
-            else:
-                # Majority wins
-                winning = "yes" if bet.yes_votes > bet.no_votes else "no"
-                bet.status = PrivateBetStatus.RESOLVED
-                bet.resolution_outcome = winning
-                bet.resolved_at = now
-
-                total_pool = bet.total_pool
-                fee = (total_pool * FEE_RATE).quantize(Decimal("0.01"))
-                payout_pool = total_pool - fee
-
-                w_result = await db.execute(
-                    select(PrivateBetParticipant).where(
-                        PrivateBetParticipant.bet_id == bet.id,
-                        PrivateBetParticipant.outcome == winning,
-                    )
-                )
-                winners = w_result.scalars().all()
-                if winners:
-                    per_winner = (payout_pool / len(winners)).quantize(Decimal("0.01"))
-                    for w in winners:
-                        w.payout = per_winner
-                        user = await db.get(User, w.user_id, with_for_update=True)
-                        if user:
-                            user.balance += per_winner
-                            db.add(
-                                Transaction(
-                                    user_id=w.user_id,
-                                    type=TransactionType.BET_PAYOUT,
-                                    amount=per_winner,
-                                    description=f"Выигрыш в споре: {bet.title[:80]}",
-                                )
-                            )
-
-                logger.info(
-                    f"Private bet resolved by deadline: {bet.id}, outcome={winning}"
-                )
-
-        if bets:
-            await db.commit()
+    settled = 0
+    redis = await get_redis()
+    try:
+        async with async_session() as db:
+            settlement = SettlementService(db)
+            while chunk := await settlement.resolve_expired(now):
+                await check_lease()
+                await db.commit()
+                await invalidate_bet_caches(db, redis, chunk)
+                settled += len(chunk)
+    finally:
+        await redis.aclose()
+    if settled:
+        logger.info(f"Settled {settled} private bets past their voting deadline")
@@ -0,0 +1,80 @@
+"""Export ledger data as CSV or Parquet.
+
+Run inside the backend container:
+    python scripts/export_data.py ledger --day 2026-03-01 -o ledger.parquet
+    python scripts/export_data.py transactions --user <uuid> -o txs.csv
+    python scripts/export_data.py fills --market <uuid> --format parquet > fills.pq
+    python scripts/export_data.py history --market <uuid> > history.csv
+
+The format follows the output file's extension unless --format is given.
+Rows are streamed from a server-side cursor, so large exports use constant
+memory.
+"""
+
+import argparse
+import asyncio
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.export import (
+    EXPORT_FORMATS,
+    daily_ledger,
+    export_stream,
+    market_fills,
+    market_price_history,
+    user_transactions,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "dataset", choices=("ledger", "transactions", "fills", "history")
+    )
+    parser.add_argument("--day", type=date.fromisoformat, help="ledger: UTC day")
+    parser.add_argument("--user", type=uuid.UUID, help="transactions: user id")
+    parser.add_argument("--market", type=uuid.UUID, help="fills / history: market id")
+    parser.add_argument("--format", choices=EXPORT_FORMATS)
+    parser.add_argument("-o", "--output", type=Path, help="file (default: stdout)")
+    args = parser.parse_args()
+
+    required = {
+        "ledger": "day",
+        "transactions": "user",
+        "fills": "market",
+        "history": "market",
+    }[args.dataset]
+    if getattr(args, required) is None:
+        parser.error(f"{args.dataset} needs --{required}")
+    if args.format is None:
+        suffix = args.output.suffix.lstrip(".") if args.output else ""
+        args.format = suffix if suffix in EXPORT_FORMATS else "csv"
+    return args
+
+
+async def export(args: argparse.Namespace) -> None:
+    if args.dataset == "ledger":
+        query = daily_ledger(args.day)
+    elif args.dataset == "transactions":
+        query = user_transactions(args.user)
+    elif args.dataset == "fills":
+        query = market_fills(args.market, with_users=True)
+    else:
+        query = market_price_history(args.market)
+
+    out = args.output.open("wb") if args.output else sys.stdout.buffer
+    try:
+        async for chunk in export_stream(
+            query, args.format, settings.EXPORT_BATCH_ROWS
+        ):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(export(parse_args()))
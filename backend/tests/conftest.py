@@ -5,15 +5,16 @@ import time
 from urllib.parse import urlencode
 
 import pytest_asyncio
+from aiogram.methods import SendMessage
 from httpx import ASGITransport, AsyncClient
+from redis.asyncio import Redis
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import NullPool
 
-from redis.asyncio import Redis
-
 from app.core.config import settings
 from app.core.dependencies import get_db, get_redis_dep
+from app.core.redis import pool
 from app.main import app
 from app.models.base import Base
 
@@ -60,6 +61,42 @@ async def client(db: AsyncSession):
     app.dependency_overrides.clear()
 
 
+@pytest_asyncio.fixture(scope="function")
+async def redis():
+    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    yield redis
+    await redis.aclose()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def release_app_redis():
+    yield
+    # Jobs and services under test use the app pool; its connections are
+    # bound to this test's event loop
+    await pool.disconnect()
+
+
+class FakeBot:
+    """Records deliveries; `errors` maps chat id → exceptions to raise in turn."""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.delivered: list[int] = []
+        self.texts: list[str] = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        pending = self.errors.get(chat_id)
+        if pending:
+            raise pending.pop(0)
+        self.delivered.append(chat_id)
+        self.texts.append(text)
+
+
+def telegram_error(cls, **kwargs):
+    """A Telegram API exception of type `cls`, as raised by send_message."""
+    return cls(method=SendMessage(chat_id=0, text=""), message="test", **kwargs)
+
+
 def make_init_data(
     user_id: int = 123456789,
     first_name: str = "Test",
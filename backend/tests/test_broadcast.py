@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+from app.models.market import Market
+from app.models.user import User
+from app.services.broadcast import BroadcastService, Sender
+from app.tasks import scheduled
+from tests import conftest
+from tests.conftest import FakeBot, telegram_error
+
+
+@pytest_asyncio.fixture
+async def audience(db):
+    users = [
+        User(
+            id=uuid.uuid4(),
+            telegram_id=50000 + i,
+            first_name=f"Reader {i}",
+            referral_code=uuid.uuid4().hex[:8],
+            is_active=i != 0,
+        )
+        for i in range(7)
+    ]
+    db.add_all(users)
+    await db.commit()
+    # Chat ids of active users in send order
+    return [u.telegram_id for u in sorted(users, key=lambda u: u.id) if u.is_active]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_counts_results_and_retries_floods(db, redis, audience):
+    bot = FakeBot(
+        {
+            audience[0]: [telegram_error(TelegramRetryAfter, retry_after=1)],
+            audience[1]: [telegram_error(TelegramForbiddenError)],
+            audience[2]: [telegram_error(TelegramBadRequest)],
+        }
+    )
+    service = BroadcastService(db, redis, Sender(bot, redis, rate=1000))
+    service.page_size = 2
+
+    broadcast_id = await service.start("<b>Hello</b>")
+    report = await service.run(broadcast_id)
+
+    assert report["status"] == "done"
+    assert (report["delivered"], report["blocked"], report["failed"]) == (4, 1, 1)
+    assert sorted(bot.delivered) == sorted([audience[0], *audience[3:]])
+
+
+@pytest.mark.asyncio
+async def test_broadcast_resumes_from_checkpoint(db, redis, audience):
+    crashing = FakeBot({audience[4]: [RuntimeError("worker died")]})
+    service = BroadcastService(db, redis, Sender(crashing, redis, rate=1000))
+    service.page_size = 2
+    broadcast_id = await service.start("Digest")
+
+    with pytest.raises(RuntimeError):
+        await service.run(broadcast_id)
+    report = await service.report(broadcast_id)
+    assert (report["status"], report["delivered"]) == ("running", 4)
+
+    bot = FakeBot()
+    service.sender = Sender(bot, redis, rate=1000)
+    [report] = await service.resume_all()
+
+    # Only the page that was cut off and the ones after it are sent again
+    assert sorted(bot.delivered) == sorted(audience[4:])
+    assert (report["status"], report["delivered"]) == ("done", 6)
+    assert await service.resume_all() == []
+
+
+@pytest.mark.asyncio
+async def test_daily_digest_goes_out_as_a_broadcast(db, audience, monkeypatch):
+    db.add_all(
+        [
+            Market(
+                title="Will it <rain>?",
+                closes_at=datetime.now(timezone.utc) + timedelta(days=1),
+                liquidity_b=Decimal("100"),
+                total_volume=Decimal("10"),
+            ),
+            Market(
+                title="CLOB market",
+                closes_at=datetime.now(timezone.utc) + timedelta(days=1),
+                amm_type="clob",
+                last_trade_price_yes=Decimal("0.70"),
+            ),
+        ]
+    )
+    await db.commit()
+
+    bot = FakeBot()
+    monkeypatch.setattr(scheduled, "async_session", conftest.test_session)
+    monkeypatch.setattr(scheduled, "get_bot", lambda: bot)
+    monkeypatch.setattr(
+        scheduled, "Sender", lambda bot, redis: Sender(bot, redis, rate=1000)
+    )
+    # Unwrapped from @singleton, whose lease outlives the run by up to a minute
+    await scheduled.send_daily_digests.original_func.__wrapped__()
+
+    assert sorted(bot.delivered) == sorted(audience)
+    digest = bot.texts[0]
+    assert "Will it &lt;rain&gt;?\n     → <b>50%</b>" in digest
+    assert "CLOB market\n     → <b>70%</b>" in digest
@@ -0,0 +1,125 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from app.models.market import Market
+from tests.conftest import make_init_data
+
+
+@pytest_asyncio.fixture
+async def auth_headers(client):
+    init_data = make_init_data(user_id=200, first_name="Critic")
+    r = await client.post("/v1/auth/telegram", json={"init_data": init_data})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest_asyncio.fixture
+async def market(db):
+    m = Market(
+        id=uuid.uuid4(),
+        title="Talked-about market",
+        closes_at=datetime.now(timezone.utc) + timedelta(days=7),
+        liquidity_b=Decimal("100"),
+    )
+    db.add(m)
+    await db.commit()
+    return m
+
+
+@pytest.mark.asyncio
+async def test_comment_pages_and_threads(client, db, auth_headers, market):
+    url = f"/v1/markets/{market.id}/comments"
+
+    async def post(text, parent_id=None):
+        r = await client.post(
+            url, json={"text": text, "parent_id": parent_id}, headers=auth_headers
+        )
+        assert r.status_code == 200, r.text
+        return r.json()["id"]
+
+    roots = [await post(f"root {i}") for i in range(5)]
+    # The newest page is cached until the next comment
+    assert [
+        c["text"] for c in (await client.get(url, params={"limit": 2})).json()["items"]
+    ] == ["root 4", "root 3"]
+
+    reply = await post("reply", roots[4])
+    await post("reply to reply", reply)
+    await post("reply to root 0", roots[0])
+
+    first = (await client.get(url, params={"limit": 2})).json()
+    assert [c["text"] for c in first["items"]] == ["root 4", "root 3"]
+    assert first["items"][0]["reply_count"] == 1
+    [thread] = first["items"][0]["replies"]
+    assert (thread["text"], thread["first_name"]) == ("reply", "Critic")
+    # Nested replies are counted, then read through the replies endpoint
+    assert (thread["reply_count"], thread["replies"]) == (1, [])
+    assert first["prev_cursor"] is None
+
+    second = (
+        await client.get(url, params={"limit": 2, "before": first["next_cursor"]})
+    ).json()
+    assert [c["text"] for c in second["items"]] == ["root 2", "root 1"]
+    last = (
+        await client.get(url, params={"limit": 2, "before": second["next_cursor"]})
+    ).json()
+    assert [c["text"] for c in last["items"]] == ["root 0"]
+    assert [c["text"] for c in last["items"][0]["replies"]] == ["reply to root 0"]
+    assert last["next_cursor"] is None
+
+    # And back up toward newer comments
+    back = (
+        await client.get(url, params={"limit": 2, "after": last["prev_cursor"]})
+    ).json()
+    assert back == second
+    await db.refresh(market)
+    assert market.comment_count == 8
+
+    r = await client.post(
+        f"/v1/markets/{uuid.uuid4()}/comments",
+        json={"text": "wrong market", "parent_id": roots[0]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+    r = await client.post(
+        f"/v1/markets/{uuid.uuid4()}/comments",
+        json={"text": "no market"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_long_threads_show_a_preview_and_page_the_rest(
+    client, auth_headers, market
+):
+    url = f"/v1/markets/{market.id}/comments"
+
+    async def post(text, parent_id=None):
+        r = await client.post(
+            url, json={"text": text, "parent_id": parent_id}, headers=auth_headers
+        )
+        return r.json()["id"]
+
+    root = await post("root")
+    replies = [await post(f"reply {i}", root) for i in range(7)]
+    await post("nested", replies[0])
+
+    [item] = (await client.get(url)).json()["items"]
+    assert item["reply_count"] == 7
+    assert [c["text"] for c in item["replies"]] == ["reply 0", "reply 1", "reply 2"]
+
+    replies_url = f"/v1/comments/{root}/replies"
+    first = (await client.get(replies_url, params={"limit": 4})).json()
+    assert [c["text"] for c in first["items"]] == [f"reply {i}" for i in range(4)]
+    assert [c["text"] for c in first["items"][0]["replies"]] == ["nested"]
+    rest = (
+        await client.get(
+            replies_url, params={"limit": 4, "after": first["next_cursor"]}
+        )
+    ).json()
+    assert [c["text"] for c in rest["items"]] == ["reply 4", "reply 5", "reply 6"]
+    assert rest["next_cursor"] is None
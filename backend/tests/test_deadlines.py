@@ -0,0 +1,122 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from app.models.market import Market, MarketStatus
+from app.models.private_bet import PrivateBetStatus
+from app.models.user import User
+from app.services import deadlines
+from app.services.deadlines import DeadlineService
+from app.services.private_bet import PrivateBetService
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_deadlines(redis):
+    await redis.delete(deadlines.KEY, deadlines.WAKE_KEY)
+
+
+def _market(closes_in: float) -> Market:
+    return Market(
+        id=uuid.uuid4(),
+        title="Deadline Market",
+        closes_at=datetime.now(timezone.utc) + timedelta(seconds=closes_in),
+        liquidity_b=Decimal("100"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_due_markets_and_bets_close_in_one_pass(db, redis):
+    due = [_market(-1) for _ in range(3)]
+    later = _market(3600)
+    moved = _market(-1)
+    db.add_all([*due, later, moved])
+    user = User(
+        id=uuid.uuid4(),
+        telegram_id=70001,
+        first_name="Bettor",
+        referral_code=uuid.uuid4().hex[:8],
+        balance=Decimal("1000"),
+    )
+    db.add(user)
+    await db.commit()
+
+    bet = await PrivateBetService(db, redis).create_bet(
+        user.id,
+        "Lonely bet",
+        "",
+        Decimal("50"),
+        datetime.now(timezone.utc) + timedelta(hours=1),
+        "yes",
+    )
+    bet.closes_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    for market in [*due, later, moved]:
+        await deadlines.schedule(redis, deadlines.MARKET, market.id, market.closes_at)
+    await deadlines.schedule(redis, deadlines.BET, bet.id, bet.closes_at)
+    # Extended after its deadline was queued: must not close, and is re-queued
+    moved.closes_at = datetime.now(timezone.utc) + timedelta(hours=2)
+    await db.commit()
+
+    service = DeadlineService(db, redis)
+    service.batch_size = 2
+    assert await service.close_due() == 4
+
+    for market in due:
+        await db.refresh(market)
+        assert market.status == MarketStatus.TRADING_CLOSED
+    for market in (later, moved):
+        await db.refresh(market)
+        assert market.status == MarketStatus.OPEN
+    await db.refresh(bet)
+    await db.refresh(user)
+    # One-sided bet: cancelled and the stake refunded
+    assert bet.status == PrivateBetStatus.CANCELLED
+    assert user.balance == Decimal("1000")
+
+    queued = dict(await redis.zrange(deadlines.KEY, 0, -1, withscores=True))
+    assert queued == {
+        f"market:{later.id}": later.closes_at.timestamp(),
+        f"market:{moved.id}": moved.closes_at.timestamp(),
+    }
+
+
+@pytest.mark.asyncio
+async def test_worker_sleeps_until_deadline_and_wakes_for_new_ones(db, redis):
+    market = _market(3600)
+    soon = _market(0.6)
+    db.add_all([market, soon])
+    await db.commit()
+    await deadlines.schedule(redis, deadlines.MARKET, market.id, market.closes_at)
+
+    started = time.time()
+    worker = asyncio.create_task(DeadlineService(db, redis).run(until=started + 1.5))
+    await asyncio.sleep(0.2)
+    # Scheduled while the worker sleeps towards the hour-long deadline
+    await deadlines.schedule(redis, deadlines.MARKET, soon.id, soon.closes_at)
+    closed = await worker
+
+    assert closed == 1
+    assert time.time() - started >= 1.5
+    await db.refresh(soon)
+    await db.refresh(market)
+    assert soon.status == MarketStatus.TRADING_CLOSED
+    assert market.status == MarketStatus.OPEN
+
+
+@pytest.mark.asyncio
+async def test_sweep_closes_lost_deadlines_and_reseeds(db, redis):
+    overdue = _market(-60)
+    upcoming = _market(3600)
+    upcoming_id = upcoming.id
+    db.add_all([overdue, upcoming])
+    await db.commit()
+
+    assert await DeadlineService(db, redis).sweep() == 1
+
+    await db.refresh(overdue)
+    assert overdue.status == MarketStatus.TRADING_CLOSED
+    assert await redis.zrange(deadlines.KEY, 0, -1) == [f"market:{upcoming_id}"]
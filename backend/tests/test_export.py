@@ -0,0 +1,83 @@
+import csv
+import io
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.services import export
+from tests import conftest
+from tests.conftest import make_init_data
+
+
+@pytest_asyncio.fixture
+async def ledger(db):
+    user = User(
+        id=uuid.uuid4(),
+        telegram_id=40001,
+        first_name="Exporter",
+        referral_code=uuid.uuid4().hex[:8],
+    )
+    db.add(user)
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.add_all(
+        Transaction(
+            user_id=user.id,
+            type=TransactionType.DAILY,
+            amount=Decimal(i),
+            description=f"Daily bonus {i}",
+            created_at=start + timedelta(minutes=i),
+        )
+        for i in range(1, 6)
+    )
+    await db.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_csv_is_encoded_batch_by_batch(db, ledger):
+    query = export.user_transactions(ledger.id)
+    chunks = [c async for c in export.iter_csv(db, query, batch_size=2)]
+
+    # Header + rows 1-2, rows 3-4, row 5
+    assert len(chunks) == 3
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [r["amount"] for r in rows] == ["1.00", "2.00", "3.00", "4.00", "5.00"]
+    assert rows[0]["type"] == "daily"
+
+
+@pytest.mark.asyncio
+async def test_parquet_writes_one_row_group_per_batch(db, ledger):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    query = export.user_transactions(ledger.id)
+    data = b"".join([c async for c in export.iter_parquet(db, query, batch_size=2)])
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column("amount").to_pylist() == [Decimal(i) for i in range(1, 6)]
+    assert table.column("type").to_pylist() == ["daily"] * 5
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_own_ledger(client, ledger, monkeypatch):
+    monkeypatch.setattr(export, "async_session", conftest.test_session)
+    init_data = make_init_data(user_id=ledger.telegram_id)
+    r = await client.post("/v1/auth/telegram", json={"init_data": init_data})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = await client.get("/v1/users/me/transactions/export", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert 'filename="transactions.csv"' in r.headers["content-disposition"]
+    assert len(list(csv.DictReader(io.StringIO(r.text)))) == 5
+
+    r = await client.get(
+        "/v1/users/me/transactions/export?format=xlsx", headers=headers
+    )
+    assert r.status_code == 400
@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+from app.services.fixed_point import (
+    BPS,
+    CENT,
+    PRICE_TICK,
+    ROUND_CEILING,
+    ROUND_FLOOR,
+    SCALE,
+    float_to_decimal,
+    float_to_micros,
+    mul_div,
+    to_decimal,
+    to_micros,
+)
+
+
+def test_round_trip_decimal():
+    assert to_micros(Decimal("12.345678")) == 12_345_678
+    assert to_decimal(12_345_678) == Decimal("12.345678")
+    assert to_decimal(to_micros(Decimal("0.07"), CENT), 2) == Decimal("0.07")
+
+
+def test_mul_div_rounding_modes():
+    # 1/3 PRC on the cent grid
+    assert mul_div(SCALE, 1, 3, CENT, ROUND_FLOOR) == 330_000
+    assert mul_div(SCALE, 1, 3, CENT, ROUND_CEILING) == 340_000
+    assert mul_div(SCALE, 1, 3, CENT) == 330_000
+    # Ties go to the even cent
+    assert mul_div(5_000, 1, 1, CENT) == 0
+    assert mul_div(15_000, 1, 1, CENT) == 20_000
+
+
+def test_fee_in_basis_points():
+    amount_u = to_micros(Decimal("33.33"), CENT)
+    fee_u = mul_div(amount_u, 200, BPS, CENT)
+    assert to_decimal(fee_u, 2) == Decimal("0.67")
+    assert to_decimal(amount_u - fee_u, 2) == Decimal("32.66")
+
+
+def test_ceiling_reservation_telescopes():
+    # Reserving 0.33 × 7 shares, released in partial fills, nets to zero
+    price_u = to_micros(Decimal("0.33"))
+
+    def reserve(qty_u):
+        return mul_div(price_u, qty_u, SCALE, CENT, ROUND_CEILING)
+
+    total = reserve(7 * SCALE)
+    released = 0
+    filled = 0
+    for step in (SCALE // 3, 2 * SCALE, 1_234_567, 7 * SCALE):
+        after = min(7 * SCALE, filled + step)
+        released += reserve(after) - reserve(filled)
+        filled = after
+    assert released == total
+
+
+def test_float_boundary():
+    assert float_to_micros(1.9999999, rounding=ROUND_FLOOR) == 1_999_999
+    assert float_to_micros(0.1 + 0.2, CENT) == 300_000
+    assert float_to_decimal(0.123456, 4) == Decimal("0.1235")
+    assert PRICE_TICK * 10_000 == SCALE
@@ -0,0 +1,69 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from redis.asyncio import Redis
+
+from app.core.config import DEFAULT_INVITE_CODE_KEY, Settings, settings
+from app.models.private_bet import PrivateBet
+from app.models.user import User
+from app.services.invite_codes import ALPHABET, MIN_LENGTH, encode
+from app.services.private_bet import PrivateBetService
+
+
+def test_codes_are_distinct_and_grow_past_six_letters():
+    six = len(ALPHABET) ** MIN_LENGTH
+    numbers = [*range(20000), *range(six - 20000, six + 20000)]
+    codes = [encode(n) for n in numbers]
+
+    assert len(set(codes)) == len(codes)
+    assert {len(c) for c in codes[:-20000]} == {6}
+    assert {len(c) for c in codes[-20000:]} == {7}
+    assert all(set(c) <= set(ALPHABET) for c in codes)
+    # Neighbouring numbers do not give guessable neighbouring codes
+    assert sum(a[:4] == b[:4] for a, b in zip(codes, codes[1:20000])) < 10
+
+
+def test_production_refuses_the_default_key():
+    for key in ("", DEFAULT_INVITE_CODE_KEY):
+        with pytest.raises(ValueError, match="INVITE_CODE_KEY"):
+            Settings(APP_ENV="production", INVITE_CODE_KEY=key)
+    assert (
+        Settings(APP_ENV="production", INVITE_CODE_KEY="k3y").INVITE_CODE_KEY == "k3y"
+    )
+    assert Settings(APP_ENV="test", INVITE_CODE_KEY="").INVITE_CODE_KEY == (
+        DEFAULT_INVITE_CODE_KEY
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_bet_skips_a_code_taken_before_the_allocator(db):
+    user = User(
+        id=uuid.uuid4(),
+        telegram_id=90001,
+        first_name="Creator",
+        referral_code=uuid.uuid4().hex[:8],
+        balance=Decimal("1000"),
+    )
+    closes_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    legacy = PrivateBet(
+        title="Old bet",
+        stake_amount=Decimal("10"),
+        invite_code=encode(0),
+        created_by=user.id,
+        closes_at=closes_at,
+        voting_deadline=closes_at,
+    )
+    db.add_all([user, legacy])
+    await db.commit()
+
+    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        bet = await PrivateBetService(db, redis).create_bet(
+            user.id, "New bet", "", Decimal("10"), closes_at, "yes"
+        )
+    finally:
+        await redis.aclose()
+
+    assert bet.invite_code == encode(1)
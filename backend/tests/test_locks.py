@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text
+
+from app.models.job_fence import JobFence
+from app.tasks.locks import Lease, LeaseLost, check_lease, job_stats, singleton
+from tests import conftest
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_leases(redis):
+    keys = await redis.keys("lease:*") + await redis.keys("jobs*")
+    if keys:
+        await redis.delete(*keys)
+
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive_and_fences_stale_holders(redis):
+    first = Lease(redis, "test", ttl=1)
+    second = Lease(redis, "test", ttl=1)
+
+    assert await first.acquire()
+    assert not await second.acquire()
+    await first.check()
+
+    # First holder stalls past its TTL; the next one gets a newer token
+    await asyncio.sleep(1.1)
+    assert await second.acquire()
+    assert second.token > first.token
+    assert not await first.renew()
+    with pytest.raises(LeaseLost):
+        await first.check()
+
+    # Releasing a lease someone else holds leaves it alone
+    await first.release()
+    await second.check()
+    await second.release()
+    assert await first.acquire()
+
+
+@pytest.mark.asyncio
+async def test_singleton_job_runs_once_per_tick(redis):
+    runs = []
+    started = asyncio.Event()
+    finish = asyncio.Event()
+
+    @singleton()
+    async def nightly_job():
+        await check_lease()
+        runs.append(1)
+        started.set()
+        await finish.wait()
+        return "done"
+
+    first = asyncio.create_task(nightly_job())
+    await started.wait()
+    # Overlapping run, then a second scheduler firing the same tick
+    assert await nightly_job() is None
+    finish.set()
+    assert await first == "done"
+    assert await nightly_job() is None
+
+    assert runs == [1]
+    [stats] = await job_stats(redis)
+    assert (stats["name"], stats["runs"], stats["skipped"]) == ("nightly_job", 1, 2)
+    assert stats["lease_lost"] == 0
+
+
+@pytest.mark.asyncio
+async def test_superseded_job_cannot_write(db, redis):
+    stalled = asyncio.Event()
+    resume = asyncio.Event()
+    runs = []
+
+    @singleton()
+    async def sweep(stall: bool = False):
+        if stall:
+            stalled.set()
+            await resume.wait()
+        async with conftest.test_session() as session:
+            await session.execute(text("SELECT 1"))
+            await session.commit()
+        runs.append(stall)
+        return "done"
+
+    first = asyncio.create_task(sweep(stall=True))
+    await stalled.wait()
+    # The first worker's lease lapses while it stalls; another one takes over
+    await redis.delete("lease:job:sweep")
+    assert await sweep() == "done"
+
+    resume.set()
+    with pytest.raises(LeaseLost):
+        await first
+
+    assert runs == [False]
+    fence = await db.scalar(select(JobFence.token).where(JobFence.name == "job:sweep"))
+    assert fence == int(await redis.get("lease:job:sweep"))
+    [stats] = await job_stats(redis)
+    assert (stats["runs"], stats["lease_lost"]) == (2, 1)
@@ -3,8 +3,10 @@ from decimal import Decimal
 
 import pytest
 
-from app.services.market_maker.base import MarketState
+from app.services.market_maker.base import MarketState, MultiOutcomeState
 from app.services.market_maker.lmsr import LMSRMarketMaker
+from app.services.market_maker.lmsr_multi import MultiOutcomeLMSRMarketMaker
+from app.services.market_maker.ls_lmsr import LiquiditySensitiveLMSRMarketMaker
 
 
 @pytest.fixture
@@ -104,3 +106,159 @@ def test_get_shares_for_amount(mm, initial_state):
 def test_zero_amount_returns_zero_shares(mm, initial_state):
     shares = mm.get_shares_for_amount(initial_state, "yes", 0)
     assert shares == 0.0
+
+
+@pytest.fixture
+def multi_mm():
+    return MultiOutcomeLMSRMarketMaker()
+
+
+@pytest.fixture
+def race_state():
+    return MultiOutcomeState(
+        outcomes=[f"candidate_{i}" for i in range(8)],
+        q=[Decimal("0")] * 8,
+        liquidity_b=Decimal("100"),
+    )
+
+
+def test_multi_initial_prices_are_uniform(multi_mm, race_state):
+    prices = multi_mm.get_prices(race_state)
+    assert len(prices) == 8
+    assert all(abs(p - 1 / 8) < 1e-9 for p in prices)
+
+
+def test_multi_prices_sum_to_one_after_trades(multi_mm, race_state):
+    race_state.q = [Decimal(str(q)) for q in (120, 0, 35, 10, 0, 0, 5, 400)]
+    assert abs(sum(multi_mm.get_prices(race_state)) - 1.0) < 1e-9
+
+
+def test_multi_matches_binary_lmsr(multi_mm, mm):
+    binary = MarketState(
+        q_yes=Decimal("30"), q_no=Decimal("10"), liquidity_b=Decimal("100")
+    )
+    multi = MultiOutcomeState(
+        outcomes=["yes", "no"],
+        q=[Decimal("30"), Decimal("10")],
+        liquidity_b=Decimal("100"),
+    )
+    for outcome in ("yes", "no"):
+        assert (
+            abs(multi_mm.get_price(multi, outcome) - mm.get_price(binary, outcome))
+            < 1e-9
+        )
+        assert (
+            abs(
+                multi_mm.get_cost(multi, outcome, 25.0)
+                - mm.get_cost(binary, outcome, 25.0)
+            )
+            < 1e-9
+        )
+
+
+def test_multi_shares_for_amount_inverts_cost(multi_mm, race_state):
+    race_state.q[3] = Decimal("250")
+    for outcome in ("candidate_0", "candidate_3"):
+        for amount in (0.5, 100.0, 5000.0):
+            shares = multi_mm.get_shares_for_amount(race_state, outcome, amount)
+            cost = multi_mm.get_cost(race_state, outcome, shares)
+            assert abs(cost - amount) < 1e-6
+
+
+def test_multi_buy_raises_only_target_price(multi_mm, race_state):
+    before = multi_mm.get_prices(race_state)
+    race_state.q[2] += Decimal("50")
+    after = multi_mm.get_prices(race_state)
+    assert after[2] > before[2]
+    assert all(after[i] < before[i] for i in range(8) if i != 2)
+
+
+def test_multi_round_trip(multi_mm, race_state):
+    cost = multi_mm.get_cost(race_state, "candidate_5", 40.0)
+    race_state.q[5] += Decimal("40")
+    revenue = multi_mm.get_sale_revenue(race_state, "candidate_5", 40.0)
+    assert abs(revenue - cost) < 1e-6
+
+
+def test_multi_unknown_outcome(multi_mm, race_state):
+    with pytest.raises(ValueError):
+        multi_mm.get_price(race_state, "yes")
+
+
+@pytest.fixture
+def ls_mm():
+    return LiquiditySensitiveLMSRMarketMaker(alpha=0.03)
+
+
+def test_ls_lmsr_matches_lmsr_below_floor(ls_mm, mm, initial_state):
+    for outcome in ("yes", "no"):
+        assert ls_mm.get_price(initial_state, outcome) == mm.get_price(
+            initial_state, outcome
+        )
+        assert (
+            abs(
+                ls_mm.get_cost(initial_state, outcome, 10.0)
+                - mm.get_cost(initial_state, outcome, 10.0)
+            )
+            < 1e-9
+        )
+
+
+def test_ls_lmsr_deep_market_moves_less(ls_mm):
+    quiet = MarketState(
+        q_yes=Decimal("0"), q_no=Decimal("0"), liquidity_b=Decimal("20")
+    )
+    deep = MarketState(
+        q_yes=Decimal("20000"), q_no=Decimal("20000"), liquidity_b=Decimal("20")
+    )
+
+    def price_move(state):
+        before = ls_mm.get_price(state, "yes")
+        shares = ls_mm.get_shares_for_amount(state, "yes", 100.0)
+        after = MarketState(
+            q_yes=state.q_yes + Decimal(str(shares)),
+            q_no=state.q_no,
+            liquidity_b=state.liquidity_b,
+        )
+        return ls_mm.get_price(after, "yes") - before
+
+    assert price_move(deep) < price_move(quiet) / 10
+
+
+def test_ls_lmsr_prices_include_vig(ls_mm):
+    state = MarketState(
+        q_yes=Decimal("3000"), q_no=Decimal("2500"), liquidity_b=Decimal("20")
+    )
+    total = ls_mm.get_price(state, "yes") + ls_mm.get_price(state, "no")
+    assert 1.0 < total <= 1.0 + 0.03 * 2 * math.log(2) + 1e-9
+
+
+def test_ls_lmsr_price_is_cost_derivative(ls_mm):
+    state = MarketState(
+        q_yes=Decimal("3000"), q_no=Decimal("2500"), liquidity_b=Decimal("20")
+    )
+    h = 1e-4
+    numeric = ls_mm.get_cost(state, "no", h) / h
+    assert abs(numeric - ls_mm.get_price(state, "no")) < 1e-4
+
+
+def test_ls_lmsr_shares_for_amount_inverts_cost(ls_mm):
+    state = MarketState(
+        q_yes=Decimal("5000"), q_no=Decimal("4000"), liquidity_b=Decimal("20")
+    )
+    for outcome in ("yes", "no"):
+        for amount in (1.0, 250.0, 10000.0):
+            shares = ls_mm.get_shares_for_amount(state, outcome, amount)
+            cost = ls_mm.get_cost(state, outcome, shares)
+            assert abs(cost - amount) < 1e-4
+
+
+def test_ls_lmsr_round_trip(ls_mm):
+    state = MarketState(
+        q_yes=Decimal("1500"), q_no=Decimal("900"), liquidity_b=Decimal("20")
+    )
+    cost = ls_mm.get_cost(state, "yes", 75.0)
+    after = MarketState(
+        q_yes=state.q_yes + Decimal("75"), q_no=state.q_no, liquidity_b=Decimal("20")
+    )
+    assert abs(ls_mm.get_sale_revenue(after, "yes", 75.0) - cost) < 1e-6
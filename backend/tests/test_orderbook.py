@@ -0,0 +1,563 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis
+from sqlalchemy import delete, func, literal, select, text
+
+from app.core.config import settings
+from app.models.ledger import LedgerPosting
+from app.models.market import Market
+from app.models.order import Order, OrderSide
+from app.models.user import User
+from app.models.user_stats import UserStats
+from app.services.ledger import LedgerService, user_account
+from app.services.order_book import (
+    OrderBookService,
+    _book_side_query,
+    _resting_orders_query,
+)
+from app.services.resolution import ResolutionService
+from app.services.user_stats import UserStatsService
+from tests.conftest import engine, make_init_data
+
+HISTORY_ROWS = int(os.environ.get("EXPLAIN_HISTORY_ROWS", "200000"))
+
+
+@pytest_asyncio.fixture
+async def auth_token(client):
+    init_data = make_init_data(user_id=300, first_name="Maker")
+    r = await client.post("/v1/auth/telegram", json={"init_data": init_data})
+    return r.json()["access_token"], r.json()["user"]["id"]
+
+
+@pytest_asyncio.fixture
+async def taker_token(client):
+    init_data = make_init_data(user_id=301, first_name="Taker")
+    r = await client.post("/v1/auth/telegram", json={"init_data": init_data})
+    return r.json()["access_token"], r.json()["user"]["id"]
+
+
+@pytest_asyncio.fixture
+async def clob_market(db):
+    m = Market(
+        id=uuid.uuid4(),
+        title="CLOB Market",
+        description="Test",
+        category="test",
+        closes_at=datetime.now(timezone.utc) + timedelta(days=7),
+        amm_type="clob",
+    )
+    db.add(m)
+    await db.commit()
+    await db.refresh(m)
+    return m
+
+
+def _ladder(*prices):
+    return [{"intent": "buy_yes", "price": str(p), "quantity": "10"} for p in prices]
+
+
+@pytest.mark.asyncio
+async def test_batch_place_reserves_once_per_order(client, db, auth_token, clob_market):
+    token, user_id = auth_token
+    r = await client.post(
+        "/v1/orderbook/orders/batch",
+        json={"market_id": str(clob_market.id), "orders": _ladder(0.40, 0.41, 0.42)},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200
+    assert [o["status"] for o in r.json()["orders"]] == ["open"] * 3
+
+    user = await db.get(User, uuid.UUID(user_id))
+    await db.refresh(user)
+    assert user.reserved_balance == Decimal("12.30")
+
+
+@pytest.mark.asyncio
+async def test_batch_place_is_atomic(client, db, auth_token, clob_market):
+    token, _ = auth_token
+    orders = _ladder(0.40) + [{"intent": "sell_yes", "price": "0.60", "quantity": "5"}]
+    r = await client.post(
+        "/v1/orderbook/orders/batch",
+        json={"market_id": str(clob_market.id), "orders": orders},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 400
+
+    # The request session is discarded without commit
+    await db.rollback()
+    count = await db.scalar(select(func.count()).select_from(Order))
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_replace_swaps_ladder(client, db, auth_token, clob_market):
+    token, user_id = auth_token
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post(
+        "/v1/orderbook/orders/batch",
+        json={"market_id": str(clob_market.id), "orders": _ladder(0.40, 0.41)},
+        headers=headers,
+    )
+
+    r = await client.post(
+        "/v1/orderbook/orders/replace",
+        json={"market_id": str(clob_market.id), "orders": _ladder(0.45)},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert len(data["cancelled"]) == 2
+    assert len(data["orders"]) == 1
+
+    user = await db.get(User, uuid.UUID(user_id))
+    await db.refresh(user)
+    assert user.reserved_balance == Decimal("4.50")
+
+
+@pytest.mark.asyncio
+async def test_batch_cancel_by_side(client, db, auth_token, clob_market):
+    token, user_id = auth_token
+    headers = {"Authorization": f"Bearer {token}"}
+    orders = _ladder(0.40) + [{"intent": "buy_no", "price": "0.30", "quantity": "10"}]
+    await client.post(
+        "/v1/orderbook/orders/batch",
+        json={"market_id": str(clob_market.id), "orders": orders},
+        headers=headers,
+    )
+
+    # buy_no rests on the ask side of the YES book
+    r = await client.post(
+        "/v1/orderbook/orders/cancel",
+        json={"market_id": str(clob_market.id), "side": "buy"},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    assert len(r.json()["cancelled"]) == 1
+
+    result = await db.execute(
+        select(Order.status).where(Order.market_id == clob_market.id)
+    )
+    assert sorted(s.value for s in result.scalars()) == ["cancelled", "open"]
+
+    user = await db.get(User, uuid.UUID(user_id))
+    await db.refresh(user)
+    assert user.reserved_balance == Decimal("3.00")
+
+
+@pytest.mark.asyncio
+async def test_batch_cancel_requires_filter(client, auth_token):
+    token, _ = auth_token
+    r = await client.post(
+        "/v1/orderbook/orders/cancel",
+        json={},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 422
+
+
+async def _rest_ask(client, token, market, price="0.60", quantity="5"):
+    # buy_no @ 1-P rests as a YES ask @ P
+    no_price = str(Decimal("1") - Decimal(price))
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={
+            "market_id": str(market.id),
+            "intent": "buy_no",
+            "price": no_price,
+            "quantity": quantity,
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_ioc_cancels_remainder(client, db, auth_token, taker_token, clob_market):
+    await _rest_ask(client, auth_token[0], clob_market)
+    token, user_id = taker_token
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={
+            "market_id": str(clob_market.id),
+            "intent": "buy_yes",
+            "price": "0.60",
+            "quantity": "8",
+            "time_in_force": "ioc",
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["status"] == "cancelled"
+    assert data["filled_quantity"] == 5
+
+    user = await db.get(User, uuid.UUID(user_id))
+    await db.refresh(user)
+    assert user.reserved_balance == Decimal("0")
+
+
+@pytest.mark.asyncio
+async def test_ioc_without_liquidity_writes_nothing(
+    client, db, auth_token, clob_market
+):
+    token, _ = auth_token
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={
+            "market_id": str(clob_market.id),
+            "intent": "buy_yes",
+            "price": "0.60",
+            "quantity": "8",
+            "time_in_force": "ioc",
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200
+    assert r.json()["order_id"] is None
+    assert await db.scalar(select(func.count()).select_from(Order)) == 0
+
+
+@pytest.mark.asyncio
+async def test_fok_and_post_only_reject(
+    client, db, auth_token, taker_token, clob_market
+):
+    await _rest_ask(client, auth_token[0], clob_market)
+    headers = {"Authorization": f"Bearer {taker_token[0]}"}
+    base = {"market_id": str(clob_market.id), "intent": "buy_yes", "price": "0.60"}
+
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={**base, "quantity": "8", "time_in_force": "fok"},
+        headers=headers,
+    )
+    assert r.status_code == 400
+
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={**base, "quantity": "1", "time_in_force": "post_only"},
+        headers=headers,
+    )
+    assert r.status_code == 400
+    # Crossing one's own ask counts as crossing too
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={**base, "quantity": "1", "time_in_force": "post_only"},
+        headers={"Authorization": f"Bearer {auth_token[0]}"},
+    )
+    assert r.status_code == 400
+
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={**base, "quantity": "5", "time_in_force": "fok"},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    assert r.json()["status"] == "filled"
+
+
+@pytest.mark.asyncio
+async def test_gtt_sweeper_releases_reserves(client, db, auth_token, clob_market):
+    token, user_id = auth_token
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    r = await client.post(
+        "/v1/orderbook/orders/batch",
+        json={
+            "market_id": str(clob_market.id),
+            "orders": [
+                {
+                    "intent": "buy_yes",
+                    "price": "0.33",
+                    "quantity": "7",
+                    "time_in_force": "gtt",
+                    "expires_at": expires_at.isoformat(),
+                },
+                {"intent": "buy_yes", "price": "0.20", "quantity": "10"},
+            ],
+        },
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200
+
+    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    service = OrderBookService(db, redis)
+    market_id = clob_market.id
+    detail_url = f"/v1/markets/{market_id}"
+    assert (await client.get(detail_url)).json()["open_order_count"] == 2
+    assert await service.expire_orders(expires_at - timedelta(seconds=1), 10) == 0
+    assert await service.expire_orders(expires_at + timedelta(minutes=1), 10) == 1
+    assert not await redis.exists(f"market:{market_id}")
+    assert (await client.get(detail_url)).json()["open_order_count"] == 1
+    await redis.aclose()
+
+    db.expire_all()
+    user = await db.get(User, uuid.UUID(user_id))
+    assert user.reserved_balance == Decimal("2.00")
+    result = await db.execute(select(Order.status).order_by(Order.price))
+    assert [s.value for s in result.scalars()] == ["open", "expired"]
+
+
+@pytest.mark.asyncio
+async def test_ledger_journals_order_flow(
+    client, db, auth_token, taker_token, clob_market
+):
+    await _rest_ask(client, auth_token[0], clob_market)
+    token, taker_id = taker_token
+    headers = {"Authorization": f"Bearer {token}"}
+    # Mints 5 against the ask, rests 3 and cancels them
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={
+            "market_id": str(clob_market.id),
+            "intent": "buy_yes",
+            "price": "0.65",
+            "quantity": "8",
+        },
+        headers=headers,
+    )
+    assert r.json()["filled_quantity"] == 5
+    r = await client.post(
+        "/v1/orderbook/orders/cancel",
+        json={"market_id": str(clob_market.id)},
+        headers=headers,
+    )
+    assert len(r.json()["cancelled"]) == 1
+
+    unbalanced = await db.execute(
+        select(LedgerPosting.entry_id)
+        .group_by(LedgerPosting.entry_id)
+        .having(func.sum(LedgerPosting.amount) != 0)
+    )
+    assert unbalanced.all() == []
+    ledger = LedgerService(db)
+    assert await ledger.reconcile(batch_size=1) == []
+
+    # 5 YES @ 0.60 + 5 NO @ 0.40 collateral, 2% fee on the 5 PRC minted
+    clob = await ledger.balances(["house:clob", "house:fees"])
+    assert clob == {"house:clob": Decimal("5.00"), "house:fees": Decimal("0.10")}
+
+    assert await ledger.snapshot(timedelta(0)) > 0
+    await db.commit()
+    before_deposit = datetime.now(timezone.utc)
+    r = await client.post(
+        "/v1/users/me/deposit", json={"amount": "100"}, headers=headers
+    )
+    assert r.status_code == 200
+
+    taker = await db.get(User, uuid.UUID(taker_id))
+    await db.refresh(taker)
+    account = user_account(taker.id, "available")
+    assert (await ledger.balances([account]))[account] == taker.balance
+    past = await ledger.balances([account], at=before_deposit)
+    assert past[account] == taker.balance - 100
+    assert await ledger.reconcile(batch_size=10) == []
+
+    # Drift in the cached columns surfaces instead of being clamped away
+    taker.balance -= 1
+    taker.reserved_balance = Decimal("-1.00")
+    await db.commit()
+    [mismatch] = await ledger.reconcile(batch_size=10)
+    assert mismatch["book"] == "reserved"
+    assert mismatch["journal"] == Decimal("0")
+
+
+@pytest.mark.asyncio
+async def test_market_counters_follow_order_flow(
+    client, db, auth_token, taker_token, clob_market
+):
+    maker_headers = {"Authorization": f"Bearer {auth_token[0]}"}
+    taker_headers = {"Authorization": f"Bearer {taker_token[0]}"}
+
+    async def counters():
+        await db.refresh(clob_market)
+        return clob_market.open_order_count, clob_market.total_traders
+
+    await _rest_ask(client, auth_token[0], clob_market)
+    assert await counters() == (1, 0)
+
+    # Fills the resting ask and rests the remaining 3
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={
+            "market_id": str(clob_market.id),
+            "intent": "buy_yes",
+            "price": "0.65",
+            "quantity": "8",
+        },
+        headers=taker_headers,
+    )
+    assert r.json()["filled_quantity"] == 5
+    assert await counters() == (1, 2)
+
+    # Trading again does not make the maker a new trader
+    await _rest_ask(client, auth_token[0], clob_market, price="0.90")
+    r = await client.post(
+        "/v1/orderbook/orders",
+        json={
+            "market_id": str(clob_market.id),
+            "intent": "buy_no",
+            "price": "0.05",
+            "quantity": "5",
+        },
+        headers=maker_headers,
+    )
+    order_id = r.json()["order_id"]
+    assert await counters() == (3, 2)
+
+    # The cached market detail follows a single cancel too
+    detail_url = f"/v1/markets/{clob_market.id}"
+    assert (await client.get(detail_url)).json()["open_order_count"] == 3
+    r = await client.delete(f"/v1/orderbook/orders/{order_id}", headers=maker_headers)
+    assert r.status_code == 200
+    assert (await client.get(detail_url)).json()["open_order_count"] == 2
+    r = await client.delete(f"/v1/orderbook/orders/{order_id}", headers=maker_headers)
+    assert r.status_code == 400
+    r = await client.post(
+        "/v1/orderbook/orders/cancel",
+        json={"market_id": str(clob_market.id)},
+        headers=taker_headers,
+    )
+    assert len(r.json()["cancelled"]) == 1
+    assert await counters() == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_mint_fill_books_each_sides_own_pnl(
+    client, db, auth_token, taker_token, clob_market
+):
+    (maker_token, maker_id), (taker_token_, taker_id) = auth_token, taker_token
+    ids = [uuid.UUID(maker_id), uuid.UUID(taker_id)]
+    market_id = clob_market.id
+
+    async def balances():
+        db.expire_all()
+        return [await db.scalar(select(User.balance).where(User.id == i)) for i in ids]
+
+    before = await balances()
+    for token, intent, price in (
+        (maker_token, "buy_yes", "0.60"),
+        # Rests on the sell side of the book as a YES ask @ 0.60: a mint
+        (taker_token_, "buy_no", "0.40"),
+    ):
+        r = await client.post(
+            "/v1/orderbook/orders",
+            json={
+                "market_id": str(market_id),
+                "intent": intent,
+                "price": price,
+                "quantity": "10",
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert r.status_code == 200, r.text
+    assert r.json()["filled_quantity"] == 10
+
+    r = await client.get(
+        "/v1/analytics/me/stats", headers={"Authorization": f"Bearer {taker_token_}"}
+    )
+    stats = r.json()
+    paid = before[1] - (await balances())[1]
+    # 4 PRC for the NO side plus half of the fee
+    assert Decimal("4") < paid < Decimal("4.2")
+    assert stats["active_positions"] == 1
+    assert Decimal(str(stats["total_invested"])) == paid
+    assert stats["transaction_summary"]["order_fill"]["total"] == -float(paid)
+
+    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    await ResolutionService(db, redis).resolve_market(market_id, "yes")
+    await redis.aclose()
+
+    # Realized PnL is exactly what each user's balance moved by, fees included
+    moved = [after - b for after, b in zip(await balances(), before)]
+    service = UserStatsService(db)
+    maker, taker = [await service.get(i) for i in ids]
+    assert [maker.realized_pnl, taker.realized_pnl] == moved
+    assert (maker.wins, maker.losses) == (1, 0)
+    assert (taker.wins, taker.losses, taker.current_streak) == (0, 1, -1)
+    assert taker.fill_bought == paid
+    assert maker.fees + taker.fees == Decimal("0.20")
+
+    # The ledger rows rebuild the same stats
+    columns = [c.name for c in UserStats.__table__.columns if c.name != "updated_at"]
+    incremental = [[getattr(st, c) for c in columns] for st in (maker, taker)]
+    await db.execute(delete(UserStats))
+    await db.commit()
+    db.expunge_all()
+    assert await service.rebuild_all(batch_size=10, user_ids=ids) == 2
+    rebuilt = [await service.get(i) for i in ids]
+    assert [[getattr(st, c) for c in columns] for st in rebuilt] == incremental
+
+
+async def _explain(db, stmt) -> str:
+    """Generic plan of `stmt` prepared with $n parameters, as asyncpg sends it,
+    so the planner cannot lean on the bound values."""
+    dialect = db.bind.dialect
+    sql = stmt.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    args = ", ".join(
+        str(
+            literal(sql.params[name], sql.binds[name].type).compile(
+                dialect=dialect, compile_kwargs={"literal_binds": True}
+            )
+        )
+        for name in sql.positiontup
+    )
+    conn = await db.connection()
+    await conn.exec_driver_sql("SET LOCAL plan_cache_mode = force_generic_plan")
+    await conn.exec_driver_sql(f"PREPARE explained AS {sql}")
+    result = await conn.exec_driver_sql(f"EXPLAIN EXECUTE explained({args})")
+    plan = "\n".join(result.scalars())
+    await conn.exec_driver_sql("DEALLOCATE explained")
+    return plan
+
+
+@pytest.mark.asyncio
+async def test_open_book_queries_use_partial_index(db, clob_market):
+    user = User(telegram_id=999, first_name="History")
+    db.add(user)
+    await db.commit()
+
+    # Closed history dwarfs the live book; run with EXPLAIN_HISTORY_ROWS=10000000
+    # to reproduce production volume.
+    await db.execute(
+        text(
+            """
+            INSERT INTO orders (id, user_id, market_id, side, price, quantity,
+                                filled_quantity, status, original_intent,
+                                time_in_force, created_at, updated_at)
+            SELECT gen_random_uuid(), :user_id, :market_id,
+                   (CASE WHEN g % 2 = 0 THEN 'buy' ELSE 'sell' END)::orderside,
+                   0.01 + (g % 98) / 100.0, 10,
+                   CASE WHEN g % 1000 = 0 THEN 0 ELSE 10 END,
+                   (CASE WHEN g % 1000 = 0 THEN 'open'
+                         WHEN g % 3 = 0 THEN 'cancelled'
+                         ELSE 'filled' END)::orderstatus,
+                   (CASE WHEN g % 2 = 0 THEN 'buy_yes'
+                         ELSE 'sell_yes' END)::orderintent,
+                   'gtc', now(), now()
+            FROM generate_series(1, :rows) AS g
+            """
+        ),
+        {"user_id": user.id, "market_id": clob_market.id, "rows": HISTORY_ROWS},
+    )
+    await db.commit()
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE orders"))
+
+    book_plan = await _explain(db, _book_side_query(clob_market.id, OrderSide.BUY))
+    assert "Index Only Scan using ix_orders_open_book" in book_plan
+
+    # Matching locks the rows it reads, so it needs the heap, but never
+    # touches closed history
+    match_plan = await _explain(
+        db,
+        _resting_orders_query(
+            clob_market.id, OrderSide.BUY, Decimal("0.50"), uuid.uuid4()
+        ),
+    )
+    assert "ix_orders_open_book" in match_plan
+    assert "Seq Scan" not in match_plan
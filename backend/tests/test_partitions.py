@@ -0,0 +1,98 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, text, update
+
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.services.partitions import PartitionService, month_start, partition_name
+from tests.conftest import make_init_data
+
+
+@pytest.mark.asyncio
+async def test_month_start_wraps_years():
+    value = datetime(2026, 11, 17, 12, tzinfo=timezone.utc)
+    assert month_start(value) == datetime(2026, 11, 1, tzinfo=timezone.utc)
+    assert month_start(value, 2) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert month_start(value, -11) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_partitions_created_pruned_and_detached(db):
+    now = datetime.now(timezone.utc)
+    this_month = partition_name("transactions", month_start(now))
+    next_month = partition_name("transactions", month_start(now, 1))
+
+    user = User(id=uuid.uuid4(), telegram_id=20001, first_name="Ledger")
+    db.add(user)
+    db.add(
+        Transaction(user_id=user.id, type=TransactionType.BONUS, amount=Decimal("10"))
+    )
+    await db.commit()
+
+    service = PartitionService(db)
+    created = await service.ensure_partitions("transactions", now, 1)
+    assert created == [this_month, next_month]
+    assert await service.ensure_partitions("transactions", now, 1) == []
+
+    # The row written before the partition existed moved out of DEFAULT
+    home = await db.scalar(text("SELECT tableoid::regclass::text FROM transactions"))
+    assert home == this_month
+
+    # Time-filtered reads only touch matching partitions
+    query = select(Transaction).where(
+        Transaction.user_id == user.id,
+        Transaction.created_at >= month_start(now, 1),
+    )
+    sql = query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = "\n".join((await db.execute(text(f"EXPLAIN {sql}"))).scalars())
+    assert next_month in plan
+    assert this_month not in plan
+
+    assert await service.detach_before("transactions", month_start(now, 1)) == [
+        this_month
+    ]
+    remaining = await db.scalar(text("SELECT count(*) FROM transactions"))
+    assert remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_transaction_pages_reach_back_through_quiet_months(client, db):
+    r = await client.post(
+        "/v1/auth/telegram", json={"init_data": make_init_data(user_id=20002)}
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    user_id = uuid.UUID(r.json()["user"]["id"])
+
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(created_at=now - timedelta(days=400))
+    )
+    ages = [1, 2, 45, 200, 390]
+    db.add_all(
+        Transaction(
+            user_id=user_id,
+            type=TransactionType.BONUS,
+            amount=Decimal(age),
+            created_at=now - timedelta(days=age),
+        )
+        for age in ages
+    )
+    await db.commit()
+
+    amounts, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (
+            await client.get(
+                "/v1/users/me/transactions", params=params, headers=headers
+            )
+        ).json()
+        amounts += [tx["amount"] for tx in page["items"]]
+        if not (cursor := page["next_cursor"]):
+            break
+    assert amounts == ages
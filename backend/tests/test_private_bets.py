@@ -0,0 +1,226 @@
+import json
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from aiogram.exceptions import TelegramForbiddenError
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.private_bet import PrivateBetParticipant
+from app.models.user import User
+from app.services.broadcast import Sender
+from app.services.private_bet import PrivateBetService, send_voting_notices
+from app.services.settlement import my_bets_key, preview_key
+from app.tasks import notifications
+from tests.conftest import FakeBot, make_init_data, telegram_error
+
+
+@pytest_asyncio.fixture
+async def people(db):
+    users = [
+        User(
+            id=uuid.uuid4(),
+            telegram_id=91000 + i,
+            first_name=name,
+            username=username,
+            referral_code=uuid.uuid4().hex[:8],
+            balance=Decimal("1000"),
+        )
+        for i, (name, username) in enumerate(
+            [("Host", "host"), ("Alice", "Alice_K"), ("Eve", "eve"), ("Anon", None)]
+        )
+    ]
+    db.add_all(users)
+    await db.commit()
+    return users
+
+
+@pytest.mark.asyncio
+async def test_closed_bet_admits_only_invited_usernames(db, redis, people):
+    host, alice, eve, anon = people
+    service = PrivateBetService(db, redis)
+    bet = await service.create_bet(
+        host.id,
+        "Invite only",
+        "",
+        Decimal("10"),
+        datetime.now(timezone.utc) + timedelta(hours=1),
+        "yes",
+        is_closed=True,
+        allowed_usernames=["@alice_k", " Alice_K ", "", "bob"],
+    )
+    assert (await service.invited_usernames([bet]))[bet.id] == ["alice_k", "bob"]
+
+    for outsider in (eve, anon):
+        with pytest.raises(HTTPException) as e:
+            await service.join_bet(outsider.id, bet.invite_code, "no")
+        assert e.value.status_code == 403
+    await service.join_bet(alice.id, bet.invite_code, "no")
+
+    # Invited bets show up in "my bets" before joining
+    rows, _ = await service.get_my_bets(eve.id, eve.username)
+    assert rows == []
+    bob = User(
+        id=uuid.uuid4(),
+        telegram_id=91100,
+        first_name="Bob",
+        username="BOB",
+        referral_code=uuid.uuid4().hex[:8],
+    )
+    db.add(bob)
+    await db.commit()
+    rows, _ = await service.get_my_bets(bob.id, bob.username)
+    assert [row[0].id for row in rows] == [bet.id]
+
+
+@pytest.mark.asyncio
+async def test_my_bets_pages_and_invalidates_listings(db, redis, people):
+    host, alice, eve, _ = people
+    service = PrivateBetService(db, redis)
+    bets = []
+    for i in range(3):
+        bets.append(
+            await service.create_bet(
+                host.id,
+                f"Bet {i}",
+                "",
+                Decimal("10"),
+                datetime.now(timezone.utc) + timedelta(hours=1),
+                "yes",
+            )
+        )
+    await service.join_bet(alice.id, bets[0].invite_code, "no")
+    await service.join_bet(alice.id, bets[2].invite_code, "no")
+
+    rows, cursor = await service.get_my_bets(alice.id, limit=1)
+    assert [(r[0].id, r[1], r[2]) for r in rows] == [(bets[2].id, "Host", "no")]
+    rows, cursor = await service.get_my_bets(alice.id, cursor=cursor, limit=1)
+    assert [r[0].id for r in rows] == [bets[0].id] and cursor is None
+
+    rows, _ = await service.get_my_bets(host.id, limit=5)
+    assert [r[0].id for r in rows] == [b.id for b in reversed(bets)]
+    assert [r[0].yes_count + r[0].no_count for r in rows] == [2, 1, 2]
+
+    # A join drops the cached listing of everyone in that bet, and only theirs
+    for user in (host, alice, eve):
+        await redis.hset(my_bets_key(user.id), "page", "{}")
+    await service.join_bet(eve.id, bets[1].invite_code, "no")
+    assert not await redis.exists(my_bets_key(host.id))
+    assert await redis.exists(my_bets_key(alice.id))
+    assert not await redis.exists(my_bets_key(eve.id))
+    await redis.delete(my_bets_key(alice.id))
+
+
+@pytest.mark.asyncio
+async def test_voting_notices_are_queued_and_recorded(db, redis, people, monkeypatch):
+    host, alice, eve, _ = people
+    jobs = []
+
+    async def kiq(*args):
+        jobs.append(args)
+
+    monkeypatch.setattr(notifications.send_voting_notifications, "kiq", kiq)
+    service = PrivateBetService(db, redis)
+    bet = await service.create_bet(
+        host.id,
+        "Voting bet",
+        "",
+        Decimal("10"),
+        datetime.now(timezone.utc) + timedelta(hours=1),
+        "yes",
+    )
+    await service.join_bet(alice.id, bet.invite_code, "no")
+    await service.join_bet(eve.id, bet.invite_code, "no")
+
+    # The request only queues the fan-out, one job per chunk of participants
+    monkeypatch.setattr(settings, "NOTIFY_CHUNK_USERS", 2)
+    await service.start_voting(host.id, bet.id)
+    assert len(jobs) == 2 and {job[0] for job in jobs} == {str(bet.id)}
+
+    # Sending rolls the session back; keep what the asserts need
+    bet_id = bet.id
+    (host_id, host_chat), (alice_id, alice_chat), (eve_id, eve_chat) = [
+        (u.id, u.telegram_id) for u in (host, alice, eve)
+    ]
+    bot = FakeBot({eve_chat: [telegram_error(TelegramForbiddenError)]})
+    sender = Sender(bot, redis, rate=1000)
+    counts = Counter()
+    for _, after, upto in jobs:
+        counts += await send_voting_notices(
+            db, sender, bet_id, after and uuid.UUID(after), upto and uuid.UUID(upto)
+        )
+    assert counts == {"delivered": 2, "blocked": 1}
+    assert sorted(bot.delivered) == sorted([host_chat, alice_chat])
+    notices = dict(
+        (
+            await db.execute(
+                select(
+                    PrivateBetParticipant.user_id, PrivateBetParticipant.voting_notice
+                )
+            )
+        ).all()
+    )
+    assert notices == {host_id: "delivered", alice_id: "delivered", eve_id: "blocked"}
+
+    # A retried job skips participants already notified
+    assert not await send_voting_notices(db, sender, bet_id, None, None)
+
+
+@pytest.mark.asyncio
+async def test_preview_is_cached_until_the_bet_changes(client, db, redis, people):
+    host, alice, _, _ = people
+    service = PrivateBetService(db, redis)
+    bet = await service.create_bet(
+        host.id,
+        "Shared in a group",
+        "",
+        Decimal("10"),
+        datetime.now(timezone.utc) + timedelta(hours=1),
+        "yes",
+    )
+    code = bet.invite_code
+
+    r = await client.get(f"/v1/bets/preview/{code.lower()}")
+    assert r.json()["participant_count"] == 1
+    assert json.loads(await redis.get(preview_key(code))) == r.json()
+
+    await service.join_bet(alice.id, code, "no")
+    assert not await redis.exists(preview_key(code))
+    r = await client.get(f"/v1/bets/preview/{code}")
+    assert (r.json()["participant_count"], r.json()["creator_name"]) == (2, "Host")
+    await redis.delete(preview_key(code))
+
+
+@pytest.mark.asyncio
+async def test_listing_shows_whitelists_of_closed_bets(client, db):
+    init_data = make_init_data(user_id=300, first_name="Host", username="host")
+    r = await client.post("/v1/auth/telegram", json={"init_data": init_data})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    closes_at = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    for title, usernames in (("Open to all", []), ("Friends only", ["@Bob", "amy"])):
+        r = await client.post(
+            "/v1/bets",
+            json={
+                "title": title,
+                "stake_amount": "10",
+                "closes_at": closes_at,
+                "outcome": "yes",
+                "is_closed": bool(usernames),
+                "allowed_usernames": usernames,
+            },
+            headers=headers,
+        )
+        assert r.status_code == 200, r.text
+
+    assert r.json()["allowed_usernames"] == ["amy", "bob"]
+    items = (await client.get("/v1/bets/my", headers=headers)).json()["items"]
+    assert [(b["title"], b["allowed_usernames"]) for b in items] == [
+        ("Friends only", ["amy", "bob"]),
+        ("Open to all", []),
+    ]
@@ -4,11 +4,34 @@ from decimal import Decimal
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import delete, func, select
 
+from app.core.config import settings
+from app.models.archive import positions_archive
 from app.models.market import Market, MarketStatus
 from app.models.position import Position
+from app.models.transaction import Transaction, TransactionType
 from app.models.user import User
+from app.models.user_stats import UserStats
+from app.services.archive import ArchiveService
 from app.services.resolution import ResolutionService
+from app.services.trade import TradeService
+from app.services.user_stats import UserStatsService
+from app.tasks import notifications
+from tests import conftest
+from tests.conftest import make_init_data
+
+
+@pytest.fixture(autouse=True)
+def queued_notifications(monkeypatch):
+    """Resolution notification jobs, captured instead of kicked."""
+    jobs = []
+
+    async def kiq(*args):
+        jobs.append(args)
+
+    monkeypatch.setattr(notifications.send_resolution_notifications, "kiq", kiq)
+    return jobs
 
 
 @pytest_asyncio.fixture
@@ -84,6 +107,35 @@ async def test_resolve_winners_get_payout(db, setup_market_with_positions):
     assert user_no.balance == Decimal("920")
 
 
+@pytest.mark.asyncio
+async def test_payout_of_fractional_shares_is_floored_to_the_cent(
+    db, setup_market_with_positions
+):
+    market, user_yes, _ = setup_market_with_positions
+    user_id = user_yes.id
+    position = await db.scalar(select(Position).where(Position.user_id == user_id))
+    position.shares = Decimal("33.337891")
+    await db.commit()
+
+    class FakeRedis:
+        async def delete(self, key):
+            pass
+
+    await ResolutionService(db, FakeRedis()).resolve_market(market.id, "yes")
+
+    db.expire_all()
+    user = await db.get(User, user_id)
+    payout = await db.scalar(
+        select(Transaction.amount).where(
+            Transaction.user_id == user_id,
+            Transaction.type == TransactionType.PAYOUT,
+        )
+    )
+    assert payout == Decimal("33.33")
+    assert user.balance == Decimal("950") + payout
+    assert user.total_profit == payout - Decimal("50")
+
+
 @pytest.mark.asyncio
 async def test_cancel_refunds_all(db, setup_market_with_positions):
     market, user_yes, user_no = setup_market_with_positions
@@ -105,3 +157,252 @@ async def test_cancel_refunds_all(db, setup_market_with_positions):
     assert user_yes.balance == Decimal("950") + Decimal("50")
     # user_no gets their 80 PRC cost back
     assert user_no.balance == Decimal("920") + Decimal("80")
+
+
+@pytest.mark.asyncio
+async def test_resolve_multi_outcome_market(db):
+    market = Market(
+        id=uuid.uuid4(),
+        title="Race",
+        closes_at=datetime.now(timezone.utc) + timedelta(days=1),
+        amm_type="lmsr_multi",
+        outcomes=["alice", "bob", "carol"],
+        q_outcomes=[Decimal("40"), Decimal("30"), Decimal("0")],
+    )
+    users = [
+        User(
+            id=uuid.uuid4(),
+            telegram_id=20001 + i,
+            first_name=name,
+            referral_code=uuid.uuid4().hex[:8],
+            balance=Decimal("900"),
+            total_trades=1,
+        )
+        for i, name in enumerate(("alice", "bob"))
+    ]
+    db.add(market)
+    db.add_all(users)
+    db.add_all(
+        Position(
+            user_id=u.id,
+            market_id=market.id,
+            outcome=u.first_name,
+            shares=Decimal(shares),
+            total_cost=Decimal("20"),
+        )
+        for u, shares in zip(users, ("40", "30"))
+    )
+    await db.commit()
+
+    class FakeRedis:
+        async def delete(self, key):
+            pass
+
+    service = ResolutionService(db, FakeRedis())
+    result = await service.resolve_market(market.id, "bob")
+
+    for u in users:
+        await db.refresh(u)
+    assert result["winners_count"] == 1
+    assert users[0].balance == Decimal("900")
+    assert users[1].balance == Decimal("930")
+
+
+@pytest.mark.asyncio
+async def test_archived_market_history_still_readable(
+    client, db, setup_market_with_positions
+):
+    market, user_yes, _ = setup_market_with_positions
+
+    class FakeRedis:
+        async def delete(self, key):
+            pass
+
+    await ResolutionService(db, FakeRedis()).resolve_market(market.id, "yes")
+
+    service = ArchiveService(db, FakeRedis())
+    now = datetime.now(timezone.utc)
+    assert await service.archive_due(now, 30, 10) == 0
+    assert await service.archive_due(now + timedelta(days=31), 30, 10) == 1
+
+    hot = await db.scalar(select(func.count()).select_from(Position))
+    cold = await db.scalar(select(func.count()).select_from(positions_archive))
+    assert (hot, cold) == (0, 2)
+
+    init_data = make_init_data(user_id=user_yes.telegram_id)
+    r = await client.post("/v1/auth/telegram", json={"init_data": init_data})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = await client.get("/v1/users/me/positions", headers=headers)
+    assert [p["market_title"] for p in r.json()] == [market.title]
+
+    r = await client.get("/v1/users/me/transactions", headers=headers)
+    assert [tx["type"] for tx in r.json()["items"]] == ["payout"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_markets_are_archived(db, setup_market_with_positions):
+    market, _, _ = setup_market_with_positions
+
+    class FakeRedis:
+        async def delete(self, key):
+            pass
+
+    # Cancelled before cancel_market stamped resolved_at: only updated_at is set
+    legacy = Market(
+        id=uuid.uuid4(),
+        title="Long-cancelled market",
+        closes_at=datetime.now(timezone.utc) - timedelta(days=90),
+        liquidity_b=Decimal("100"),
+        status=MarketStatus.CANCELLED,
+        updated_at=datetime.now(timezone.utc) - timedelta(days=60),
+    )
+    db.add(legacy)
+    await db.commit()
+
+    await ResolutionService(db, FakeRedis()).cancel_market(market.id)
+    await db.refresh(market)
+    assert market.resolved_at is not None
+
+    service = ArchiveService(db, FakeRedis())
+    later = datetime.now(timezone.utc) + timedelta(days=31)
+    # Oldest first, whichever way it finished
+    assert await service.archive_due(later, 30, 1) == 1
+    assert await service.archive_due(later, 30, 1) == 1
+    archived = await db.scalars(
+        select(Market.id)
+        .where(Market.archived_at.is_not(None))
+        .order_by(Market.archived_at)
+    )
+    assert archived.all() == [legacy.id, market.id]
+
+
+@pytest.mark.asyncio
+async def test_user_stats_settle_and_rebuild(db):
+    market = Market(
+        id=uuid.uuid4(),
+        title="Stats Market",
+        closes_at=datetime.now(timezone.utc) + timedelta(days=1),
+        liquidity_b=Decimal("100"),
+    )
+    users = [
+        User(
+            id=uuid.uuid4(),
+            telegram_id=30001 + i,
+            first_name=f"Trader {i}",
+            referral_code=uuid.uuid4().hex[:8],
+        )
+        for i in range(2)
+    ]
+    db.add(market)
+    db.add_all(users)
+    await db.commit()
+
+    class FakeRedis:
+        async def delete(self, key):
+            pass
+
+    trade = TradeService(db, FakeRedis())
+    await trade.buy(users[0].id, market.id, "yes", Decimal("50"))
+    await trade.buy(users[1].id, market.id, "no", Decimal("50"))
+    await ResolutionService(db, FakeRedis()).resolve_market(market.id, "yes")
+
+    service = UserStatsService(db)
+    winner, loser = [await service.get(u.id) for u in users]
+    assert (winner.buys, winner.buy_amount, winner.payouts) == (1, Decimal("50"), 1)
+    assert winner.realized_pnl == winner.payout_amount - Decimal("50") > 0
+    assert (winner.wins, winner.current_streak, winner.best_streak) == (1, 1, 1)
+    assert (loser.realized_pnl, loser.losses, loser.current_streak) == (
+        Decimal("-50"),
+        1,
+        -1,
+    )
+    assert [u.win_rate for u in users] == [Decimal("100"), Decimal("0")]
+    # Settled positions still hold their shares
+    assert (winner.active_positions, winner.position_cost) == (1, Decimal("50"))
+
+    columns = [c.name for c in UserStats.__table__.columns if c.name != "updated_at"]
+    incremental = [[getattr(s, c) for c in columns] for s in (winner, loser)]
+
+    await db.execute(delete(UserStats))
+    await db.commit()
+    db.expunge_all()
+    assert await service.rebuild_all(batch_size=1) == 2
+
+    rebuilt = [await service.get(u.id) for u in users]
+    assert [[getattr(s, c) for c in columns] for s in rebuilt] == incremental
+
+
+@pytest.mark.asyncio
+async def test_resolution_notifications_are_chunked(
+    db, monkeypatch, queued_notifications
+):
+    market = Market(
+        id=uuid.uuid4(),
+        title="Notify <Market>",
+        closes_at=datetime.now(timezone.utc) + timedelta(days=1),
+        liquidity_b=Decimal("100"),
+    )
+    db.add(market)
+    users = [
+        User(
+            id=uuid.uuid4(),
+            telegram_id=60000 + i,
+            first_name=f"Holder {i}",
+            referral_code=uuid.uuid4().hex[:8],
+        )
+        for i in range(5)
+    ]
+    db.add_all(users)
+    holdings = [("yes", 10), ("no", 20), ("yes", 30), ("no", 40), ("no", 50)]
+    db.add_all(
+        Position(
+            user_id=u.id,
+            market_id=market.id,
+            outcome=outcome,
+            shares=Decimal(shares),
+            total_cost=Decimal(shares) / 2,
+        )
+        for u, (outcome, shares) in zip(users, holdings)
+    )
+    # Holds both sides: one message, paid for the winning side
+    db.add(
+        Position(
+            user_id=users[1].id,
+            market_id=market.id,
+            outcome="yes",
+            shares=Decimal("5"),
+            total_cost=Decimal("2"),
+        )
+    )
+    await db.commit()
+
+    class FakeRedis:
+        async def delete(self, key):
+            pass
+
+    monkeypatch.setattr(settings, "NOTIFY_CHUNK_USERS", 2)
+    await ResolutionService(db, FakeRedis()).resolve_market(market.id, "yes")
+
+    # 5 holders in chunks of 2; jobs carry ids only
+    assert len(queued_notifications) == 3
+    assert all(len(job) == 3 for job in queued_notifications)
+
+    class FakeBot:
+        sent: dict[int, str] = {}
+
+        async def send_message(self, chat_id, text, **kwargs):
+            self.sent[chat_id] = text
+
+    monkeypatch.setattr(notifications, "async_session", conftest.test_session)
+    monkeypatch.setattr(notifications, "get_bot", FakeBot)
+    for job in queued_notifications:
+        await notifications.send_resolution_notifications.original_func(*job)
+
+    sent = FakeBot.sent
+    assert sorted(sent) == list(range(60000, 60005))
+    assert "+10 PRC" in sent[60000]
+    assert "+5 PRC" in sent[60001]
+    assert "+30 PRC" in sent[60002]
+    assert "не сыграла" in sent[60003] and "не сыграла" in sent[60004]
+    assert "Notify &lt;Market&gt;" in sent[60004]
@@ -0,0 +1,103 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from app.models.private_bet import PrivateBetStatus
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.services.ledger import LedgerService
+from app.services.private_bet import PrivateBetService
+from app.services.settlement import SettlementService
+
+
+@pytest_asyncio.fixture
+async def bettors(db):
+    users = []
+    for i in range(4):
+        user = User(
+            id=uuid.uuid4(),
+            telegram_id=80000 + i,
+            first_name=f"Bettor {i}",
+            referral_code=uuid.uuid4().hex[:8],
+        )
+        LedgerService(db).open_account(user)
+        users.append(user)
+    db.add_all(users)
+    await db.commit()
+    return users
+
+
+async def _bet(db, redis, creator, others=(), side="yes"):
+    service = PrivateBetService(db, redis)
+    bet = await service.create_bet(
+        creator.id,
+        "Settlement bet",
+        "",
+        Decimal("50"),
+        datetime.now(timezone.utc) + timedelta(hours=1),
+        side,
+    )
+    for user, outcome in others:
+        await service.join_bet(user.id, bet.invite_code, outcome)
+    return bet
+
+
+@pytest.mark.asyncio
+async def test_due_bets_settle_in_bounded_chunks(db, redis, bettors):
+    u0, u1, u2, u3 = bettors
+    won = await _bet(db, redis, u0, [(u1, "yes"), (u2, "no")])
+    tied = await _bet(db, redis, u3, [(u2, "no")])
+    lonely = await _bet(db, redis, u0)
+
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    won.status = tied.status = PrivateBetStatus.VOTING
+    won.voting_deadline = tied.voting_deadline = past
+    won.yes_votes, won.no_votes = 2, 1
+    lonely.closes_at = past
+    await db.commit()
+
+    settlement = SettlementService(db)
+    settlement.max_users = 3
+    now = datetime.now(timezone.utc)
+    chunks = []
+    while chunk := await settlement.resolve_expired(now):
+        await db.commit()
+        chunks.append(len(chunk))
+    assert sorted(chunks) == [1, 1]
+    assert await settlement.close_expired(now) == [lonely.id]
+    await db.commit()
+
+    for bet in (won, tied, lonely):
+        await db.refresh(bet)
+    assert (won.status, won.resolution_outcome) == (PrivateBetStatus.RESOLVED, "yes")
+    assert tied.status == lonely.status == PrivateBetStatus.CANCELLED
+
+    # Pool 150 less 2% fee, split between the two yes voters
+    balances = [
+        await db.scalar(select(User.balance).where(User.id == u.id)) for u in bettors
+    ]
+    assert balances == [
+        Decimal("1023.50"),
+        Decimal("1023.50"),
+        Decimal("950.00"),
+        Decimal("1000.00"),
+    ]
+    counts = dict(
+        (
+            await db.execute(
+                select(Transaction.type, func.count())
+                .where(
+                    Transaction.type.in_(
+                        [TransactionType.BET_PAYOUT, TransactionType.BET_REFUND]
+                    )
+                )
+                .group_by(Transaction.type)
+            )
+        ).all()
+    )
+    assert counts == {TransactionType.BET_PAYOUT: 2, TransactionType.BET_REFUND: 3}
+    assert await LedgerService(db).reconcile(100) == []
@@ -111,3 +111,130 @@ async def test_sell_after_buy(client, db, auth_token, market):
     )
     assert sell_r.status_code == 200
     assert sell_r.json()["revenue"] > 0
+
+
+@pytest.mark.asyncio
+async def test_market_stats_follow_trades(client, db, auth_token, market):
+    token, user_id = auth_token
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r = await client.get(f"/v1/analytics/market/{market.id}/stats")
+    assert r.json()["unique_traders"] == 0
+
+    for _ in range(2):
+        await client.post(
+            "/v1/trade/buy",
+            json={"market_id": str(market.id), "outcome": "yes", "amount": "50"},
+            headers=headers,
+        )
+
+    r = await client.get(f"/v1/analytics/market/{market.id}/stats")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["unique_traders"] == 1
+    assert data["buy_stats"] == {"count": 2, "volume": 100.0}
+    assert data["sell_stats"]["count"] == 0
+    assert data["fees"] > 0
+    assert data["volume_24h"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_portfolio_values_positions(client, db, auth_token, market):
+    token, user_id = auth_token
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r = await client.get("/v1/users/me/portfolio", headers=headers)
+    assert r.json() == {
+        "positions": [],
+        "totals": {
+            "total_cost": 0,
+            "value": 0,
+            "liquidation_value": 0,
+            "unrealized_pnl": 0,
+        },
+    }
+
+    r = await client.post(
+        "/v1/trade/buy",
+        json={"market_id": str(market.id), "outcome": "yes", "amount": "50"},
+        headers=headers,
+    )
+    shares = r.json()["shares"]
+
+    r = await client.get("/v1/users/me/portfolio", headers=headers)
+    [position] = r.json()["positions"]
+    assert position["shares"] == shares
+    assert position["price"] > 0.5
+    # Selling back walks down the curve, so it is worth less than shares × price
+    assert 0 < position["liquidation_value"] < position["value"]
+    assert position["unrealized_pnl"] == round(position["liquidation_value"] - 50, 2)
+    assert r.json()["totals"]["unrealized_pnl"] == position["unrealized_pnl"]
+
+    # The user's own trade invalidates the cached valuation
+    await client.post(
+        "/v1/trade/sell",
+        json={"market_id": str(market.id), "outcome": "yes", "shares": str(shares)},
+        headers=headers,
+    )
+    r = await client.get("/v1/users/me/portfolio", headers=headers)
+    assert r.json()["positions"] == []
+
+
+@pytest_asyncio.fixture
+async def multi_market(db):
+    m = Market(
+        id=uuid.uuid4(),
+        title="Who wins the race?",
+        category="test",
+        closes_at=datetime.now(timezone.utc) + timedelta(days=7),
+        amm_type="lmsr_multi",
+        liquidity_b=Decimal("100"),
+        outcomes=["alice", "bob", "carol"],
+        q_outcomes=[Decimal("0")] * 3,
+    )
+    db.add(m)
+    await db.commit()
+    await db.refresh(m)
+    return m
+
+
+@pytest.mark.asyncio
+async def test_multi_outcome_buy_and_sell(client, db, auth_token, multi_market):
+    token, user_id = auth_token
+    headers = {"Authorization": f"Bearer {token}"}
+
+    buy_r = await client.post(
+        "/v1/trade/buy",
+        json={"market_id": str(multi_market.id), "outcome": "bob", "amount": "50"},
+        headers=headers,
+    )
+    assert buy_r.status_code == 200
+    data = buy_r.json()
+    assert data["shares"] > 0
+    assert len(data["prices"]) == 3
+    assert data["prices"][1] > data["prices"][0]
+
+    sell_r = await client.post(
+        "/v1/trade/sell",
+        json={
+            "market_id": str(multi_market.id),
+            "outcome": "bob",
+            "shares": str(round(data["shares"] / 2, 6)),
+        },
+        headers=headers,
+    )
+    assert sell_r.status_code == 200
+    assert sell_r.json()["revenue"] > 0
+
+
+@pytest.mark.asyncio
+async def test_multi_outcome_rejects_unknown_outcome(
+    client, db, auth_token, multi_market
+):
+    token, user_id = auth_token
+    r = await client.post(
+        "/v1/trade/buy",
+        json={"market_id": str(multi_market.id), "outcome": "yes", "amount": "50"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 400
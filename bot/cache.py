@@ -0,0 +1,26 @@
+"""Shared Redis client for every handler, and reads of backend caches."""
+
+import json
+import logging
+
+from redis.asyncio import Redis
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+async def bet_preview(code: str) -> dict | None:
+    """Cached /v1/bets/preview/{code} response, or None on a miss.
+
+    The backend fills and invalidates the key (see preview_key in
+    app/services/settlement.py).
+    """
+    try:
+        raw = await redis.get(f"bet:preview:{code.upper()}")
+    except Exception as e:
+        logger.debug(f"Bet preview cache unavailable: {e}")
+        return None
+    return json.loads(raw) if raw else None
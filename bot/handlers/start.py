@@ -5,8 +5,7 @@ import aiohttp
 from aiogram import Router, F
 from aiogram.filters import CommandStart, Command
 from aiogram.types import Message, CallbackQuery
-from redis.asyncio import Redis
-
+import cache
 from config import settings
 from templates import Msg, Kb
 
@@ -24,16 +23,18 @@ async def cmd_start(message: Message):
         bet_code = args[1][4:]
         webapp_url = f"{settings.WEBAPP_URL}/bet/join/{bet_code}"
 
-        # Try to fetch bet details for a rich invite message
-        bet_info = None
-        try:
-            api_url = f"{settings.APP_URL}/v1/bets/preview/{bet_code}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(api_url, timeout=aiohttp.ClientTimeout(total=3)) as resp:
-                    if resp.status == 200:
-                        bet_info = await resp.json()
-        except Exception as e:
-            logger.debug(f"Failed to fetch bet preview: {e}")
+        # Bet details for a rich invite message: from the backend's cache,
+        # or over HTTP (which fills it) on a miss
+        bet_info = await cache.bet_preview(bet_code)
+        if bet_info is None:
+            try:
+                api_url = f"{settings.APP_URL}/v1/bets/preview/{bet_code}"
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(api_url, timeout=aiohttp.ClientTimeout(total=3)) as resp:
+                        if resp.status == 200:
+                            bet_info = await resp.json()
+            except Exception as e:
+                logger.debug(f"Failed to fetch bet preview: {e}")
 
         if bet_info:
             from datetime import datetime
@@ -110,38 +111,34 @@ async def cmd_start(message: Message):
     # ── Bot-based web login deep link ──
     if len(args) > 1 and args[1].startswith("login_"):
         login_token = args[1][6:]
-        redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
-        try:
-            key = f"web_login:{login_token}"
-            raw = await redis.get(key)
-            if raw:
-                data = json.loads(raw)
-                if data["status"] == "pending":
-                    user = message.from_user
-                    user_data = {
-                        "id": user.id,
-                        "first_name": user.first_name,
-                        "last_name": user.last_name,
-                        "username": user.username,
-                    }
-                    await redis.set(
-                        key,
-                        json.dumps({"status": "confirmed", "user": user_data}),
-                        ex=300,
-                    )
-                    await message.answer(
-                        Msg.login_success(), parse_mode="HTML"
-                    )
-                else:
-                    await message.answer(
-                        Msg.login_used(), parse_mode="HTML"
-                    )
+        key = f"web_login:{login_token}"
+        raw = await cache.redis.get(key)
+        if raw:
+            data = json.loads(raw)
+            if data["status"] == "pending":
+                user = message.from_user
+                user_data = {
+                    "id": user.id,
+                    "first_name": user.first_name,
+                    "last_name": user.last_name,
+                    "username": user.username,
+                }
+                await cache.redis.set(
+                    key,
+                    json.dumps({"status": "confirmed", "user": user_data}),
+                    ex=300,
+                )
+                await message.answer(
+                    Msg.login_success(), parse_mode="HTML"
+                )
             else:
                 await message.answer(
-                    Msg.login_expired(), parse_mode="HTML"
+                    Msg.login_used(), parse_mode="HTML"
                 )
-        finally:
-            await redis.aclose()
+        else:
+            await message.answer(
+                Msg.login_expired(), parse_mode="HTML"
+            )
         return
 
     # Deep link referral
@@ -10,6 +10,7 @@ from aiogram.types import (
 )
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
+import cache
 from config import settings
 from handlers import start, balance, notifications
 from templates.emoji import E
@@ -78,6 +79,7 @@ async def on_startup(app: web.Application):
 async def on_shutdown(app: web.Application):
     await bot.delete_webhook()
     await bot.session.close()
+    await cache.redis.aclose()
 
 
 def main():
@@ -119,7 +119,8 @@ export const betsApi = {
     allowed_usernames?: string[];
   }) => api.post<PrivateBet>("/bets", data),
 
-  my: () => api.get<PrivateBet[]>("/bets/my"),
+  my: (params?: { cursor?: string; limit?: number }) =>
+    api.get<PaginatedResponse<PrivateBet>>("/bets/my", { params }),
 
   get: (id: string) => api.get<PrivateBetDetail>(`/bets/${id}`),
 
@@ -1,4 +1,9 @@
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import {
+  useInfiniteQuery,
+  useMutation,
+  useQuery,
+  useQueryClient,
+} from "@tanstack/react-query";
 import { betsApi, usersApi } from "@/api/endpoints";
 import { useAuthStore } from "@/stores/authStore";
 
@@ -7,12 +12,17 @@ function refreshBalance(updateBalance: (b: number) => void) {
 }
 
 export function useMyBets() {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: ["private-bets", "my"],
-    queryFn: async () => {
-      const { data } = await betsApi.my();
+    queryFn: async ({ pageParam }) => {
+      const { data } = await betsApi.my({
+        cursor: pageParam as string | undefined,
+        limit: 20,
+      });
       return data;
     },
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
   });
 }
 
@@ -5,7 +5,9 @@ import { BetCard } from "@/components/BetCard";
 import { useWebApp } from "@/hooks/useWebApp";
 
 export function BetsPage() {
-  const { data: bets, isLoading } = useMyBets();
+  const { data, fetchNextPage, hasNextPage, isFetchingNextPage, isLoading } =
+    useMyBets();
+  const bets = data?.pages.flatMap((p) => p.items);
   const { haptic } = useWebApp();
   const navigate = useNavigate();
   const [code, setCode] = useState("");
@@ -65,6 +67,16 @@ export function BetsPage() {
           {bets.map((bet) => (
             <BetCard key={bet.id} bet={bet} />
           ))}
+
+          {hasNextPage && (
+            <button
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+              className="w-full py-2 text-sm text-tg-link"
+            >
+              {isFetchingNextPage ? "Загрузка..." : "Показать ещё"}
+            </button>
+          )}
         </div>
       )}
 
@@ -24,6 +24,8 @@ export interface Market {
   price_no: number;
   total_volume: number;
   total_traders: number;
+  comment_count: number;
+  open_order_count: number;
   closes_at: string;
   is_featured: boolean;
   created_at: string;
@@ -143,6 +145,7 @@ export interface PrivateBet {
   voting_deadline: string;
   yes_count: number;
   no_count: number;
+  participant_count: number;
   total_pool: number;
   created_at: string;
   creator_name: string;